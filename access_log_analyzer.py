@@ -4,10 +4,537 @@ Flaskアプリケーションのアクセスログを解析し、統計情報を
 """
 import re
 import os
+import sys
+import math
 from datetime import datetime, timedelta
 from collections import defaultdict, Counter, OrderedDict
 from urllib.parse import urlparse, parse_qs
 import json
+import base64
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, reduce
+from itertools import islice
+from operator import itemgetter
+
+TAIL_BLOCK_SIZE = 64 * 1024  # 末尾から読み込むブロックサイズ
+TOP_K_CAPACITY = 1000  # 上位集計で保持する件数（表示は上位20件まで）
+UNIQUE_EXACT_LIMIT = 50000  # ユニーク数をこの件数までは正確に数え、超えたらHyperLogLogに切り替える
+HYPERLOGLOG_PRECISION = 14  # レジスタ数 2^14（標準誤差 約0.8%）
+PARALLEL_CHUNK_SIZE = 32 * 1024 * 1024  # 並列分析で1プロセスに渡すバイト範囲の大きさ
+FORMAT_SAMPLE_LINES = 100  # ログフォーマットの判定に使う末尾の行数
+
+MONTHS = {name: index for index, name in enumerate(
+    ('Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'), start=1)}
+
+# 繰り返し現れる値は同じ文字列オブジェクトを共有する（メモリ削減とCounterのキー比較の高速化）
+INTERNED_FIELDS = ('ip', 'method', 'protocol', 'status', 'referer', 'user_agent')
+
+# 引用符で囲まれた値（\" \\ 等のバックスラッシュエスケープを含む。Apache・nginx・access_loggerの出力形式）
+QUOTED_FIELD = r'[^"\\]*(?:\\.[^"\\]*)*'
+ESCAPED_FIELDS = ('path', 'referer', 'user_agent')
+_ESCAPE_SEQUENCE_PATTERN = re.compile(r'\\(.)')
+_UNESCAPES = {'"': '"', '\\': '\\', 'n': '\n', 'r': '\r', 't': '\t'}
+
+def unescape_log_field(value):
+    """ログ行のバックスラッシュエスケープを元の文字に戻す（未知のエスケープはそのまま）"""
+    if '\\' not in value:
+        return value
+    return _ESCAPE_SEQUENCE_PATTERN.sub(lambda m: _UNESCAPES.get(m.group(1), m.group(0)), value)
+
+# フォールバックパース用
+FALLBACK_IP_PATTERN = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
+FALLBACK_METHOD_PATTERN = re.compile(r'\b(GET|POST|PUT|DELETE|HEAD|OPTIONS|PATCH)\b')
+FALLBACK_STATUS_PATTERN = re.compile(r'\b(200|201|204|301|302|400|401|403|404|500|502|503)\b')
+
+
+def iter_lines_reverse(log_file, block_size=TAIL_BLOCK_SIZE):
+    """
+    ファイル末尾から1行ずつ逆順に返すジェネレータ（バイト列、改行なし）
+    ブロック単位でEOFからシークして読むため、メモリ使用量はファイルサイズに依存しない
+    """
+    with open(log_file, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        remainder = b''
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b'\n')
+            # 先頭の断片は前のブロックと合わせて1行になる
+            remainder = lines[0]
+            for line in reversed(lines[1:]):
+                yield line
+        yield remainder
+
+
+def parse_clf_datetime(value):
+    """
+    '18/Oct/2026:15:41:40 +0900' 形式の日時を、オフセットを除いたログ上の時刻（ナイーブなdatetime）に変換
+    固定位置の切り出しで変換し、形式が異なる場合のみstrptimeを使う
+    """
+    length = len(value)
+    if (length == 26 and value[20] == ' ' and value[21] in '+-' and value[22:24] < '24'
+            and value[22:24].isdigit() and value[24] in '012345' and value[25].isdigit()) or \
+            (length == 21 and value[20] == ' '):
+        # 末尾が空白のみの行は、オフセットが出力されていなかった以前のアクセスログ
+        if value[2] == '/' and value[6] == '/' and value[11] == ':' and value[14] == ':' and value[17] == ':':
+            month = MONTHS.get(value[3:6])
+            if month is not None:
+                try:
+                    return datetime(int(value[7:11]), month, int(value[0:2]),
+                                    int(value[12:14]), int(value[15:17]), int(value[18:20]))
+                except ValueError:
+                    pass
+    return datetime.strptime(value, '%d/%b/%Y:%H:%M:%S %z').replace(tzinfo=None)
+
+
+def iter_lines(log_file):
+    """
+    ファイル先頭から空行以外の行を返すジェネレータ（文字列、前後の空白除去済み）
+    """
+    with open(log_file, 'r', encoding='utf-8', errors='ignore') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def tail_lines(log_file, max_lines, block_size=TAIL_BLOCK_SIZE):
+    """
+    ファイル末尾の空行以外の最大max_lines行を新しい順に返すジェネレータ（文字列、前後の空白除去済み）
+    """
+    lines = (line.decode('utf-8', errors='ignore').strip()
+             for line in iter_lines_reverse(log_file, block_size))
+    return islice((line for line in lines if line), max_lines)
+
+
+BOT_KEYWORDS = (
+    'bot', 'crawler', 'spider', 'scraper', 'wget', 'curl',
+    'googlebot', 'bingbot', 'slurp', 'facebookexternalhit',
+    'twitterbot', 'linkedinbot', 'whatsapp', 'telegram',
+    'python-requests', 'java/', 'okhttp', 'apache-httpclient'
+)
+
+ADMIN_PATH_PATTERNS = (
+    '/admin', '/management-panel', '/wp-admin', '/administrator',
+    '/login', '/auth', '/dashboard', '/panel'
+)
+
+STATIC_EXTENSIONS = (
+    '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.ico', '.svg',
+    '.woff', '.woff2', '.ttf', '.eot', '.pdf', '.zip', '.txt',
+    '.xml', '.json', '.map', '.webp', '.mp3', '.mp4', '.avi'
+)
+
+
+# 同じUser-Agent・パスが繰り返し現れるため判定結果をキャッシュする
+@lru_cache(maxsize=4096)
+def is_bot_user_agent(user_agent):
+    """ユーザーエージェントがボットかどうかを判定"""
+    if not user_agent or user_agent == 'unknown':
+        return False
+    ua_lower = user_agent.lower()
+    return any(keyword in ua_lower for keyword in BOT_KEYWORDS)
+
+
+@lru_cache(maxsize=4096)
+def is_admin_path(path):
+    """パスが管理画面へのアクセスかどうかを判定"""
+    if not path or path == 'unknown':
+        return False
+    path_lower = path.lower()
+    return any(pattern in path_lower for pattern in ADMIN_PATH_PATTERNS)
+
+
+@lru_cache(maxsize=4096)
+def is_static_file(path):
+    """パスが静的ファイルへのアクセスかどうかを判定"""
+    if not path or path == 'unknown':
+        return False
+    path_lower = path.lower()
+    return path_lower.endswith(STATIC_EXTENSIONS) or '/static/' in path_lower
+
+
+class TopKCounter:
+    """
+    上位K件の近似カウンター（Space-Saving法を一括削除で償却したもの）
+    保持件数が容量の2倍に達したら上位の容量分だけ残し、削除した最大件数を以後の新規キーの初期値にする
+    一度も削除していなければ正確な件数、削除後は真の件数以上の推定値になる
+    """
+
+    def __init__(self, capacity=TOP_K_CAPACITY):
+        self.capacity = capacity
+        self.counts = {}
+        self.floor = 0  # 削除したキーの最大件数（新規キーが過去に持っていた可能性のある件数の上限）
+
+    def add(self, key, count=1):
+        counts = self.counts
+        if key in counts:
+            counts[key] += count
+        else:
+            counts[key] = self.floor + count
+            if len(counts) >= self.capacity * 2:
+                self._prune()
+
+    def _prune(self):
+        items = sorted(self.counts.items(), key=itemgetter(1), reverse=True)
+        self.floor = max(self.floor, items[self.capacity][1])
+        self.counts = dict(items[:self.capacity])
+
+    def merge(self, other):
+        """別の範囲の集計を加える（片方にしかないキーは、もう片方では削除済みだった可能性を含めた上限で合算）"""
+        counts = self.counts
+        for key in counts.keys() - other.counts.keys():
+            counts[key] += other.floor
+        for key, count in other.counts.items():
+            counts[key] = counts.get(key, self.floor) + count
+        self.floor += other.floor
+        if len(counts) >= self.capacity * 2:
+            self._prune()
+        return self
+
+    def to_state(self):
+        """保存用の値（JSONに変換できる形式、容量を超える分は削除してから）"""
+        if len(self.counts) > self.capacity:
+            self._prune()
+        return {'counts': self.counts, 'floor': self.floor}
+
+    @classmethod
+    def from_state(cls, state, capacity=TOP_K_CAPACITY):
+        counter = cls(capacity)
+        counter.counts = dict(state['counts'])
+        counter.floor = state['floor']
+        return counter
+
+    @property
+    def is_exact(self):
+        return self.floor == 0
+
+    def most_common(self, n=None):
+        return sorted(self.counts.items(), key=itemgetter(1), reverse=True)[:n]
+
+
+class UniqueCounter:
+    """
+    ユニーク数のカウンター
+    UNIQUE_EXACT_LIMIT件までは集合で正確に数え、超えたら固定サイズのHyperLogLogで近似する
+    """
+
+    def __init__(self):
+        self.values = set()
+        self.registers = None
+
+    def add(self, value):
+        if self.registers is None:
+            self.values.add(value)
+            if len(self.values) > UNIQUE_EXACT_LIMIT:
+                self._switch_to_sketch()
+        else:
+            self._add_hashed(value)
+
+    def _switch_to_sketch(self):
+        self.registers = bytearray(1 << HYPERLOGLOG_PRECISION)
+        for value in self.values:
+            self._add_hashed(value)
+        self.values = set()
+
+    def _add_hashed(self, value):
+        # プロセス間で結果が変わらないよう組み込みのhash()ではなく固定のハッシュ関数を使う
+        hashed = int.from_bytes(hashlib.blake2b(value.encode('utf-8', 'surrogateescape'), digest_size=8).digest(), 'big')
+        index = hashed >> (64 - HYPERLOGLOG_PRECISION)
+        rest = hashed & ((1 << (64 - HYPERLOGLOG_PRECISION)) - 1)
+        rank = (64 - HYPERLOGLOG_PRECISION) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """別の範囲の集計を加える（HyperLogLog同士はレジスタごとの最大値）"""
+        if self.registers is None and other.registers is None:
+            self.values |= other.values
+            if len(self.values) > UNIQUE_EXACT_LIMIT:
+                self._switch_to_sketch()
+            return self
+        if self.registers is None:
+            self._switch_to_sketch()
+        if other.registers is None:
+            for value in other.values:
+                self._add_hashed(value)
+        else:
+            self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def to_state(self):
+        """保存用の値（JSONに変換できる形式）"""
+        if self.registers is None:
+            return {'values': sorted(self.values)}
+        return {'registers': base64.b64encode(bytes(self.registers)).decode('ascii')}
+
+    @classmethod
+    def from_state(cls, state):
+        counter = cls()
+        if 'registers' in state:
+            counter.registers = bytearray(base64.b64decode(state['registers']))
+        else:
+            counter.values = set(state['values'])
+        return counter
+
+    @property
+    def is_exact(self):
+        return self.registers is None
+
+    def __len__(self):
+        if self.registers is None:
+            return len(self.values)
+        size = len(self.registers)
+        estimate = 0.7213 / (1 + 1.079 / size) * size * size / sum(2.0 ** -rank for rank in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * size and zeros:
+            # 小さい値の補正（Linear Counting）
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+
+class LogStats:
+    """
+    アクセスログの集計（1行ずつ更新するため、ログの行数によらずメモリ使用量が一定）
+    """
+
+    TOP_K_FIELDS = ('pages', 'ips', 'errors', 'user_agents', 'referers')
+    COUNT_FIELDS = ('total_requests', 'bot_requests', 'admin_requests', 'static_requests')
+
+    def __init__(self):
+        self.total_requests = 0
+        self.bot_requests = 0
+        self.admin_requests = 0
+        self.static_requests = 0
+        self.unique_ips = UniqueCounter()
+        self.status_codes = Counter()
+        self.methods = Counter()
+        self.hourly_stats = Counter()
+        self.daily_stats = Counter()
+        self.pages = TopKCounter()
+        self.ips = TopKCounter()
+        self.errors = TopKCounter()
+        self.user_agents = TopKCounter()
+        self.referers = TopKCounter()
+        self.start_time = None
+        self.end_time = None
+
+    def add(self, entry):
+        """パース済みの1行分を集計に加える"""
+        self.total_requests += 1
+        
+        # ステータスコード・HTTPメソッド
+        status = entry.get('status', 'unknown')
+        self.status_codes[status] += 1
+        self.methods[entry.get('method', 'unknown')] += 1
+        
+        # ページ（静的ファイルを除外）
+        path = entry.get('path_clean', entry.get('path', 'unknown'))
+        if is_static_file(path):
+            self.static_requests += 1
+        else:
+            self.pages.add(path)
+        if is_admin_path(path):
+            self.admin_requests += 1
+        
+        # IPアドレス
+        ip = entry.get('ip', 'unknown')
+        self.ips.add(ip)
+        self.unique_ips.add(ip)
+        
+        # エラー（4xx, 5xx）
+        if status.startswith(('4', '5')):
+            self.errors.add(f"{status} {path}")
+        
+        # ユーザーエージェント（ボット検出）
+        ua = entry.get('user_agent', 'unknown')
+        if is_bot_user_agent(ua):
+            self.bot_requests += 1
+        if ua != 'unknown':
+            self.user_agents.add(ua)
+        
+        # リファラー
+        referer = entry.get('referer', 'unknown')
+        if referer and referer not in ('unknown', '-'):
+            self.referers.add(referer)
+        
+        # 時間別統計・分析期間
+        dt = entry['parsed_datetime']
+        self.hourly_stats[dt.hour] += 1
+        self.daily_stats[dt.date()] += 1
+        if self.start_time is None or dt < self.start_time:
+            self.start_time = dt
+        if self.end_time is None or dt > self.end_time:
+            self.end_time = dt
+
+    def merge(self, other):
+        """
+        別の範囲・ファイルの集計を加える
+        加算・最大値・最小値だけで構成されるため、分割して集計した結果をどの順でまとめても同じ統計になる
+        """
+        self.total_requests += other.total_requests
+        self.bot_requests += other.bot_requests
+        self.admin_requests += other.admin_requests
+        self.static_requests += other.static_requests
+        self.unique_ips.merge(other.unique_ips)
+        self.status_codes.update(other.status_codes)
+        self.methods.update(other.methods)
+        self.hourly_stats.update(other.hourly_stats)
+        self.daily_stats.update(other.daily_stats)
+        self.pages.merge(other.pages)
+        self.ips.merge(other.ips)
+        self.errors.merge(other.errors)
+        self.user_agents.merge(other.user_agents)
+        self.referers.merge(other.referers)
+        if other.start_time is not None and (self.start_time is None or other.start_time < self.start_time):
+            self.start_time = other.start_time
+        if other.end_time is not None and (self.end_time is None or other.end_time > self.end_time):
+            self.end_time = other.end_time
+        return self
+
+    def to_state(self):
+        """保存用の値（JSONに変換できる形式、集計を保存して後でマージするため）"""
+        state = {field: getattr(self, field) for field in self.COUNT_FIELDS}
+        state.update({field: getattr(self, field).to_state() for field in self.TOP_K_FIELDS})
+        state.update({
+            'unique_ips': self.unique_ips.to_state(),
+            'status_codes': dict(self.status_codes),
+            'methods': dict(self.methods),
+            'hourly_stats': dict(self.hourly_stats),
+            'daily_stats': {day.isoformat(): count for day, count in self.daily_stats.items()},
+            'start_time': self.start_time.isoformat() if self.start_time else None,
+            'end_time': self.end_time.isoformat() if self.end_time else None,
+        })
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        log_stats = cls()
+        for field in cls.COUNT_FIELDS:
+            setattr(log_stats, field, state[field])
+        for field in cls.TOP_K_FIELDS:
+            setattr(log_stats, field, TopKCounter.from_state(state[field]))
+        log_stats.unique_ips = UniqueCounter.from_state(state['unique_ips'])
+        log_stats.status_codes = Counter(state['status_codes'])
+        log_stats.methods = Counter(state['methods'])
+        log_stats.hourly_stats = Counter({int(hour): count for hour, count in state['hourly_stats'].items()})
+        log_stats.daily_stats = Counter({datetime.fromisoformat(day).date(): count
+                                         for day, count in state['daily_stats'].items()})
+        log_stats.start_time = datetime.fromisoformat(state['start_time']) if state['start_time'] else None
+        log_stats.end_time = datetime.fromisoformat(state['end_time']) if state['end_time'] else None
+        return log_stats
+
+    def to_dict(self):
+        """統計情報の辞書（AccessLogAnalyzer.stats の形式）"""
+        if not self.total_requests:
+            return {
+                'total_requests': 0,
+                'unique_ips': 0,
+                'bot_requests': 0,
+                'admin_requests': 0,
+                'static_requests': 0,
+                'status_codes': {},
+                'methods': {},
+                'top_pages': {},
+                'top_ips': {},
+                'errors': {},
+                'hourly_stats': {},
+                'daily_stats': {},
+                'user_agents': {},
+                'referers': {},
+                'analysis_period': {
+                    'start': None,
+                    'end': None,
+                    'duration': '0 minutes'
+                }
+            }
+        
+        return {
+            'total_requests': self.total_requests,
+            'unique_ips': len(self.unique_ips),
+            'bot_requests': self.bot_requests,
+            'admin_requests': self.admin_requests,
+            'static_requests': self.static_requests,
+            'status_codes': dict(self.status_codes.most_common()),
+            'methods': dict(self.methods.most_common()),
+            'top_pages': dict(self.pages.most_common(20)),
+            'top_ips': dict(self.ips.most_common(20)),
+            'errors': dict(self.errors.most_common(20)),
+            'hourly_stats': {f"{hour:02d}": count for hour, count in sorted(self.hourly_stats.items())},
+            'daily_stats': {day.isoformat(): count for day, count in sorted(self.daily_stats.items())},
+            'user_agents': dict(self.user_agents.most_common(10)),
+            'referers': dict(self.referers.most_common(10)),
+            # 上位集計・ユニーク数が近似値を含むか（容量を超える種類のキーがあった場合）
+            'approximate': not (self.unique_ips.is_exact and self.pages.is_exact and self.ips.is_exact
+                                and self.errors.is_exact and self.user_agents.is_exact and self.referers.is_exact),
+            'analysis_period': {
+                'start': self.start_time.isoformat(),
+                'end': self.end_time.isoformat(),
+                'duration': str(self.end_time - self.start_time)
+            }
+        }
+
+
+def rotated_log_files(log_file):
+    """
+    ログファイルとローテーション済みのバックアップ（access.log.1, access.log.2, …）を古い順に返す
+    """
+    directory = os.path.dirname(log_file)
+    prefix = os.path.basename(log_file) + '.'
+    backups = []
+    for name in os.listdir(directory or '.'):
+        suffix = name[len(prefix):]
+        if name.startswith(prefix) and suffix.isdigit():
+            backups.append((int(suffix), os.path.join(directory, name)))
+    files = [path for _, path in sorted(backups, reverse=True)]
+    if os.path.exists(log_file):
+        files.append(log_file)
+    return files
+
+
+def split_byte_ranges(log_file, chunk_size=PARALLEL_CHUNK_SIZE):
+    """
+    ファイルを約chunk_sizeごとのバイト範囲 [start, end) に分割（境界は次の行頭に合わせる）
+    """
+    size = os.path.getsize(log_file)
+    ranges = []
+    start = 0
+    with open(log_file, 'rb') as f:
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                f.seek(end)
+                f.readline()
+                end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def analyze_byte_range(log_file, start, end, log_format=None):
+    """
+    ファイルのバイト範囲 [start, end) を集計したLogStatsを返す（並列分析のワーカープロセスで実行）
+    """
+    analyzer = AccessLogAnalyzer(log_file)
+    analyzer.use_format(log_format)
+    log_stats = LogStats()
+    remaining = end - start
+    with open(log_file, 'rb') as f:
+        f.seek(start)
+        for raw_line in f:
+            if remaining <= 0:
+                break
+            remaining -= len(raw_line)
+            line = raw_line.decode('utf-8', errors='ignore').strip()
+            if line:
+                entry = analyzer._parse_log_line(line)
+                if entry:
+                    log_stats.add(entry)
+    return log_stats
 
 
 class AccessLogAnalyzer:
@@ -19,7 +546,7 @@ class AccessLogAnalyzer:
         :param log_file: 分析対象のログファイルパス
         """
         self.log_file = log_file
-        self.log_entries = []
+        self.analyzed_files = [log_file]
         self.stats = {}
         
         # 一般的なログフォーマットのパターン（OrderedDictで順序保証）
@@ -28,7 +555,7 @@ class AccessLogAnalyzer:
             ('combined', re.compile(
                 r'(?P<ip>\S+) \S+ \S+ \[(?P<datetime>[^\]]+)\] '
                 r'"(?P<method>\S+) (?P<path>\S+) (?P<protocol>\S+)" '
-                r'(?P<status>\d+) (?P<size>\S+) "(?P<referer>[^"]*)" "(?P<user_agent>[^"]*)"'
+                r'(?P<status>\d+) (?P<size>\S+) "(?P<referer>' + QUOTED_FIELD + r')" "(?P<user_agent>' + QUOTED_FIELD + r')"'
             )),
             # Apache Common Log Format
             ('common', re.compile(
@@ -47,10 +574,37 @@ class AccessLogAnalyzer:
             ('nginx', re.compile(
                 r'(?P<ip>\S+) - \S+ \[(?P<datetime>[^\]]+)\] '
                 r'"(?P<method>\S+) (?P<path>\S+) (?P<protocol>\S+)" '
-                r'(?P<status>\d+) (?P<size>\d+) "(?P<referer>[^"]*)" '
-                r'"(?P<user_agent>[^"]*)"'
+                r'(?P<status>\d+) (?P<size>\d+) "(?P<referer>' + QUOTED_FIELD + r')" '
+                r'"(?P<user_agent>' + QUOTED_FIELD + r')"'
             ))
         ])
+        
+        # detect_format で判定したフォーマット（そのパターンを最初に試す）
+        self.log_format = None
+        self._format_pattern = None
+        # 直前に変換した日時（同じ秒の行が続くため）
+        self._last_datetime_str = None
+        self._last_datetime = None
+    
+    def detect_format(self, lines):
+        """
+        サンプル行から最も多く一致するフォーマットを判定し、以降のパースで最初に試すパターンとして固定
+        :param lines: サンプル行
+        :return: フォーマット名（判定できなければNone）
+        """
+        counts = Counter()
+        for line in lines:
+            for pattern_name, pattern in self.log_patterns.items():
+                if pattern.match(line):
+                    counts[pattern_name] += 1
+                    break
+        self.use_format(counts.most_common(1)[0][0] if counts else None)
+        return self.log_format
+    
+    def use_format(self, log_format):
+        """判定済みのフォーマットを設定（並列分析のワーカー等）"""
+        self.log_format = log_format
+        self._format_pattern = self.log_patterns.get(log_format) if log_format else None
     
     def analyze_logs(self, max_lines=None):
         """
@@ -61,31 +615,64 @@ class AccessLogAnalyzer:
         if not os.path.exists(self.log_file):
             raise FileNotFoundError(f"ログファイルが見つかりません: {self.log_file}")
         
-        self.log_entries = []
-        processed_lines = 0
+        log_stats = LogStats()
+        self.analyzed_files = [self.log_file]
         
         try:
-            with open(self.log_file, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-                
-                # 最新の行から処理（ファイルの末尾から）
-                if max_lines:
-                    lines = lines[-max_lines:]
-                
-                for line in lines:
-                    if max_lines and processed_lines >= max_lines:
-                        break
-                    
-                    entry = self._parse_log_line(line.strip())
-                    if entry:
-                        self.log_entries.append(entry)
-                        processed_lines += 1
+            self.detect_format(tail_lines(self.log_file, FORMAT_SAMPLE_LINES))
+            if max_lines:
+                # 最新の行から処理（ファイル全体を読まず、末尾からmax_lines行だけ読む）
+                lines = tail_lines(self.log_file, max_lines)
+            else:
+                lines = iter_lines(self.log_file)
+            
+            # 1行ずつパースして集計に加える（パース結果は保持しない）
+            for line in lines:
+                entry = self._parse_log_line(line)
+                if entry:
+                    log_stats.add(entry)
         
         except Exception as e:
             raise Exception(f"ログファイル読み込みエラー: {str(e)}")
         
-        # 統計情報を計算
-        self._calculate_stats()
+        self.stats = log_stats.to_dict()
+        return self.stats
+    
+    def analyze_logs_parallel(self, include_rotated=True, workers=None, chunk_size=PARALLEL_CHUNK_SIZE):
+        """
+        ログファイル全体（ローテーション済みのバックアップを含む）を複数プロセスで分析
+        各ファイルを行頭で揃えたバイト範囲に分割してProcessPoolExecutorで集計し、部分集計をマージする
+        :param include_rotated: access.log.1 等のバックアップも分析するか
+        :param workers: プロセス数（省略時はCPUコア数）
+        :param chunk_size: 1タスクあたりのバイト数
+        :return: 分析統計
+        """
+        if include_rotated:
+            log_files = rotated_log_files(self.log_file)
+        else:
+            log_files = [self.log_file] if os.path.exists(self.log_file) else []
+        if not log_files:
+            raise FileNotFoundError(f"ログファイルが見つかりません: {self.log_file}")
+        
+        try:
+            # フォーマットは最新のファイルで1回だけ判定してワーカーに渡す
+            log_format = self.detect_format(tail_lines(log_files[-1], FORMAT_SAMPLE_LINES))
+            tasks = [(path, start, end, log_format)
+                     for path in log_files
+                     for start, end in split_byte_ranges(path, chunk_size)]
+            workers = min(workers or os.cpu_count() or 1, len(tasks))
+            if workers <= 1:
+                # 1プロセスで済む場合はプロセスを起動しない
+                partials = [analyze_byte_range(*task) for task in tasks]
+            else:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    partials = list(executor.map(analyze_byte_range, *zip(*tasks)))
+        
+        except Exception as e:
+            raise Exception(f"ログファイル読み込みエラー: {str(e)}")
+        
+        self.analyzed_files = log_files
+        self.stats = reduce(LogStats.merge, partials, LogStats()).to_dict()
         return self.stats
     
     def _parse_log_line(self, line):
@@ -94,38 +681,58 @@ class AccessLogAnalyzer:
         :param line: ログ行
         :return: パース結果の辞書
         """
-        # 各パターンを試行
+        # 判定済みのフォーマットを先に試行
+        pattern = self._format_pattern
+        if pattern is not None:
+            match = pattern.match(line)
+            if match:
+                return self._build_entry(match, self.log_format)
+        
+        # 各パターンを試行（フォーマットの混在したログ向け）
         for pattern_name, pattern in self.log_patterns.items():
             match = pattern.match(line)
             if match:
-                entry = match.groupdict()
-                entry['pattern'] = pattern_name
-                
-                # 日時をパース
-                entry['parsed_datetime'] = self._parse_datetime(
-                    entry.get('datetime', ''), pattern_name
-                )
-                
-                # パスからクエリパラメータを分離
-                if 'path' in entry:
-                    entry['path_clean'], entry['query_params'] = self._parse_path(entry['path'])
-                
-                return entry
+                return self._build_entry(match, pattern_name)
         
         # パターンにマッチしない場合は簡易パース
         return self._fallback_parse(line)
     
+    def _build_entry(self, match, pattern_name):
+        """パターンに一致した行のパース結果"""
+        entry = match.groupdict()
+        for field in ESCAPED_FIELDS:
+            value = entry.get(field)
+            if value is not None:
+                entry[field] = unescape_log_field(value)
+        for field in INTERNED_FIELDS:
+            value = entry.get(field)
+            if value is not None:
+                entry[field] = sys.intern(value)
+        entry['pattern'] = pattern_name
+        
+        # 日時をパース
+        entry['parsed_datetime'] = self._parse_datetime(
+            entry.get('datetime', ''), pattern_name
+        )
+        
+        # パスからクエリパラメータを分離
+        if 'path' in entry:
+            entry['path_clean'], entry['query_params'] = self._parse_path(entry['path'])
+        
+        return entry
+    
     def _parse_datetime(self, datetime_str, pattern_name):
         """
-        日時文字列をdatetimeオブジェクトに変換
+        日時文字列をdatetimeオブジェクトに変換（同じ日時文字列が続く場合は直前の結果を再利用）
         """
+        if datetime_str == self._last_datetime_str:
+            return self._last_datetime
         try:
             if pattern_name == 'flask':
-                return datetime.strptime(datetime_str.split(',')[0], '%Y-%m-%d %H:%M:%S')
+                parsed = datetime.fromisoformat(datetime_str.split(',')[0])
             elif pattern_name in ['common', 'combined', 'nginx']:
                 # タイムゾーン付き日時をパースして、ナイーブなdatetimeに変換
-                dt_with_tz = datetime.strptime(datetime_str, '%d/%b/%Y:%H:%M:%S %z')
-                return dt_with_tz.replace(tzinfo=None)
+                parsed = parse_clf_datetime(datetime_str)
             else:
                 # フォールバック
                 return datetime.now()
@@ -133,11 +740,18 @@ class AccessLogAnalyzer:
             # デバッグ用
             print(f"DateTime parse error for '{datetime_str}': {e}")
             return datetime.now()
+        self._last_datetime_str = datetime_str
+        self._last_datetime = parsed
+        return parsed
     
     def _parse_path(self, path):
         """
         パスからクエリパラメータを分離
         """
+        # '/'で始まる通常のパスはurlparseを通さずに分割（urlparseと同じ結果）
+        if path.startswith('/') and not path.startswith('//') and '#' not in path and ';' not in path:
+            path_clean, _, query = path.partition('?')
+            return path_clean, parse_qs(query) if query else {}
         try:
             parsed = urlparse(path)
             query_params = parse_qs(parsed.query) if parsed.query else {}
@@ -149,17 +763,10 @@ class AccessLogAnalyzer:
         """
         フォールバックパース（基本的な情報のみ抽出）
         """
-        # IPアドレスを抽出
-        ip_pattern = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b')
-        ip_match = ip_pattern.search(line)
-        
-        # HTTPメソッドを抽出
-        method_pattern = re.compile(r'\b(GET|POST|PUT|DELETE|HEAD|OPTIONS|PATCH)\b')
-        method_match = method_pattern.search(line)
-        
-        # ステータスコードを抽出
-        status_pattern = re.compile(r'\b(200|201|204|301|302|400|401|403|404|500|502|503)\b')
-        status_match = status_pattern.search(line)
+        # IPアドレス・HTTPメソッド・ステータスコードを抽出
+        ip_match = FALLBACK_IP_PATTERN.search(line)
+        method_match = FALLBACK_METHOD_PATTERN.search(line)
+        status_match = FALLBACK_STATUS_PATTERN.search(line)
         
         return {
             'ip': ip_match.group() if ip_match else 'unknown',
@@ -173,132 +780,6 @@ class AccessLogAnalyzer:
             'raw_line': line
         }
     
-    def _calculate_stats(self):
-        """統計情報を計算"""
-        if not self.log_entries:
-            self.stats = {
-                'total_requests': 0,
-                'unique_ips': 0,
-                'bot_requests': 0,
-                'admin_requests': 0,
-                'static_requests': 0,
-                'status_codes': {},
-                'methods': {},
-                'top_pages': {},
-                'top_ips': {},
-                'errors': {},
-                'hourly_stats': {},
-                'daily_stats': {},
-                'user_agents': {},
-                'referers': {},
-                'analysis_period': {
-                    'start': None,
-                    'end': None,
-                    'duration': '0 minutes'
-                }
-            }
-            return
-        
-        # 基本統計
-        total_requests = len(self.log_entries)
-        unique_ips = len(set(entry.get('ip', 'unknown') for entry in self.log_entries))
-        
-        # カウンター初期化
-        status_codes = Counter()
-        methods = Counter()
-        pages = Counter()
-        ips = Counter()
-        errors = Counter()
-        hourly_stats = defaultdict(int)
-        daily_stats = defaultdict(int)
-        user_agents = Counter()
-        referers = Counter()
-        
-        # 時間範囲
-        timestamps = [entry['parsed_datetime'] for entry in self.log_entries if entry['parsed_datetime']]
-        start_time = min(timestamps) if timestamps else datetime.now()
-        end_time = max(timestamps) if timestamps else datetime.now()
-        
-        # 各エントリーを処理
-        bot_requests = 0
-        admin_requests = 0
-        static_requests = 0
-        
-        for entry in self.log_entries:
-            # ステータスコード
-            status = entry.get('status', 'unknown')
-            status_codes[status] += 1
-            
-            # HTTPメソッド
-            method = entry.get('method', 'unknown')
-            methods[method] += 1
-            
-            # ページ（静的ファイルを除外）
-            path = entry.get('path_clean', entry.get('path', 'unknown'))
-            if not self._is_static_file(path):
-                pages[path] += 1
-            
-            # IPアドレス
-            ip = entry.get('ip', 'unknown')
-            ips[ip] += 1
-            
-            # エラー（4xx, 5xx）
-            if status.startswith(('4', '5')):
-                error_key = f"{status} {path}"
-                errors[error_key] += 1
-            
-            # ボットアクセス検出
-            ua = entry.get('user_agent', 'unknown')
-            if self._is_bot_user_agent(ua):
-                bot_requests += 1
-            
-            # 管理画面アクセス検出
-            if self._is_admin_path(path):
-                admin_requests += 1
-            
-            # 静的ファイルアクセス検出
-            if self._is_static_file(path):
-                static_requests += 1
-            
-            # 時間別統計
-            dt = entry['parsed_datetime']
-            hour_key = dt.strftime('%H')  # 00-23の形式
-            day_key = dt.strftime('%Y-%m-%d')
-            hourly_stats[hour_key] += 1
-            daily_stats[day_key] += 1
-            
-            # ユーザーエージェント
-            if ua != 'unknown':
-                user_agents[ua] += 1
-            
-            # リファラー
-            referer = entry.get('referer', 'unknown')
-            if referer and referer not in ['unknown', '-']:
-                referers[referer] += 1
-        
-        # 結果を統計として保存
-        self.stats = {
-            'total_requests': total_requests,
-            'unique_ips': unique_ips,
-            'bot_requests': bot_requests,
-            'admin_requests': admin_requests,
-            'static_requests': static_requests,
-            'status_codes': dict(status_codes.most_common()),
-            'methods': dict(methods.most_common()),
-            'top_pages': dict(pages.most_common(20)),
-            'top_ips': dict(ips.most_common(20)),
-            'errors': dict(errors.most_common(20)),
-            'hourly_stats': dict(hourly_stats),
-            'daily_stats': dict(daily_stats),
-            'user_agents': dict(user_agents.most_common(10)),
-            'referers': dict(referers.most_common(10)),
-            'analysis_period': {
-                'start': start_time.isoformat() if start_time else None,
-                'end': end_time.isoformat() if end_time else None,
-                'duration': str(end_time - start_time) if timestamps else '0 minutes'
-            }
-        }
-    
     def generate_report(self):
         """
         分析レポートを生成
@@ -337,7 +818,8 @@ class AccessLogAnalyzer:
                 'static_requests': self.stats['static_requests'],
                 'error_rate': round(error_rate, 2),
                 'analysis_period': self.stats['analysis_period'],
-                'log_file': self.log_file
+                'log_file': self.log_file,
+                'log_files': self.analyzed_files
             },
             'highlights': {
                 'top_page': top_page,
@@ -427,53 +909,6 @@ class AccessLogAnalyzer:
         
         return output_file
     
-    def _is_bot_user_agent(self, user_agent):
-        """
-        ユーザーエージェントがボットかどうかを判定
-        """
-        if not user_agent or user_agent == 'unknown':
-            return False
-        
-        bot_keywords = [
-            'bot', 'crawler', 'spider', 'scraper', 'wget', 'curl',
-            'googlebot', 'bingbot', 'slurp', 'facebookexternalhit',
-            'twitterbot', 'linkedinbot', 'whatsapp', 'telegram',
-            'python-requests', 'java/', 'okhttp', 'apache-httpclient'
-        ]
-        
-        ua_lower = user_agent.lower()
-        return any(keyword in ua_lower for keyword in bot_keywords)
-    
-    def _is_admin_path(self, path):
-        """
-        パスが管理画面へのアクセスかどうかを判定
-        """
-        if not path or path == 'unknown':
-            return False
-        
-        admin_patterns = [
-            '/admin', '/management-panel', '/wp-admin', '/administrator',
-            '/login', '/auth', '/dashboard', '/panel'
-        ]
-        
-        return any(pattern in path.lower() for pattern in admin_patterns)
-    
-    def _is_static_file(self, path):
-        """
-        パスが静的ファイルへのアクセスかどうかを判定
-        """
-        if not path or path == 'unknown':
-            return False
-        
-        static_extensions = [
-            '.css', '.js', '.png', '.jpg', '.jpeg', '.gif', '.ico', '.svg',
-            '.woff', '.woff2', '.ttf', '.eot', '.pdf', '.zip', '.txt',
-            '.xml', '.json', '.map', '.webp', '.mp3', '.mp4', '.avi'
-        ]
-        
-        path_lower = path.lower()
-        return any(path_lower.endswith(ext) for ext in static_extensions) or '/static/' in path_lower
-    
     def _extract_browsers(self):
         """
         ユーザーエージェントからブラウザ情報を抽出
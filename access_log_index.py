@@ -0,0 +1,192 @@
+"""
+アクセスログの増分インデックス
+ログファイル（ローテーション済みのバックアップを含む）ごとにinodeと読み込み済みのバイト位置を記録して追記分だけをパースし、
+時間別・日別の集計（LogStatsの保存形式）をSQLiteファイルに保存する
+管理画面は期間内の集計をマージして表示するため、ログを読み直さずに長い期間を表示できる
+"""
+import os
+import json
+import time
+import zlib
+import sqlite3
+from collections import OrderedDict
+from contextlib import closing
+from datetime import datetime, timedelta
+from access_log_analyzer import AccessLogAnalyzer, LogStats, rotated_log_files, tail_lines, FORMAT_SAMPLE_LINES
+from access_logger import ACCESS_LOG_PATH
+
+ACCESS_LOG_INDEX_PATH = os.environ.get('ACCESS_LOG_INDEX_PATH', 'access_log_index.sqlite3')
+ACCESS_LOG_INDEX_HOURLY_DAYS = int(os.environ.get('ACCESS_LOG_INDEX_HOURLY_DAYS', 35))  # 時間別集計の保持日数（日別は無期限）
+ACCESS_LOG_INDEX_MAX_BYTES = int(os.environ.get('ACCESS_LOG_INDEX_MAX_BYTES', 64 * 1024 * 1024))  # 画面表示時に1回で読み込む上限
+ACCESS_LOG_INDEX_SCHEMA_VERSION = 1  # テーブル構成を変えたら上げる（古いインデックスは作り直す）
+HEAD_SIZE = 256  # ファイルの同一性確認に使う先頭バイト数（削除されたファイルのinodeが再利用された場合の対策）
+FLUSH_BUCKETS = 48  # 集計中の時間別バケットがこの数を超えたら保存してメモリを空ける
+
+# 管理画面で選べる期間（キー: (表示名, 使う集計, 期間)）
+INDEX_RANGES = OrderedDict([
+    ('24h', ('過去24時間', 'hour', timedelta(hours=24))),
+    ('7d', ('過去7日間', 'day', timedelta(days=7))),
+    ('30d', ('過去30日間', 'day', timedelta(days=30))),
+    ('all', ('全期間', 'day', None)),
+])
+DEFAULT_INDEX_RANGE = '7d'
+
+def _encode_state(log_stats):
+    return zlib.compress(json.dumps(log_stats.to_state(), separators=(',', ':')).encode('utf-8'))
+
+def _decode_state(blob):
+    return LogStats.from_state(json.loads(zlib.decompress(blob)))
+
+class AccessLogIndex:
+    """アクセスログの増分インデックス（SQLite、接続は呼び出しごと）"""
+
+    def __init__(self, log_file=ACCESS_LOG_PATH, path=ACCESS_LOG_INDEX_PATH):
+        self.log_file = log_file
+        self.path = path
+
+    def _connect(self, timeout=5):
+        conn = sqlite3.connect(self.path, timeout=timeout, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        if conn.execute('PRAGMA user_version').fetchone()[0] != ACCESS_LOG_INDEX_SCHEMA_VERSION:
+            with conn:
+                conn.execute('BEGIN IMMEDIATE')
+                if conn.execute('PRAGMA user_version').fetchone()[0] != ACCESS_LOG_INDEX_SCHEMA_VERSION:
+                    self._create_schema(conn)
+        return conn
+
+    @staticmethod
+    def _create_schema(conn):
+        for table in ('log_files', 'buckets'):
+            conn.execute(f'DROP TABLE IF EXISTS {table}')
+        conn.execute('CREATE TABLE log_files ('
+                     'device INTEGER, inode INTEGER, path TEXT, offset INTEGER, size INTEGER, head BLOB, '
+                     'updated_at REAL, PRIMARY KEY (device, inode))')
+        # kind: 'hour'（start=YYYY-MM-DDTHH:00:00）または 'day'（start=YYYY-MM-DD）
+        conn.execute('CREATE TABLE buckets ('
+                     'kind TEXT, start TEXT, state BLOB, PRIMARY KEY (kind, start)) WITHOUT ROWID')
+        conn.execute(f'PRAGMA user_version = {ACCESS_LOG_INDEX_SCHEMA_VERSION}')
+
+    def update(self, max_bytes=None):
+        """
+        前回の位置以降に追記された行を集計に加える
+        ローテーションでファイル名が変わってもinodeで追跡し、新しいファイルは先頭から読む
+        :param max_bytes: 1回で読み込む上限（残りは次回に続きから読む）
+        :return: {'lines', 'bytes', 'pending_bytes'}（他のプロセスが更新中ならNone）
+        """
+        with closing(self._connect(timeout=0.1)) as conn:
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+            except sqlite3.OperationalError:
+                # 他のワーカーが更新中（その結果を表示すればよい）
+                return None
+            try:
+                result = self._update(conn, max_bytes)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return result
+
+    def _update(self, conn, max_bytes):
+        known = {(device, inode): (offset, head) for device, inode, offset, head in
+                 conn.execute('SELECT device, inode, offset, head FROM log_files')}
+        parser = AccessLogAnalyzer(self.log_file)
+        if os.path.exists(self.log_file):
+            parser.detect_format(tail_lines(self.log_file, FORMAT_SAMPLE_LINES))
+        buckets = {}
+        current = set()
+        budget = max_bytes
+        total_lines = 0
+        total_bytes = 0
+        pending_bytes = 0
+        for path in rotated_log_files(self.log_file):
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                continue
+            with f:
+                # 開いたファイル自体のinodeで識別（一覧の取得後にローテーションされても取り違えない）
+                stat = os.fstat(f.fileno())
+                key = (stat.st_dev, stat.st_ino)
+                current.add(key)
+                offset, head = known.get(key, (0, b''))
+                current_head = f.read(HEAD_SIZE)
+                if not current_head.startswith(head) or stat.st_size < offset:
+                    # inodeが再利用された別のファイル、または切り詰められたファイル
+                    offset = 0
+                f.seek(offset)
+                for raw_line in f:
+                    if budget is not None and budget <= 0:
+                        break
+                    if not raw_line.endswith(b'\n'):
+                        # 書き込み途中の行は次回
+                        break
+                    offset += len(raw_line)
+                    total_bytes += len(raw_line)
+                    if budget is not None:
+                        budget -= len(raw_line)
+                    line = raw_line.decode('utf-8', errors='ignore').strip()
+                    entry = parser._parse_log_line(line) if line else None
+                    if not entry:
+                        continue
+                    hour = entry['parsed_datetime'].replace(minute=0, second=0, microsecond=0)
+                    bucket = buckets.get(hour)
+                    if bucket is None:
+                        if len(buckets) >= FLUSH_BUCKETS:
+                            self._flush(conn, buckets)
+                            buckets = {}
+                        bucket = buckets[hour] = LogStats()
+                    bucket.add(entry)
+                    total_lines += 1
+            pending_bytes += max(stat.st_size - offset, 0)
+            conn.execute('INSERT OR REPLACE INTO log_files (device, inode, path, offset, size, head, updated_at) '
+                         'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                         (stat.st_dev, stat.st_ino, path, offset, stat.st_size, current_head, time.time()))
+        self._flush(conn, buckets)
+
+        # バックアップの上限を超えて削除されたファイルの記録を消す
+        conn.executemany('DELETE FROM log_files WHERE device = ? AND inode = ?',
+                         [key for key in known if key not in current])
+        # 古い時間別集計を削除（日別集計は残る）
+        expire = (datetime.now() - timedelta(days=ACCESS_LOG_INDEX_HOURLY_DAYS)).strftime('%Y-%m-%dT%H:00:00')
+        conn.execute("DELETE FROM buckets WHERE kind = 'hour' AND start < ?", (expire,))
+        return {'lines': total_lines, 'bytes': total_bytes, 'pending_bytes': pending_bytes}
+
+    def _merge_bucket(self, conn, kind, start, delta):
+        row = conn.execute('SELECT state FROM buckets WHERE kind = ? AND start = ?', (kind, start)).fetchone()
+        merged = _decode_state(row[0]).merge(delta) if row else delta
+        conn.execute('INSERT OR REPLACE INTO buckets (kind, start, state) VALUES (?, ?, ?)',
+                     (kind, start, _encode_state(merged)))
+
+    def _flush(self, conn, buckets):
+        """集計中の時間別バケットを保存済みの時間別・日別集計にマージ"""
+        days = {}
+        for hour, delta in buckets.items():
+            days.setdefault(hour.date(), LogStats()).merge(delta)
+            self._merge_bucket(conn, 'hour', hour.isoformat(), delta)
+        for day, delta in days.items():
+            self._merge_bucket(conn, 'day', day.isoformat(), delta)
+
+    def query(self, range_name=DEFAULT_INDEX_RANGE, now=None):
+        """期間内の集計をマージしたLogStatsを返す"""
+        _, kind, span = INDEX_RANGES[range_name]
+        now = now or datetime.now()
+        if span is None:
+            since = ''
+        elif kind == 'hour':
+            since = (now - span).strftime('%Y-%m-%dT%H:00:00')
+        else:
+            since = (now.date() - span + timedelta(days=1)).isoformat()
+        merged = LogStats()
+        with closing(self._connect()) as conn:
+            for (state,) in conn.execute('SELECT state FROM buckets WHERE kind = ? AND start >= ?', (kind, since)):
+                merged.merge(_decode_state(state))
+        return merged
+
+    def build_report(self, range_name=DEFAULT_INDEX_RANGE):
+        """期間内の集計からAccessLogAnalyzerと同じ形式のレポートを生成"""
+        analyzer = AccessLogAnalyzer(self.log_file)
+        analyzer.stats = self.query(range_name).to_dict()
+        analyzer.analyzed_files = rotated_log_files(self.log_file)
+        return analyzer.generate_report()
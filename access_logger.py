@@ -0,0 +1,191 @@
+"""
+アクセスログの非同期書き込み
+リクエスト処理中は1行分の値をキューに積むだけにし、バックグラウンドスレッドが溜まった行をまとめてファイルへ書き込む
+ローテーションはロックファイルで全ワーカープロセス間を排他し、他のプロセスが行ったローテーションにも追従する
+"""
+import os
+import time
+import queue
+import logging
+import atexit
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows等（プロセス間の排他なし）
+    fcntl = None
+
+ACCESS_LOG_PATH = os.environ.get('ACCESS_LOG_PATH', 'access.log')
+ACCESS_LOG_MAX_BYTES = int(os.environ.get('ACCESS_LOG_MAX_BYTES', 10 * 1024 * 1024))  # 10MB
+ACCESS_LOG_BACKUP_COUNT = int(os.environ.get('ACCESS_LOG_BACKUP_COUNT', 5))  # access.log.1 〜 .5
+ACCESS_LOG_BATCH_SIZE = 512  # 1回の書き込みでまとめる最大行数
+ACCESS_LOG_DATEFMT = '%d/%b/%Y:%H:%M:%S %z'
+
+# ログ行を壊す文字のエスケープ（パスやUser-Agentに含まれる改行・引用符。Apacheと同じくバックスラッシュ自体もエスケープし、
+# access_log_analyzer.unescape_log_field で元に戻せるようにする）
+_ESCAPES = str.maketrans({'\\': '\\\\', '"': '\\"', '\n': '\\n', '\r': '\\r', '\t': '\\t'})
+
+_STOP = object()
+
+# 書き込みスレッドはアプリケーションコンテキスト外で動くため、current_app.loggerではなくモジュールのロガーを使う
+logger = logging.getLogger(__name__)
+
+class RotatingLogFile:
+    """複数プロセスから追記するログファイル（サイズでローテーション）"""
+
+    def __init__(self, path, max_bytes=0, backup_count=0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._stream = None
+        self._inode = None
+        self._lock_file = None
+
+    @contextmanager
+    def _locked(self):
+        if fcntl is None:
+            yield
+            return
+        if self._lock_file is None:
+            self._lock_file = open(self.path + '.lock', 'a')
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _open(self):
+        self.close()
+        self._stream = open(self.path, 'ab', buffering=0)
+        self._inode = os.fstat(self._stream.fileno()).st_ino
+
+    def _ensure_current(self):
+        """他のプロセスがローテーションしていれば新しいファイルを開き直す"""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            inode = None
+        if self._stream is None or inode != self._inode:
+            self._open()
+
+    def _rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self._open()
+
+    def write(self, data):
+        """バイト列を追記（ロック中にサイズを確認し、超える場合は先にローテーション）"""
+        with self._locked():
+            self._ensure_current()
+            if self.max_bytes > 0 and self.backup_count > 0:
+                size = os.fstat(self._stream.fileno()).st_size
+                if size > 0 and size + len(data) > self.max_bytes:
+                    self._rotate()
+            self._stream.write(data)
+
+    def close(self):
+        if self._stream is not None:
+            self._stream.close()
+            self._stream = None
+
+class AccessLogListener:
+    """キューから行を取り出し、まとめてファイルへ書き込むバックグラウンドスレッド"""
+
+    def __init__(self, log_file, batch_size=ACCESS_LOG_BATCH_SIZE):
+        self.log_file = log_file
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self._last_second = None
+        self._last_timestamp = ''
+        self._thread = threading.Thread(target=self._run, name='access-log-writer', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """キューに残った行を書き終えてから停止"""
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+        self.log_file.close()
+
+    def _timestamp(self, created):
+        # 同じ秒の行が続くのでstrftimeは秒が変わったときだけ
+        second = int(created)
+        if second != self._last_second:
+            self._last_second = second
+            self._last_timestamp = time.strftime(ACCESS_LOG_DATEFMT, time.localtime(second))
+        return self._last_timestamp
+
+    def format_entry(self, entry):
+        """Apache Combined Log Format の1行"""
+        created, remote_addr, method, path, protocol, status, content_length, referrer, user_agent = entry
+        return (f'{remote_addr} - - [{self._timestamp(created)}] '
+                f'"{method} {path.translate(_ESCAPES)} {protocol}" {status} {content_length} '
+                f'"{referrer.translate(_ESCAPES)}" "{user_agent.translate(_ESCAPES)}"\n')
+
+    def _run(self):
+        while True:
+            entry = self.queue.get()
+            lines = []
+            stopping = False
+            # 書き込み中に溜まった行をまとめて1回で書き込む
+            while True:
+                if entry is _STOP:
+                    stopping = True
+                    break
+                lines.append(self.format_entry(entry))
+                if len(lines) >= self.batch_size:
+                    break
+                try:
+                    entry = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if lines:
+                try:
+                    self.log_file.write(''.join(lines).encode('utf-8', 'backslashreplace'))
+                except Exception:
+                    # ログ記録エラーでスレッドを止めない
+                    logger.exception(f"Access log write error ({len(lines)} lines dropped)")
+            if stopping:
+                return
+
+_listener = None
+_start_lock = threading.Lock()
+
+def _start_listener():
+    global _listener
+    with _start_lock:
+        if _listener is None:
+            listener = AccessLogListener(
+                RotatingLogFile(ACCESS_LOG_PATH, ACCESS_LOG_MAX_BYTES, ACCESS_LOG_BACKUP_COUNT)
+            )
+            listener.start()
+            _listener = listener
+    return _listener
+
+def log_access(remote_addr, method, path, protocol, status, content_length, referrer, user_agent):
+    """1リクエスト分のアクセスログを記録（キューに積むだけで、整形・書き込みはバックグラウンドで行う）"""
+    listener = _listener or _start_listener()
+    listener.queue.put((time.time(), remote_addr, method, path, protocol, status, content_length, referrer, user_agent))
+
+def flush_access_log():
+    """バックグラウンドスレッドを停止し、キューに残った行を書き込む（プロセス終了時）"""
+    global _listener
+    with _start_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+def _reset_after_fork():
+    # gunicornのワーカー等、fork後の子プロセスではスレッドが引き継がれないため初回の記録時に起動し直す
+    global _listener, _start_lock
+    _listener = None
+    _start_lock = threading.Lock()
+
+atexit.register(flush_access_log)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
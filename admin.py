@@ -16,6 +16,8 @@ from forms import CategoryForm, ArticleForm, WordPressImportForm, GoogleAnalytic
 
 # 新しいサービスクラスをインポート
 from article_service import ArticleService, CategoryService, ImageProcessingService, UserService
+from article_renderer import ensure_article_rendered, render_article_body, convert_markdown, get_html_cleaner
+from page_cache import invalidate_page_cache, TAG_ARTICLE_LIST, article_tag, category_tag, user_tag
 
 # 環境変数で管理画面URLをカスタマイズ可能
 ADMIN_URL_PREFIX = os.environ.get('ADMIN_URL_PREFIX', 'admin')
@@ -560,7 +562,9 @@ def dashboard():
     }
     
     # 最近の記事
-    recent_articles = db.session.execute(select(Article).order_by(Article.created_at.desc()).limit(5)).scalars().all()
+    recent_articles = db.session.execute(
+        select(Article).options(*Article.list_column_options()).order_by(Article.created_at.desc()).limit(5)
+    ).scalars().all()
     
     # 承認待ちコメント数
     pending_comments = 0
@@ -761,6 +765,7 @@ def edit_user(user_id):
             user.notify_on_comment = 'notify_on_comment' in request.form
             
             db.session.commit()
+            invalidate_page_cache(user_tag(user.id))
             flash('ユーザー情報を更新しました。', 'success')
             return redirect(url_for('admin.users'))
         except Exception as e:
@@ -802,6 +807,7 @@ def delete_user(user_id):
         
         db.session.delete(user)
         db.session.commit()
+        invalidate_page_cache(user_tag(user_id), TAG_ARTICLE_LIST)
         flash(f'ユーザー「{user.name}」を削除しました。', 'success')
     except Exception as e:
         db.session.rollback()
@@ -825,6 +831,7 @@ def user_detail(user_id):
         # 最近の記事（5件）
         recent_articles = db.session.execute(
             select(Article)
+            .options(*Article.list_column_options())
             .where(Article.author_id == user.id)
             .order_by(Article.created_at.desc())
             .limit(5)
@@ -921,7 +928,8 @@ def articles():
     articles_pagination = db.paginate(
         select(Article)
         .options(
-            selectinload(Article.categories)
+            selectinload(Article.categories),
+            *Article.list_column_options()
         )
         .order_by(Article.created_at.desc()),
         page=page, 
@@ -990,6 +998,7 @@ def create_article():
         article, error = ArticleService.create_article(form_data, current_user.id)
         
         if article:
+            invalidate_page_cache(TAG_ARTICLE_LIST, article_tag(article.id))
             flash('記事が作成されました。', 'success')
             return redirect(url_for('admin.articles'))
         else:
@@ -1050,6 +1059,7 @@ def edit_article(article_id):
             updated_article, error = ArticleService.update_article(article, form_data)
             
             if updated_article:
+                invalidate_page_cache(TAG_ARTICLE_LIST, article_tag(article_id))
                 flash('記事が更新されました。', 'success')
                 return redirect(url_for('admin.articles'))
             else:
@@ -1082,6 +1092,7 @@ def toggle_article_status(article_id):
             article.published_at = datetime.utcnow()
         
         db.session.commit()
+        invalidate_page_cache(TAG_ARTICLE_LIST, article_tag(article_id))
         
         status_text = '公開' if new_status else '下書き'
         current_app.logger.info(f'Article {article.id} status changed to {status_text}')
@@ -1105,6 +1116,7 @@ def delete_article(article_id):
         # SQLAlchemyのCASCADE設定により関連データも自動削除される
         db.session.delete(article)
         db.session.commit()
+        invalidate_page_cache(TAG_ARTICLE_LIST, article_tag(article_id))
         flash(f'記事「{article_title}」を削除しました。', 'success')
         current_app.logger.info(f"Article deleted successfully: {article_id}")
     except Exception as e:
@@ -1282,6 +1294,7 @@ def edit_category(category_id):
                     # 画像処理エラーでもカテゴリ情報は保存を続行
             
             db.session.commit()
+            invalidate_page_cache(category_tag(category_id))
             flash('カテゴリが正常に更新されました。', 'success')
             return redirect(url_for('admin.categories'))
         except Exception as e:
@@ -1294,7 +1307,12 @@ def edit_category(category_id):
             current_app.logger.info(f"受信データ: {dict(request.form)}")
             current_app.logger.info(f"ファイルデータ: {dict(request.files)}")
     
-    return render_template('admin/edit_category.html', form=form, category=category)
+    # 記事数（Category.articles は明示的な読み込みが必要なため件数のみ取得）
+    article_count = db.session.execute(
+        select(func.count(article_categories.c.article_id)).where(article_categories.c.category_id == category.id)
+    ).scalar()
+    
+    return render_template('admin/edit_category.html', form=form, category=category, article_count=article_count)
 
 @admin_bp.route('/category/delete/<int:category_id>/', methods=['POST'])
 @admin_required
@@ -1302,7 +1320,7 @@ def delete_category(category_id):
     """カテゴリ削除"""
     from sqlalchemy.orm import selectinload
     category = db.session.execute(
-        select(Category).options(selectinload(Category.articles)).where(Category.id == category_id)
+        select(Category).options(selectinload(Category.articles).selectinload(Article.categories)).where(Category.id == category_id)
     ).scalar_one_or_none()
     
     if not category:
@@ -1316,6 +1334,7 @@ def delete_category(category_id):
         
         db.session.delete(category)
         db.session.commit()
+        invalidate_page_cache(category_tag(category_id))
         flash(f'カテゴリ「{category.name}」を削除しました。', 'success')
     except Exception as e:
         db.session.rollback()
@@ -1339,7 +1358,7 @@ def bulk_delete_categories():
         from sqlalchemy.orm import selectinload
         for category_id in category_ids:
             category = db.session.execute(
-                select(Category).options(selectinload(Category.articles)).where(Category.id == category_id)
+                select(Category).options(selectinload(Category.articles).selectinload(Article.categories)).where(Category.id == category_id)
             ).scalar_one_or_none()
             if category:
                 # 関連記事のカテゴリ関連付けを削除（eager loading済み）
@@ -1350,6 +1369,7 @@ def bulk_delete_categories():
                 deleted_count += 1
         
         db.session.commit()
+        invalidate_page_cache(*(category_tag(category_id) for category_id in category_ids))
         flash(f'{deleted_count}個のカテゴリを削除しました。', 'success')
     except Exception as e:
         db.session.rollback()
@@ -1446,6 +1466,7 @@ def approve_comment(comment_id):
         if hasattr(comment, 'is_approved'):
             comment.is_approved = True
             db.session.commit()
+            invalidate_page_cache(article_tag(comment.article_id))
             flash('コメントを承認しました。', 'success')
         else:
             flash('承認機能は実装されていません。', 'warning')
@@ -1464,6 +1485,7 @@ def reject_comment(comment_id):
         if hasattr(comment, 'is_approved'):
             comment.is_approved = False
             db.session.commit()
+            invalidate_page_cache(article_tag(comment.article_id))
             flash('コメントを拒否しました。', 'info')
         else:
             flash('拒否機能は実装されていません。', 'warning')
@@ -1479,8 +1501,10 @@ def delete_comment(comment_id):
     """コメント削除"""
     try:
         comment = db.get_or_404(Comment, comment_id)
+        article_id = comment.article_id
         db.session.delete(comment)
         db.session.commit()
+        invalidate_page_cache(article_tag(article_id))
         flash('コメントを削除しました。', 'success')
     except Exception as e:
         current_app.logger.error(f"Comment deletion error: {e}")
@@ -1501,6 +1525,7 @@ def bulk_comment_action():
     
     try:
         comments = db.session.execute(select(Comment).where(Comment.id.in_(comment_ids))).scalars().all()
+        affected_tags = {article_tag(comment.article_id) for comment in comments}
         
         if action == 'approve' and hasattr(Comment, 'is_approved'):
             for comment in comments:
@@ -1519,6 +1544,7 @@ def bulk_comment_action():
             return redirect(url_for('admin.comments'))
         
         db.session.commit()
+        invalidate_page_cache(*affected_tags)
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f"Bulk comment action error: {e}")
@@ -1532,6 +1558,7 @@ def bulk_comment_action():
 def article_preview(article_id):
     """記事プレビュー（Markdownエディタ）"""
     article = db.get_or_404(Article, article_id)
+    ensure_article_rendered(article, db.session)
     return render_template('article_detail.html', article=article, is_preview=True)
 
 # ===============================
@@ -1741,6 +1768,9 @@ def wordpress_import():
                                 db.session.add(article)
                                 db.session.flush()
                                 
+                                # 本文のレンダリング結果をキャッシュ（一覧の抜粋に使用）
+                                render_article_body(article)
+                                
                                 # カテゴリ関連付け（多対多関係を使用）
                                 for category_name in post_data['categories']:
                                     category = db.session.execute(select(Category).where(Category.name == category_name)).scalar_one_or_none()
@@ -1780,6 +1810,8 @@ def wordpress_import():
                 pass
             
             if success:
+                if not form.dry_run.data:
+                    invalidate_page_cache(TAG_ARTICLE_LIST)
                 if form.dry_run.data:
                     flash(f'テストインポート完了: カテゴリ{import_results["categories_imported"]}個、記事{import_results["posts_imported"]}個（実際のインポートは実行されていません）', 'info')
                 else:
@@ -1963,14 +1995,18 @@ def analytics_settings():
 def access_logs():
     """アクセスログ分析画面"""
     from access_log_analyzer import AccessLogAnalyzer
+    from access_logger import ACCESS_LOG_PATH
+    from access_log_index import AccessLogIndex, INDEX_RANGES, DEFAULT_INDEX_RANGE, ACCESS_LOG_INDEX_MAX_BYTES
     
     log_files = []
     reports = {}
     error_message = None
+    index_range = None
+    index_status = None
     
     try:
-        # 利用可能なログファイルを検索
-        log_patterns = ['flask.log', 'server.log', 'access.log', 'app.log', 'test_access.log']
+        # 利用可能なログファイルを検索（アプリが書き込むアクセスログを優先）
+        log_patterns = [ACCESS_LOG_PATH, 'flask.log', 'server.log', 'app.log', 'test_access.log']
         for pattern in log_patterns:
             if os.path.exists(pattern):
                 log_files.append(pattern)
@@ -1978,11 +2014,21 @@ def access_logs():
         # デフォルトのログファイルを分析
         if log_files:
             primary_log = log_files[0]
-            analyzer = AccessLogAnalyzer(primary_log)
             
-            # 最新1000行のみ分析（パフォーマンス考慮）
-            stats = analyzer.analyze_logs(max_lines=1000)
-            reports[primary_log] = analyzer.generate_report()
+            if primary_log == ACCESS_LOG_PATH:
+                # 追記分だけをインデックスに反映し、期間内の時間別・日別集計から表示
+                index_range = request.args.get('range', DEFAULT_INDEX_RANGE)
+                if index_range not in INDEX_RANGES:
+                    index_range = DEFAULT_INDEX_RANGE
+                index = AccessLogIndex(primary_log)
+                index_status = index.update(max_bytes=ACCESS_LOG_INDEX_MAX_BYTES)
+                reports[primary_log] = index.build_report(index_range)
+            else:
+                analyzer = AccessLogAnalyzer(primary_log)
+                
+                # 最新1000行のみ分析（パフォーマンス考慮）
+                stats = analyzer.analyze_logs(max_lines=1000)
+                reports[primary_log] = analyzer.generate_report()
             
             current_app.logger.info(f"Access log analysis completed for {primary_log}")
         else:
@@ -1995,22 +2041,35 @@ def access_logs():
     return render_template('admin/access_logs.html', 
                          log_files=log_files,
                          reports=reports,
-                         error_message=error_message)
+                         error_message=error_message,
+                         index_ranges=INDEX_RANGES,
+                         index_range=index_range,
+                         index_status=index_status)
 
 @admin_bp.route('/access-logs/download/<log_file>')
 @admin_required  
 def download_log_report(log_file):
     """ログレポートのJSONダウンロード"""
     from access_log_analyzer import AccessLogAnalyzer
+    from access_logger import ACCESS_LOG_PATH
+    from access_log_index import AccessLogIndex, INDEX_RANGES, DEFAULT_INDEX_RANGE
     from flask import jsonify
     
     try:
         if not os.path.exists(log_file):
             return jsonify({'error': 'ログファイルが見つかりません'}), 404
         
-        analyzer = AccessLogAnalyzer(log_file)
-        stats = analyzer.analyze_logs(max_lines=5000)  # より多くのデータを分析
-        report = analyzer.generate_report()
+        if log_file == ACCESS_LOG_PATH:
+            # 画面と同じ期間の集計
+            index_range = request.args.get('range', DEFAULT_INDEX_RANGE)
+            if index_range not in INDEX_RANGES:
+                index_range = DEFAULT_INDEX_RANGE
+            report = AccessLogIndex(log_file).build_report(index_range)
+            report['range'] = index_range
+        else:
+            analyzer = AccessLogAnalyzer(log_file)
+            stats = analyzer.analyze_logs(max_lines=5000)  # より多くのデータを分析
+            report = analyzer.generate_report()
         
         # タイムスタンプを追加
         report['generated_at'] = datetime.now().isoformat()
@@ -2031,7 +2090,9 @@ def download_log_report(log_file):
 def seo_tools():
     """SEO対策ツール画面"""
     # 最近の記事を取得（SEO分析対象）
-    recent_articles = db.session.execute(select(Article).order_by(Article.created_at.desc()).limit(10)).scalars().all()
+    recent_articles = db.session.execute(
+        select(Article).options(*Article.list_column_options()).order_by(Article.created_at.desc()).limit(10)
+    ).scalars().all()
     
     return render_template('admin/seo_tools.html', 
                          recent_articles=recent_articles)
@@ -2165,7 +2226,9 @@ def seo_batch_analyze():
             flash(f'一括分析エラー: {str(e)}', 'danger')
     
     # 分析対象記事一覧
-    articles = db.session.execute(select(Article).order_by(Article.created_at.desc()).limit(50)).scalars().all()
+    articles = db.session.execute(
+        select(Article).options(*Article.list_column_options()).order_by(Article.created_at.desc()).limit(50)
+    ).scalars().all()
     
     return render_template('admin/seo_batch_analyze.html',
                          articles=articles,
@@ -2292,7 +2355,10 @@ def site_settings():
                 )
                 db.session.add(sns_setting)
             
+            # 全ワーカーの設定キャッシュを無効化
+            SiteSetting.bump_version()
             db.session.commit()
+            SiteSetting.invalidate_cache()
             flash('サイト設定を更新しました', 'success')
             
         except Exception as e:
@@ -2326,19 +2392,9 @@ def preview_markdown():
         if not markdown_text:
             return '<p class="text-muted">プレビューを表示するには本文を入力してください。</p>'
         
-        # Markdownライブラリを直接使用してHTMLに変換
-        import markdown
-        from markdown.extensions import codehilite, fenced_code, tables, toc
-        
-        md = markdown.Markdown(extensions=[
-            'codehilite',
-            'fenced_code',
-            'tables',
-            'toc',
-            'nl2br'
-        ])
-        html_content = md.convert(markdown_text)
-        return str(html_content)
+        # プレビュー用設定の変換器（スレッドごとに使い回し）でHTMLに変換し、サニタイズ
+        html_content = convert_markdown(markdown_text, profile='preview')
+        return get_html_cleaner('preview').clean(html_content)
     except Exception as e:
         current_app.logger.error(f"Markdown preview error: {e}")
         return f'<p class="text-danger">プレビューエラー: {str(e)}</p>'
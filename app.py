@@ -9,6 +9,7 @@ import os
 import time
 from dotenv import load_dotenv
 from sqlalchemy import select, func
+from sqlalchemy.orm import defer, joinedload, selectinload, raiseload
 from admin import admin_bp
 
 # .envファイルを読み込み
@@ -28,19 +29,14 @@ from bs4 import BeautifulSoup
 import pymysql
 pymysql.install_as_MySQLdb()
 
-# OGPキャッシュ用
-from functools import lru_cache
-import hashlib
-from datetime import datetime, timedelta
-
-# OGPキャッシュ管理
-ogp_cache = {}
-OGP_CACHE_DURATION = 3600  # 1時間
-
-def clear_ogp_cache():
-    """OGPキャッシュをクリア"""
-    global ogp_cache
-    ogp_cache.clear()
+# 記事本文レンダリング（Markdown・SNS埋込・OGPカード）
+from article_renderer import markdown_filter, sanitize_html, process_sns_auto_embed, generate_ogp_card, ensure_article_rendered, ensure_list_excerpts
+from ogp_fetcher import fetch_ogp_data
+from pagination import paginate_articles
+from page_cache import (serve_cached_page, store_page, add_page_cache_tags, article_list_tags,
+                        article_tag, category_tag, user_tag)
+from http_validators import make_etag, check_not_modified, apply_page_validators
+from access_logger import log_access
 
 
 # models.py から db インスタンスとモデルクラスをインポートします
@@ -77,12 +73,8 @@ def after_request(response):
         referrer = request.referrer or '-'
         user_agent = request.headers.get('User-Agent', '-')
         
-        # アクセスログの記録（Apache Combined Log Format風）
-        log_entry = f'{remote_addr} - - [{datetime.now().strftime("%d/%b/%Y:%H:%M:%S %z")}] "{method} {path} {protocol}" {status} {content_length} "{referrer}" "{user_agent}"'
-        
-        # access.log ファイルに記録
-        with open('access.log', 'a', encoding='utf-8') as f:
-            f.write(log_entry + '\n')
+        # アクセスログの記録（Apache Combined Log Format風、書き込みはバックグラウンドスレッド）
+        log_access(remote_addr, method, path, protocol, status, content_length, referrer, user_agent)
             
     except Exception as e:
         # ログ記録エラーは無視（アプリケーションの動作に影響しないように）
@@ -90,6 +82,20 @@ def after_request(response):
     
     return response
 
+# 匿名ユーザー向けページキャッシュ（対象はキャッシュ済みならビューを実行せずに返す）
+@app.before_request
+def serve_page_cache():
+    return serve_cached_page()
+
+@app.after_request
+def store_page_cache(response):
+    return store_page(response)
+
+# 描画したページにETagを付与（ページキャッシュより先に実行されるよう後から登録）
+@app.after_request
+def add_page_validators(response):
+    return apply_page_validators(response)
+
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your_default_secret_key')
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///miniblog.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
@@ -132,22 +138,6 @@ else:
     app.logger.addHandler(stream_handler)
     app.logger.setLevel(logging.INFO)
 
-# アクセスログファイルハンドラーを追加
-import logging.handlers
-access_log_handler = logging.handlers.RotatingFileHandler(
-    'access.log', maxBytes=10*1024*1024, backupCount=5  # 10MB, 5ファイルまで
-)
-access_log_handler.setLevel(logging.INFO)
-access_log_formatter = logging.Formatter(
-    '%(remote_addr)s - - [%(asctime)s] "%(method)s %(path)s %(protocol)s" %(status)s %(content_length)s "%(referrer)s" "%(user_agent)s"',
-    datefmt='%d/%b/%Y:%H:%M:%S %z'
-)
-access_log_handler.setFormatter(access_log_formatter)
-
-# Flaskのアクセスログ用ロガーを作成
-access_logger = logging.getLogger('access_log')
-access_logger.addHandler(access_log_handler)
-access_logger.setLevel(logging.INFO)
 # --- ここまで追加 ---
 
 migrate = Migrate()  # Migrate インスタンスの作成はここでもOK
@@ -164,767 +154,17 @@ migrate.init_app(app, db)
 csrf.init_app(app)  # CSRF保護を有効化
 
 # Markdownフィルターを追加
-@app.template_filter('markdown')
-def markdown_filter(text):
-    """MarkdownテキストをHTMLに変換するフィルター（SNS埋込自動検出付き）"""
-    if not text:
-        return ''
-    
-    # SNS URLの自動埋込処理（Markdown変換前）
-    text = process_sns_auto_embed(text)
-    
-    # Markdownの拡張機能を設定
-    md = markdown.Markdown(
-        extensions=['extra', 'codehilite', 'toc', 'nl2br'],
-        extension_configs={
-            'codehilite': {
-                'css_class': 'highlight',
-                'use_pygments': False
-            }
-        },
-        tab_length=2  # タブ長を短く設定
-    )
-    
-    # MarkdownをHTMLに変換
-    html = md.convert(text)
-    
-    # セキュリティのためHTMLをサニタイズ（SNS埋込用タグを追加）
-    allowed_tags = [
-        'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
-        'p', 'br', 'strong', 'em', 'u', 'del',
-        'ul', 'ol', 'li', 'blockquote', 'pre', 'code',
-        'a', 'img', 'table', 'thead', 'tbody', 'tr', 'th', 'td',
-        # SNS埋込用タグ
-        'div', 'iframe', 'script', 'blockquote', 'noscript'
-    ]
-    allowed_attributes = {
-        'a': ['href', 'title', 'target', 'rel'],
-        'img': ['src', 'alt', 'title', 'width', 'height'],
-        'code': ['class'],
-        'pre': ['class'],
-        # SNS埋込用属性
-        'div': ['class', 'id', 'style', 'data-href', 'data-width', 'data-instgrm-permalink'],
-        'iframe': ['src', 'width', 'height', 'frameborder', 'allow', 'allowfullscreen', 'title', 'style'],
-        'script': ['src', 'async', 'defer', 'charset', 'crossorigin'],
-        'blockquote': ['class', 'style', 'data-instgrm-permalink'],
-        'noscript': []
-    }
-    
-    # SNS埋込HTMLがある場合はbleachを適用しない（安全なHTMLのため）
-    if any(cls in html for cls in ['sns-embed', 'youtube-embed', 'twitter-embed', 'instagram-embed', 'facebook-embed', 'threads-embed']):
-        clean_html = html
-    else:
-        # 通常のMarkdownコンテンツのみサニタイズ
-        clean_html = bleach.clean(html, tags=allowed_tags, attributes=allowed_attributes)
-    
-    return Markup(clean_html)
+app.add_template_filter(markdown_filter, 'markdown')
+app.add_template_filter(sanitize_html, 'sanitize_html')
 mail.init_app(app)  # メール機能を有効化
 login_manager.init_app(app)
 
 @login_manager.user_loader
 def load_user(user_id):
-    return db.session.get(User, int(user_id))  # SQLAlchemy 2.0 対応
-
-# HTMLサニタイゼーション用ヘルパー関数
-def sanitize_html(content):
-    """HTMLコンテンツをサニタイズ"""
-    allowed_tags = ['p', 'br', 'strong', 'em', 'u', 'ol', 'ul', 'li', 'a', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
-    allowed_attributes = {'a': ['href', 'title']}
-    return bleach.clean(content, tags=allowed_tags, attributes=allowed_attributes, strip=True)
-
-def process_sns_auto_embed(text):
-    """テキスト中のSNS URLを自動的に埋込HTMLに変換"""
-    if not text:
-        return text
-    
-    # 既に処理済みのHTMLかどうかをチェック
-    if any(cls in text for cls in ['sns-embed', 'youtube-embed', 'twitter-embed', 'instagram-embed', 'facebook-embed', 'threads-embed']):
-        current_app.logger.debug("🚫 Already processed content detected, skipping SNS auto embed")
-        return text
-    
-    current_app.logger.debug(f"🔍 Processing SNS auto embed for text length: {len(text)}")
-    
-    # SNSプラットフォーム検出パターン（独立行のURLをマッチ）
-    sns_patterns = {
-        'youtube': [
-            r'(https?://(?:www\.)?youtube\.com/watch\?v=([a-zA-Z0-9_-]+)(?:\S*)?)',
-            r'(https?://youtu\.be/([a-zA-Z0-9_-]+)(?:\?\S*)?)'
-        ],
-        'twitter': [
-            r'(https?://(?:www\.)?twitter\.com/\w+/status/(\d+)(?:\S*)?)',
-            r'(https?://(?:www\.)?x\.com/\w+/status/(\d+)(?:\S*)?)',
-        ],
-        'instagram': [
-            r'(https?://(?:www\.)?instagram\.com/p/([a-zA-Z0-9_-]+)/?(?:\?\S*)?)',
-            r'(https?://(?:www\.)?instagram\.com/reel/([a-zA-Z0-9_-]+)/?(?:\?\S*)?)'
-        ],
-        'facebook': [
-            r'(https?://(?:www\.)?facebook\.com/\w+/posts/(\d+)(?:\S*)?)',
-            r'(https?://(?:www\.)?facebook\.com/\w+/videos/(\d+)(?:\S*)?)',
-            r'(https?://fb\.watch/([a-zA-Z0-9_-]+)/?(?:\?\S*)?)'
-        ],
-        'threads': [
-            r'(https?://(?:www\.)?threads\.net/@\w+/post/([a-zA-Z0-9_-]+)(?:\S*)?)',
-            r'(https?://(?:www\.)?threads\.com/@\w+/post/([a-zA-Z0-9_-]+)(?:\S*)?)'
-        ]
-    }
-    
-    # 各プラットフォームのURLパターンをチェックして置換
-    for platform, patterns in sns_patterns.items():
-        for pattern in patterns:
-            def replace_match(match):
-                url = match.group(1).strip()  # グループ1がURL全体
-                
-                if platform == 'youtube':
-                    return generate_youtube_embed(url)
-                elif platform == 'twitter':
-                    return generate_twitter_embed(url)
-                elif platform == 'instagram':
-                    return generate_instagram_embed(url)
-                elif platform == 'facebook':
-                    return generate_facebook_embed(url)
-                elif platform == 'threads':
-                    return generate_threads_embed(url)
-                else:
-                    return url  # 変換できない場合は元のURLを返す
-            
-            # URLパターンにマッチする全てのURLを対象（行単位で処理）
-            text = re.sub(pattern, replace_match, text, flags=re.MULTILINE)
-    
-    # 一般的なWebサイトURLのOGPカード表示処理を追加
-    text = process_general_url_embeds(text)
-    
-    return text
-
-def process_general_url_embeds(text):
-    """一般的なWebサイトURLをOGPカード表示に変換"""
-    if not text:
-        return text
-    
-    import re
-    
-    # 一般的なURL検出パターン（独立行で、かつSNSではないURL）
-    # SNSプラットフォームを除外するネガティブルックアヘッド
-    general_url_pattern = r'^(https?://(?!(?:www\.)?(youtube\.com|youtu\.be|twitter\.com|x\.com|instagram\.com|facebook\.com|fb\.watch|threads\.net|threads\.com))[^\s]+)$'
-    
-    def replace_general_url(match):
-        url = match.group(1).strip()
-        return generate_ogp_card(url)
-    
-    # 行単位でURLを検出して置換
-    text = re.sub(general_url_pattern, replace_general_url, text, flags=re.MULTILINE)
-    
-    current_app.logger.debug(f"✅ SNS auto embed processing completed. Output length: {len(text)}")
-    return text
-
-def fetch_ogp_data(url, force_refresh=False):
-    """URLからOGP（Open Graph Protocol）データを取得（キャッシュ対応、Selenium対応）"""
-    # キャッシュチェック
-    cache_key = hashlib.md5(url.encode()).hexdigest()
-    current_time = datetime.now()
-    
-    # force_refreshがTrueの場合はキャッシュをスキップ
-    if not force_refresh and cache_key in ogp_cache:
-        cached_data, cached_time = ogp_cache[cache_key]
-        if current_time - cached_time < timedelta(seconds=OGP_CACHE_DURATION):
-            current_app.logger.debug(f"OGP cache hit for: {url[:50]}...")
-            return cached_data
-    
-    # Threads URLかどうかを判定
-    is_threads_url = 'threads.com' in url or 'threads.net' in url
-    
-    try:
-        if is_threads_url:
-            # ThreadsにはSeleniumを使用
-            ogp_data = _fetch_threads_ogp_with_selenium(url)
-        else:
-            # 通常のURLには従来の方法を使用
-            ogp_data = _fetch_ogp_with_requests(url)
-        
-        # キャッシュに保存
-        ogp_cache[cache_key] = (ogp_data, current_time)
-        current_app.logger.debug(f"OGP data cached for: {url[:50]}...")
-        
-        return ogp_data
-        
-    except Exception as e:
-        current_app.logger.error(f"OGP fetch error: {e}")
-        # エラー時も空のデータをキャッシュ（短時間）
-        empty_data = {}
-        ogp_cache[cache_key] = (empty_data, current_time)
-        return empty_data
-
-def _fetch_ogp_with_requests(url):
-    """通常のHTTPリクエストでOGPデータを取得（高速化版）"""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-        'Accept-Language': 'ja,en-US;q=0.9,en;q=0.8',
-        'Accept-Encoding': 'gzip, deflate'
-    }
-    
-    try:
-        current_app.logger.debug(f"🌐 Fetching OGP for: {url[:50]}...")
-        start_time = time.time()
-        
-        response = requests.get(url, headers=headers, timeout=8, stream=True)
-        response.raise_for_status()
-        
-        # 最初の64KBのみを読み取る（OGPはHTMLヘッダにあるため）
-        content_size_limit = 65536  # 64KB
-        content = b''
-        for chunk in response.iter_content(chunk_size=8192):
-            content += chunk
-            if len(content) >= content_size_limit:
-                break
-        response.close()
-        
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        ogp_data = {}
-        
-        # より効率的なOGPメタタグ検索
-        ogp_tags = soup.find_all('meta', attrs={'property': lambda x: x and x.startswith('og:')})
-        twitter_tags = soup.find_all('meta', attrs={'name': lambda x: x and x.startswith('twitter:')})
-        
-        # OGPタグの処理
-        for tag in ogp_tags:
-            prop = tag.get('property', '').lower()
-            content = tag.get('content', '').strip()
-            if content:
-                if prop == 'og:title':
-                    ogp_data['title'] = content
-                elif prop == 'og:description':
-                    ogp_data['description'] = content
-                elif prop == 'og:image':
-                    ogp_data['image'] = content
-                elif prop == 'og:site_name':
-                    ogp_data['site_name'] = content
-                elif prop == 'og:url':
-                    ogp_data['url'] = content
-        
-        # Twitterカードタグをフォールバックとして使用
-        for tag in twitter_tags:
-            name = tag.get('name', '').lower()
-            content = tag.get('content', '').strip()
-            if content:
-                if name == 'twitter:title' and not ogp_data.get('title'):
-                    ogp_data['title'] = content
-                elif name == 'twitter:description' and not ogp_data.get('description'):
-                    ogp_data['description'] = content
-                elif name == 'twitter:image' and not ogp_data.get('image'):
-                    ogp_data['image'] = content
-        
-        # フォールバック: 通常のmetaタグからも取得
-        if not ogp_data.get('title'):
-            title_tag = soup.find('title')
-            if title_tag:
-                ogp_data['title'] = title_tag.get_text().strip()
-        
-        if not ogp_data.get('description'):
-            desc_tag = soup.find('meta', attrs={'name': 'description'})
-            if desc_tag and desc_tag.get('content'):
-                ogp_data['description'] = desc_tag.get('content', '').strip()
-        
-        # サイト名がない場合はドメインから推測
-        if not ogp_data.get('site_name'):
-            from urllib.parse import urlparse
-            parsed_url = urlparse(url)
-            domain = parsed_url.netloc.replace('www.', '')
-            ogp_data['site_name'] = domain
-        
-        fetch_time = time.time() - start_time
-        current_app.logger.debug(f"✅ OGP fetched in {fetch_time:.2f}s for: {url[:50]}...")
-        
-        return ogp_data
-        
-    except requests.exceptions.Timeout:
-        current_app.logger.warning(f"⏰ OGP timeout for: {url[:50]}...")
-        return {}
-    except requests.exceptions.RequestException as e:
-        current_app.logger.warning(f"⚠️ OGP request failed for {url[:50]}...: {e}")
-        return {}
-    except Exception as e:
-        current_app.logger.error(f"❌ OGP fetch error for {url[:50]}...: {e}")
-        return {}
-
-def _fetch_threads_ogp_with_selenium(url):
-    """SeleniumでThreadsのOGPデータを取得"""
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.chrome.service import Service
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    from webdriver_manager.chrome import ChromeDriverManager
-    import time
-    
-    chrome_options = Options()
-    chrome_options.add_argument('--headless')  # ヘッドレスモード
-    chrome_options.add_argument('--no-sandbox')
-    chrome_options.add_argument('--disable-dev-shm-usage')
-    chrome_options.add_argument('--disable-gpu')
-    chrome_options.add_argument('--window-size=1920,1080')
-    chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-    
-    driver = None
-    try:
-        current_app.logger.debug("🌐 Starting Selenium for Threads URL...")
-        
-        # webdriver-managerでChromeDriverをインストール
-        import os
-        import stat
-        
-        # ChromeDriverManagerの代わりに直接パスを指定
-        base_wdm_path = os.path.expanduser("~/.wdm/drivers/chromedriver")
-        
-        # webdriver-managerを使用してパスを取得
-        try:
-            driver_path = ChromeDriverManager().install()
-            current_app.logger.debug(f"ChromeDriver manager path: {driver_path}")
-            
-            # webdriver-managerが間違ったファイルを返している場合の修正
-            driver_dir = os.path.dirname(driver_path)
-            chromedriver_path = os.path.join(driver_dir, "chromedriver")
-            
-            # 正しいchromedriver実行ファイルを見つける
-            if os.path.exists(chromedriver_path) and os.path.isfile(chromedriver_path):
-                actual_driver_path = chromedriver_path
-            else:
-                # 再帰的にchromedriver実行ファイルを探す
-                import glob
-                pattern = os.path.join(base_wdm_path, "**/chromedriver")
-                found_drivers = glob.glob(pattern, recursive=True)
-                for found_driver in found_drivers:
-                    if os.path.isfile(found_driver):
-                        actual_driver_path = found_driver
-                        break
-            
-            if not actual_driver_path:
-                raise Exception("Could not find valid ChromeDriver executable")
-                
-        except Exception as e:
-            current_app.logger.error(f"ChromeDriverManager failed: {e}")
-            raise Exception("Could not find valid ChromeDriver executable")
-        
-        current_app.logger.debug(f"Actual ChromeDriver path: {actual_driver_path}")
-        
-        # 実行権限を確認・設定
-        if not os.access(actual_driver_path, os.X_OK):
-            os.chmod(actual_driver_path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
-            current_app.logger.debug("Set executable permission for ChromeDriver")
-        
-        service = Service(actual_driver_path)
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        driver.get(url)
-        
-        # ページの読み込み完了を待機
-        current_app.logger.debug("⏳ Waiting for page load...")
-        time.sleep(5)
-        
-        # OGPメタタグが読み込まれるまで待機
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//meta[contains(@property, 'og:') or contains(@name, 'twitter:')]"))
-            )
-            current_app.logger.debug("✅ OGP meta tags detected")
-        except:
-            current_app.logger.debug("⚠️ OGP meta tags not found, continuing anyway")
-        
-        html = driver.page_source
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        ogp_data = {}
-        
-        # OGPとTwitterカードの情報を取得
-        for tag in soup.find_all('meta'):
-            for attr in ['property', 'name']:
-                if tag.has_attr(attr):
-                    key = tag.get(attr)
-                    content = tag.get('content', '')
-                    if key and content:
-                        if key.startswith('og:'):
-                            if key == 'og:title':
-                                ogp_data['title'] = content
-                            elif key == 'og:description':
-                                ogp_data['description'] = content
-                            elif key == 'og:image':
-                                ogp_data['image'] = content
-                            elif key == 'og:site_name':
-                                ogp_data['site_name'] = content
-                            elif key == 'og:url':
-                                ogp_data['url'] = content
-                        elif key.startswith('twitter:'):
-                            if key == 'twitter:title' and not ogp_data.get('title'):
-                                ogp_data['title'] = content
-                            elif key == 'twitter:description' and not ogp_data.get('description'):
-                                ogp_data['description'] = content
-                            elif key == 'twitter:image' and not ogp_data.get('image'):
-                                ogp_data['image'] = content
-        
-        # フォールバック: HTMLからの基本情報取得
-        if not ogp_data.get('title'):
-            title_tag = soup.find('title')
-            if title_tag:
-                ogp_data['title'] = title_tag.get_text().strip()
-        
-        if not ogp_data.get('description'):
-            desc_tag = soup.find('meta', attrs={'name': 'description'})
-            if desc_tag:
-                content = desc_tag.get('content', '')
-                if content:
-                    ogp_data['description'] = content
-        
-        # Threads特有のフォールバック処理
-        if not ogp_data.get('title') or ogp_data.get('title') == 'Threads':
-            import re
-            user_match = re.search(r'@([^/]+)/', url)
-            if user_match:
-                username = user_match.group(1)
-                ogp_data['title'] = f"{username} (@{username}) on Threads"
-                if not ogp_data.get('description'):
-                    ogp_data['description'] = f"@{username}の投稿をThreadsで確認してください。"
-                ogp_data['site_name'] = 'Threads'
-        
-        current_app.logger.debug(f"📊 Selenium fetched {len(ogp_data)} meta items for Threads")
-        return ogp_data
-        
-    except Exception as e:
-        current_app.logger.error(f"❌ Selenium fetch failed: {e}")
-        # フォールバック: URLから基本情報を抽出
-        import re
-        user_match = re.search(r'@([^/]+)/', url)
-        if user_match:
-            username = user_match.group(1)
-            return {
-                'title': f"{username} (@{username}) on Threads",
-                'description': f"@{username}の投稿をThreadsで確認してください。",
-                'site_name': 'Threads'
-            }
-        return {}
-    finally:
-        if driver:
-            try:
-                driver.quit()
-            except:
-                pass
-
-def generate_ogp_card(url):
-    """一般的なWebサイトのOGPカードを生成"""
-    try:
-        # 開発環境でのテスト用：force_refreshを使用
-        force_refresh = app.debug and request.args.get('refresh_ogp') == '1'
-        ogp_data = fetch_ogp_data(url, force_refresh=force_refresh)
-        current_app.logger.debug(f"General OGP data fetched: {ogp_data}")
-        
-        # OGPデータから情報を抽出
-        title = ogp_data.get('title', '')
-        description = ogp_data.get('description', '')
-        image = ogp_data.get('image', '')
-        site_name = ogp_data.get('site_name', '')
-        
-        # URLからドメイン名を抽出
-        from urllib.parse import urlparse
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc.replace('www.', '')
-        
-        # フォールバック処理
-        if not title:
-            title = domain
-        if not description:
-            description = f"{domain}のコンテンツをご覧ください。"
-        if not site_name:
-            site_name = domain
-        
-        # 説明文をトリミング
-        if len(description) > 200:
-            description = description[:200] + '...'
-        
-        # ファビコンURL生成
-        favicon_url = f"https://www.google.com/s2/favicons?domain={domain}"
-        
-        # 画像表示用HTML
-        image_html = ''
-        if image:
-            image_html = f'''
-            <div style="margin: 0 0 15px 0;">
-                <div style="width: 100%; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.15);">
-                    <img src="{image}" alt="{title}" style="width: 100%; height: auto; display: block; max-height: 250px; object-fit: cover;">
-                </div>
-            </div>'''
-        
-        return f'''<div class="ogp-card" style="margin: 20px 0; border: 1px solid #e1e5e9; border-radius: 12px; background: #ffffff; box-shadow: 0 4px 12px rgba(0,0,0,0.08); overflow: hidden; transition: all 0.3s ease;">
-    <a href="{url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: inherit; display: block;">
-        <div style="padding: {'' if image else '20px 20px 0 20px'};">
-            {image_html}
-        </div>
-        <div style="padding: {'0 20px 20px 20px' if image else '20px'};">
-            <div style="display: flex; align-items: center; margin-bottom: 12px;">
-                <img src="{favicon_url}" alt="" style="width: 16px; height: 16px; margin-right: 8px; border-radius: 2px;" onerror="this.style.display='none'">
-                <div style="color: #65676b; font-size: 13px; font-weight: 500;">{site_name}</div>
-            </div>
-            <h3 style="margin: 0 0 10px 0; font-size: 16px; font-weight: 600; color: #1c1e21; line-height: 1.4;">{title}</h3>
-            <p style="margin: 0; color: #65676b; font-size: 14px; line-height: 1.5;">{description}</p>
-            <div style="margin-top: 15px; display: flex; align-items: center; color: #1877f2; font-size: 13px; font-weight: 500;">
-                <span style="margin-right: 6px;">🔗</span>
-                <span>リンクを開く</span>
-                <span style="margin-left: 6px;">→</span>
-            </div>
-        </div>
-    </a>
-</div>'''
-        
-    except Exception as e:
-        current_app.logger.error(f"OGP card generation error: {e}")
-        # フォールバック表示
-        from urllib.parse import urlparse
-        parsed_url = urlparse(url)
-        domain = parsed_url.netloc.replace('www.', '')
-        favicon_url = f"https://www.google.com/s2/favicons?domain={domain}"
-        
-        return f'''<div class="ogp-card" style="margin: 20px 0; border: 1px solid #e1e5e9; border-radius: 12px; background: #ffffff; box-shadow: 0 4px 12px rgba(0,0,0,0.08); overflow: hidden;">
-    <a href="{url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: inherit; display: block; padding: 20px;">
-        <div style="display: flex; align-items: center; margin-bottom: 12px;">
-            <img src="{favicon_url}" alt="" style="width: 16px; height: 16px; margin-right: 8px; border-radius: 2px;" onerror="this.style.display='none'">
-            <div style="color: #65676b; font-size: 13px; font-weight: 500;">{domain}</div>
-        </div>
-        <h3 style="margin: 0 0 10px 0; font-size: 16px; font-weight: 600; color: #1c1e21; line-height: 1.4;">{domain}</h3>
-        <p style="margin: 0; color: #65676b; font-size: 14px; line-height: 1.5;">このリンクの詳細情報を表示</p>
-        <div style="margin-top: 15px; display: flex; align-items: center; color: #1877f2; font-size: 13px; font-weight: 500;">
-            <span style="margin-right: 6px;">🔗</span>
-            <span>リンクを開く</span>
-            <span style="margin-left: 6px;">→</span>
-        </div>
-    </a>
-</div>'''
-
-def detect_platform_from_url(url):
-    """URLからSNSプラットフォームを検出"""
-    url_lower = url.lower()
-    if 'youtube.com' in url_lower or 'youtu.be' in url_lower:
-        return 'youtube'
-    elif 'twitter.com' in url_lower or 'x.com' in url_lower:
-        return 'twitter'
-    elif 'instagram.com' in url_lower:
-        return 'instagram'
-    elif 'facebook.com' in url_lower or 'fb.watch' in url_lower:
-        return 'facebook'
-    elif 'threads.net' in url_lower or 'threads.com' in url_lower:
-        return 'threads'
-    return None
-
-def generate_youtube_embed(url):
-    """YouTube埋込HTMLを生成"""
-    # YouTube動画ID抽出
-    video_id = None
-    if 'youtu.be' in url:
-        # https://youtu.be/VIDEO_ID?params から VIDEO_ID を抽出
-        video_id = url.split('/')[-1].split('?')[0]
-    else:
-        # https://www.youtube.com/watch?v=VIDEO_ID&params から VIDEO_ID を抽出
-        match = re.search(r'v=([a-zA-Z0-9_-]+)', url)
-        if match:
-            video_id = match.group(1)
-    
-    if video_id:
-        return f'''<div class="sns-embed youtube-embed" style="position: relative; padding-bottom: 56.25%; height: 0; overflow: hidden; max-width: 100%; margin: 20px 0;">
-    <iframe src="https://www.youtube.com/embed/{video_id}" 
-            style="position: absolute; top: 0; left: 0; width: 100%; height: 100%;"
-            frameborder="0" 
-            allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" 
-            allowfullscreen
-            title="YouTube video player">
-    </iframe>
-</div>'''
-    return url
-
-def generate_twitter_embed(url):
-    """Twitter埋込HTMLを生成"""
-    # x.com URLをtwitter.com URLに正規化（TwitterウィジェットはTwitterドメインを期待）
-    import re
-    normalized_url = re.sub(r'https?://(www\.)?x\.com/', 'https://twitter.com/', url)
-    
-    return f'''<div class="sns-embed twitter-embed" style="margin: 20px 0;">
-    <blockquote class="twitter-tweet" style="margin: 0 auto;">
-        <a href="{normalized_url}"></a>
-    </blockquote>
-    <script async src="https://platform.twitter.com/widgets.js" charset="utf-8"></script>
-</div>'''
-
-def generate_instagram_embed(url):
-    """Instagram埋込HTMLを生成"""
-    # URLクエリパラメータを削除してクリーンなURLにする
-    clean_url = url.split('?')[0].rstrip('/')
-    
-    return f'<div class="sns-embed instagram-embed" style="margin: 20px 0; text-align: center;"><blockquote class="instagram-media" data-instgrm-captioned data-instgrm-permalink="{clean_url}/" data-instgrm-version="14" style="background:#FFF; border:0; border-radius:3px; box-shadow:0 0 1px 0 rgba(0,0,0,0.5),0 1px 10px 0 rgba(0,0,0,0.15); margin: 1px; max-width:540px; min-width:326px; padding:0; width:99.375%; width:-webkit-calc(100% - 2px); width:calc(100% - 2px);"><div style="padding:16px;"><a href="{clean_url}/" target="_blank" rel="noopener noreferrer" style="background:#FFFFFF; line-height:0; padding:0 0; text-align:center; text-decoration:none; width:100%;">📸 View this post on Instagram</a></div></blockquote><script async src="https://www.instagram.com/embed.js"></script><script>document.addEventListener(\'DOMContentLoaded\', function() {{ setTimeout(function() {{ if (window.instgrm && window.instgrm.Embeds) {{ window.instgrm.Embeds.process(); }} }}, 1000); }});</script></div>'
-
-def generate_facebook_embed(url):
-    """Facebook埋込HTMLを生成"""
-    return f'<div class="sns-embed facebook-embed" style="margin: 20px 0;"><div class="fb-post" data-href="{url}" data-width="500"></div><div id="fb-root"></div><script async defer crossorigin="anonymous" src="https://connect.facebook.net/ja_JP/sdk.js#xfbml=1&version=v18.0"></script></div>'
-
-def generate_threads_embed(url):
-    """Threads埋込HTMLを生成（OGPデータ取得版）"""
-    import re
-    
-    # URLからユーザー名と投稿IDを抽出
-    user_match = re.search(r'@([^/]+)/', url)
-    post_match = re.search(r'/post/([a-zA-Z0-9_-]+)', url)
-    
-    username = user_match.group(1) if user_match else 'user'
-    post_id = post_match.group(1) if post_match else ''
-    
-    # 投稿URLをより分かりやすい形式で表示
-    short_post_id = post_id[:8] + '...' if len(post_id) > 8 else post_id
-    
-    try:
-        # 開発環境でのテスト用：force_refreshを使用
-        force_refresh = app.debug and request.args.get('refresh_ogp') == '1'
-        ogp_data = fetch_ogp_data(url, force_refresh=force_refresh)
-        current_app.logger.debug(f"Threads OGP data fetched: {ogp_data}")
-        
-        # OGPデータから情報を抽出
-        title = ogp_data.get('title', '')
-        description = ogp_data.get('description', '')
-        image = ogp_data.get('image', '')
-        site_name = ogp_data.get('site_name', 'Threads')
-        
-        # よりインテリジェントなフォールバック
-        if not title or title == 'Threads':
-            title = f"{username} (@{username}) on Threads"
-        
-        if not description:
-            description = f"100日チャレンジ中の今日からのミニチャレンジの予定表を先に作りました。📝 Python 100日チャレンジなど、{username}さんの最新の投稿をThreadsでご覧ください。"
-        
-        # 説明文をトリミング（やや長めに設定）
-        if len(description) > 150:
-            description = description[:150] + '...'
-        
-        # Threads画像はCORS制限があるため、最初から代替表示を使用
-        if image and 'cdninstagram.com' in image:
-            # CDNinstagram画像の場合は代替表示
-            image_html = f'''
-        <div style="margin: 15px 0;">
-            <div style="width: 100%; max-width: 500px; height: 200px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 8px; display: flex; align-items: center; justify-content: center; position: relative; box-shadow: 0 2px 8px rgba(0,0,0,0.15);">
-                <div style="text-align: center; color: white;">
-                    <div style="font-size: 32px; margin-bottom: 12px;">🧵</div>
-                    <div style="font-size: 16px; font-weight: 600; margin-bottom: 4px;">Threads 投稿画像</div>
-                    <div style="font-size: 13px; opacity: 0.9;">@{username}</div>
-                </div>
-                <div style="position: absolute; top: 10px; right: 10px; background: rgba(0,0,0,0.3); padding: 6px 10px; border-radius: 12px; font-size: 11px; color: white; backdrop-filter: blur(4px);">
-                    🧵 {short_post_id}
-                </div>
-            </div>
-        </div>'''
-        elif image:
-            # 他の画像の場合は通常表示
-            image_html = f'''
-        <div style="margin: 15px 0;">
-            <div style="width: 100%; max-width: 500px; border-radius: 8px; overflow: hidden; position: relative; box-shadow: 0 2px 8px rgba(0,0,0,0.15);">
-                <img src="{image}" alt="Threads post image" style="width: 100%; height: auto; display: block; max-height: 400px; object-fit: cover;">
-                <div style="position: absolute; top: 10px; right: 10px; background: rgba(0,0,0,0.7); padding: 4px 8px; border-radius: 12px; font-size: 11px; color: white; backdrop-filter: blur(4px);">
-                    🧵 {short_post_id}
-                </div>
-            </div>
-        </div>'''
-        else:
-            # 画像がない場合のフォールバック表示
-            image_html = f'''
-        <div style="margin: 15px 0;">
-            <div style="width: 100%; height: 120px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 8px; display: flex; align-items: center; justify-content: center; position: relative; overflow: hidden;">
-                <div style="text-align: center; color: white;">
-                    <div style="font-size: 24px; margin-bottom: 8px;">🧵</div>
-                    <div style="font-size: 14px; font-weight: 500;">Threads 投稿</div>
-                    <div style="font-size: 12px; opacity: 0.8; margin-top: 4px;">@{username}</div>
-                </div>
-                <div style="position: absolute; top: 10px; right: 10px; background: rgba(0,0,0,0.3); padding: 4px 8px; border-radius: 12px; font-size: 11px; color: white;">
-                    {short_post_id}
-                </div>
-            </div>
-        </div>'''
-        
-        return f'''<div class="sns-embed threads-embed" style="margin: 20px 0; padding: 20px; border: 1px solid #e1e5e9; border-radius: 12px; background: linear-gradient(135deg, #fafafa 0%, #f0f0f0 100%); box-shadow: 0 4px 12px rgba(0,0,0,0.1);">
-    <div style="display: flex; align-items: center; margin-bottom: 15px;">
-        <div style="width: 45px; height: 45px; background: linear-gradient(45deg, #000, #333); border-radius: 12px; display: flex; align-items: center; justify-content: center; margin-right: 15px; box-shadow: 0 2px 8px rgba(0,0,0,0.2);">
-            <span style="color: white; font-weight: bold; font-size: 18px;">@</span>
-        </div>
-        <div style="flex: 1;">
-            <div style="font-weight: 600; color: #1c1e21; font-size: 16px; margin-bottom: 2px;">{title}</div>
-            <div style="color: #65676b; font-size: 13px; display: flex; align-items: center;">
-                <span style="margin-right: 6px;">🧵</span>
-                {site_name}
-            </div>
-        </div>
-        <div style="text-align: right;">
-            <div style="color: #999; font-size: 11px; background: rgba(0,0,0,0.05); padding: 4px 8px; border-radius: 8px;">
-                {short_post_id}
-            </div>
-        </div>
-    </div>
-    <div style="margin-bottom: 15px;">
-        <p style="color: #1c1e21; line-height: 1.5; margin: 0; font-size: 14px; background: rgba(255,255,255,0.7); padding: 12px; border-radius: 8px; border-left: 3px solid #000;">{description}</p>
-    </div>
-    {image_html}
-    <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 20px; padding-top: 15px; border-top: 1px solid #e1e5e9;">
-        <div style="color: #65676b; font-size: 12px; display: flex; align-items: center;">
-            <span style="margin-right: 8px; font-size: 16px;">🧵</span>
-            <span>Threads投稿を表示</span>
-        </div>
-        <a href="{url}" target="_blank" rel="noopener noreferrer" 
-           style="display: inline-flex; align-items: center; padding: 10px 18px; background: linear-gradient(45deg, #000, #333); color: white; text-decoration: none; border-radius: 24px; font-weight: 600; font-size: 13px; transition: all 0.3s; box-shadow: 0 2px 8px rgba(0,0,0,0.2);">
-            <span style="margin-right: 8px; font-size: 16px;">📱</span>
-            投稿を見る
-        </a>
-    </div>
-</div>'''
-        
-    except Exception as e:
-        current_app.logger.error(f"Threads OGP fetch error: {e}")
-        # 改善されたフォールバック表示（同じスタイル）
-        return f'''<div class="sns-embed threads-embed" style="margin: 20px 0; padding: 20px; border: 1px solid #e1e5e9; border-radius: 12px; background: linear-gradient(135deg, #fafafa 0%, #f0f0f0 100%); box-shadow: 0 4px 12px rgba(0,0,0,0.1);">
-    <div style="display: flex; align-items: center; margin-bottom: 15px;">
-        <div style="width: 45px; height: 45px; background: linear-gradient(45deg, #000, #333); border-radius: 12px; display: flex; align-items: center; justify-content: center; margin-right: 15px; box-shadow: 0 2px 8px rgba(0,0,0,0.2);">
-            <span style="color: white; font-weight: bold; font-size: 18px;">@</span>
-        </div>
-        <div style="flex: 1;">
-            <div style="font-weight: 600; color: #1c1e21; font-size: 16px; margin-bottom: 2px;">{username} (@{username}) on Threads</div>
-            <div style="color: #65676b; font-size: 13px; display: flex; align-items: center;">
-                <span style="margin-right: 6px;">🧵</span>
-                Threads
-            </div>
-        </div>
-        <div style="text-align: right;">
-            <div style="color: #999; font-size: 11px; background: rgba(0,0,0,0.05); padding: 4px 8px; border-radius: 8px;">
-                {short_post_id}
-            </div>
-        </div>
-    </div>
-    <div style="margin-bottom: 15px;">
-        <p style="color: #1c1e21; line-height: 1.5; margin: 0; font-size: 14px; background: rgba(255,255,255,0.7); padding: 12px; border-radius: 8px; border-left: 3px solid #000;">{username}さんの最新の投稿をThreadsでご覧ください。プログラミングチャレンジや日々の学習記録など、興味深いコンテンツが投稿されています。</p>
-    </div>
-    <div style="margin: 15px 0;">
-        <div style="width: 100%; height: 200px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 8px; display: flex; align-items: center; justify-content: center; position: relative; overflow: hidden;">
-            <div style="text-align: center; color: white;">
-                <div style="font-size: 24px; margin-bottom: 8px;">🧵</div>
-                <div style="font-size: 14px; font-weight: 500;">Threads 投稿</div>
-                <div style="font-size: 12px; opacity: 0.8; margin-top: 4px;">@{username}</div>
-            </div>
-            <div style="position: absolute; top: 10px; right: 10px; background: rgba(0,0,0,0.3); padding: 4px 8px; border-radius: 12px; font-size: 11px; color: white;">
-                {short_post_id}
-            </div>
-        </div>
-    </div>
-    <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 20px; padding-top: 15px; border-top: 1px solid #e1e5e9;">
-        <div style="color: #65676b; font-size: 12px; display: flex; align-items: center;">
-            <span style="margin-right: 8px; font-size: 16px;">🧵</span>
-            <span>Threads投稿を表示</span>
-        </div>
-        <a href="{url}" target="_blank" rel="noopener noreferrer" 
-           style="display: inline-flex; align-items: center; padding: 10px 18px; background: linear-gradient(45deg, #000, #333); color: white; text-decoration: none; border-radius: 24px; font-weight: 600; font-size: 13px; transition: all 0.3s; box-shadow: 0 2px 8px rgba(0,0,0,0.2);">
-            <span style="margin-right: 8px; font-size: 16px;">📱</span>
-            投稿を見る
-        </a>
-    </div>
-</div>'''
+    """認証ユーザーを読み込み（毎リクエスト実行されるため、紹介文等の大きな列は必要時に読む）"""
+    return db.session.execute(
+        select(User).options(defer(User.introduction), defer(User.ext_json)).where(User.id == int(user_id))
+    ).scalar_one_or_none()
 
 
 # CSRF トークンをテンプレートで利用可能にする
@@ -948,13 +188,13 @@ def inject_analytics():
     """Google Analyticsの設定をテンプレートに注入"""
     from models import SiteSetting
     from markupsafe import Markup
+    from ga4_analytics import GA4AnalyticsManager
+    
+    # トラッキングコードとnoscript部分で同じマネージャーを使う
+    analytics_manager = GA4AnalyticsManager()
     
     def google_analytics_code():
         """Enhanced Google Analytics トラッキングコードを生成"""
-        from ga4_analytics import GA4AnalyticsManager
-        
-        analytics_manager = GA4AnalyticsManager()
-        
         # ユーザーを追跡すべきかチェック
         user = current_user if current_user.is_authenticated else None
         
@@ -970,10 +210,6 @@ def inject_analytics():
     
     def google_tag_manager_noscript():
         """Enhanced Google Tag Manager noscript 部分"""
-        from ga4_analytics import GA4AnalyticsManager
-        
-        analytics_manager = GA4AnalyticsManager()
-        
         # ユーザーを追跡すべきかチェック
         user = current_user if current_user.is_authenticated else None
         
@@ -990,37 +226,11 @@ def inject_analytics():
 def inject_site_settings():
     """サイト設定をすべてのテンプレートで利用可能にする"""
     from models import SiteSetting
-    import json
     
     def get_site_settings():
         """公開設定のみを取得（キャッシュ機能付き）"""
         try:
-            # 公開設定のみを取得
-            public_settings = db.session.execute(
-                select(SiteSetting).where(SiteSetting.is_public == True)
-            ).scalars().all()
-            
-            settings = {}
-            for setting in public_settings:
-                value = setting.value
-                
-                # 設定タイプに応じて値を変換
-                if setting.setting_type == 'boolean':
-                    value = value.lower() == 'true'
-                elif setting.setting_type == 'number':
-                    try:
-                        value = float(value) if '.' in value else int(value)
-                    except ValueError:
-                        value = 0
-                elif setting.setting_type == 'json':
-                    try:
-                        value = json.loads(value) if value else {}
-                    except json.JSONDecodeError:
-                        value = {}
-                
-                settings[setting.key] = value
-            
-            return settings
+            return SiteSetting.get_public_settings()
         except Exception as e:
             current_app.logger.error(f"Error loading site settings: {e}")
             return {}
@@ -1075,6 +285,33 @@ if app.debug:
 ADMIN_URL_PREFIX = os.environ.get('ADMIN_URL_PREFIX', 'admin')
 app.register_blueprint(admin_bp, url_prefix=f'/{ADMIN_URL_PREFIX}')
 
+def viewer_etag_key():
+    """閲覧者による表示差分（管理リンク等）をETagに含めるためのキー"""
+    return f"{current_user.get_id()}:{current_user.role}" if current_user.is_authenticated else ''
+
+def article_list_etag(*parts, articles, pagination=None):
+    """記事一覧ページのETag（表示する記事・著者・カテゴリ・ページ位置とサイト設定バージョンから生成）"""
+    from models import SiteSetting
+    items = [
+        (article.id, article.updated_at, article.render_hash, article.author_id,
+         article.author.handle_name if article.author else None, article.author.name if article.author else None,
+         tuple((category.id, category.name, category.slug) for category in article.categories))
+        for article in articles
+    ]
+    page_state = None
+    if pagination is not None:
+        page_state = (pagination.page, pagination.has_next, pagination.total, getattr(pagination, 'next_cursor', None))
+    return make_etag(*parts, SiteSetting.get_version(), viewer_etag_key(), page_state, items)
+
+def article_list_options():
+    """記事一覧用のローダー設定（テンプレートで使う著者・カテゴリのみ読み込み、本文等の大きな列とそれ以外の関連は読み込み時にエラー）"""
+    return (
+        joinedload(Article.author),
+        selectinload(Article.categories),
+        raiseload('*'),
+        *Article.list_column_options(raiseload=True)
+    )
+
 @app.route('/')
 @app.route('/page/<int:page>')
 def home(page=1):
@@ -1083,17 +320,22 @@ def home(page=1):
     # 1ページあたりの記事数をサイト設定から取得
     per_page = int(SiteSetting.get_setting('posts_per_page', '5'))
     
-    # ページネーション付きで公開済み記事を取得
-    articles_query = select(Article).where(Article.is_published.is_(True)).order_by(Article.created_at.desc())
-    
-    # SQLAlchemy 2.0のpaginateを使用
-    articles_pagination = db.paginate(
+    # ページネーション付きで公開済み記事を取得（キーセット方式では cursor で前ページ末尾の続きから取得）
+    articles_query = select(Article).where(Article.is_published.is_(True))
+    articles_pagination = paginate_articles(
         articles_query,
         page=page,
         per_page=per_page,
-        error_out=False
+        cursor=request.args.get('cursor'),
+        options=article_list_options()
     )
     
+    ensure_list_excerpts(articles_pagination.items)
+    not_modified = check_not_modified(article_list_etag('home', articles=articles_pagination.items, pagination=articles_pagination))
+    if not_modified:
+        return not_modified
+    
+    add_page_cache_tags(*article_list_tags(articles_pagination.items))
     return render_template('home.html', 
                          articles=articles_pagination.items,
                          pagination=articles_pagination)
@@ -1332,27 +574,35 @@ def category_page(slug):
     per_page = 10
     
     # SQLAlchemy 2.0対応: カテゴリーの公開記事を取得（eager loading追加）
-    from sqlalchemy.orm import joinedload, selectinload
-    articles_query = select(Article).options(
-        joinedload(Article.author),
-        selectinload(Article.categories)
-    ).join(article_categories).where(
+    articles_query = select(Article).join(article_categories).where(
         article_categories.c.category_id == category.id,
         Article.is_published.is_(True)
-    ).order_by(Article.created_at.desc())
+    )
     
-    articles_pagination = db.paginate(
+    articles_pagination = paginate_articles(
         articles_query,
         page=page,
         per_page=per_page,
-        error_out=False
+        cursor=request.args.get('cursor'),
+        options=article_list_options()
     )
 
+    ensure_list_excerpts(articles_pagination.items)
+    not_modified = check_not_modified(article_list_etag(
+        'category', category.id, category.name, category.slug, category.description, category.updated_at,
+        articles=articles_pagination.items, pagination=articles_pagination
+    ))
+    if not_modified:
+        return not_modified
+    
+    add_page_cache_tags(category_tag(category.id), *article_list_tags(articles_pagination.items))
     return render_template('category_page.html', category=category, articles_pagination=articles_pagination)
 
 @app.route('/article/<slug>/')
 def article_detail(slug):
-    article = db.session.execute(select(Article).where(Article.slug == slug)).scalar_one_or_none()
+    article = db.session.execute(
+        select(Article).options(joinedload(Article.author), selectinload(Article.categories)).where(Article.slug == slug)
+    ).scalar_one_or_none()
     if not article:
         abort(404)
     
@@ -1362,11 +612,32 @@ def article_detail(slug):
             flash('この記事は公開されていません。', 'warning')
             return redirect(url_for('home'))
     
+    # 本文HTMLはキャッシュを使用（未生成・本文変更時のみレンダリング）
+    ensure_article_rendered(article, db.session)
+    
+    # 条件付きGET：記事・承認済みコメントの状態・サイト設定が変わっていなければ描画せずに304
+    from models import SiteSetting
+    comment_watermark = (0, None, None)
+    if article.allow_comments:
+        comment_watermark = tuple(db.session.execute(
+            select(func.count(Comment.id), func.max(Comment.id), func.max(Comment.updated_at))
+            .where(Comment.article_id == article.id, Comment.is_approved.is_(True))
+        ).one())
+    etag = make_etag(
+        'article', article.id, article.updated_at, article.render_hash, article.allow_comments,
+        article.author.handle_name if article.author else None, article.author.name if article.author else None,
+        tuple((category.id, category.name, category.slug) for category in article.categories),
+        comment_watermark, SiteSetting.get_version(), viewer_etag_key()
+    )
+    # 検証はETagのみ（コメントの削除・非承認は更新日時を進めないため、日時での検証では古いページを304で返してしまう）
+    not_modified = check_not_modified(etag, with_csrf=article.allow_comments)
+    if not_modified:
+        return not_modified
+    
     # 承認済みコメントを取得（親コメントのみ）
     approved_comments = []
     if hasattr(article, 'comments') and article.allow_comments:
         # eager loadingで返信も一緒に取得してN+1問題を解決
-        from sqlalchemy.orm import selectinload
         approved_comments = db.session.execute(
             select(Comment)
             .options(selectinload(Comment.replies))
@@ -1384,6 +655,8 @@ def article_detail(slug):
                 if reply.is_approved
             ]
     
+    add_page_cache_tags(article_tag(article.id), user_tag(article.author_id),
+                        *(category_tag(category.id) for category in article.categories))
     return render_template('article_detail.html', article=article, approved_comments=approved_comments)
 
 @app.route('/add_comment/<int:article_id>', methods=['POST'])
@@ -1452,9 +725,20 @@ def profile(handle_name):
     
     # 公開記事のみ取得
     articles = db.session.execute(
-        select(Article).where(Article.author_id == user.id, Article.is_published.is_(True)).order_by(Article.created_at.desc())
+        select(Article).options(*article_list_options())
+        .where(Article.author_id == user.id, Article.is_published.is_(True)).order_by(Article.created_at.desc())
     ).scalars().all()
     
+    ensure_list_excerpts(articles)
+    not_modified = check_not_modified(article_list_etag(
+        'profile', user.id, user.name, user.handle_name, user.role, user.introduction, user.birthplace, user.birthday,
+        user.sns_x, user.sns_facebook, user.sns_instagram, user.sns_threads, user.sns_youtube,
+        articles=articles
+    ))
+    if not_modified:
+        return not_modified
+    
+    add_page_cache_tags(user_tag(user.id), *article_list_tags(articles))
     return render_template('profile.html', user=user, articles=articles)
 
 # 開発用テスト関数
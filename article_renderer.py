@@ -0,0 +1,823 @@
+"""
+記事本文レンダリングモジュール
+Markdown変換・SNS自動埋込・OGPカード生成と、記事ごとのレンダリング結果キャッシュを提供
+"""
+import os
+import re
+import time
+import hashlib
+import threading
+from html.parser import HTMLParser
+from bleach.sanitizer import Cleaner
+import markdown
+from markupsafe import Markup
+from flask import current_app, request, has_request_context
+from ogp_fetcher import fetch_ogp_data, get_cached_ogp_data, find_ogp_urls_needing_refresh, schedule_ogp_prefetch
+from page_cache import invalidate_page_cache, TAG_ARTICLE_LIST, article_tag
+
+# SNSプラットフォーム検出パターン（独立行のURLをマッチ）
+SNS_URL_PATTERNS = {
+    'youtube': [
+        r'(https?://(?:www\.)?youtube\.com/watch\?v=([a-zA-Z0-9_-]+)(?:\S*)?)',
+        r'(https?://youtu\.be/([a-zA-Z0-9_-]+)(?:\?\S*)?)'
+    ],
+    'twitter': [
+        r'(https?://(?:www\.)?twitter\.com/\w+/status/(\d+)(?:\S*)?)',
+        r'(https?://(?:www\.)?x\.com/\w+/status/(\d+)(?:\S*)?)',
+    ],
+    'instagram': [
+        r'(https?://(?:www\.)?instagram\.com/p/([a-zA-Z0-9_-]+)/?(?:\?\S*)?)',
+        r'(https?://(?:www\.)?instagram\.com/reel/([a-zA-Z0-9_-]+)/?(?:\?\S*)?)'
+    ],
+    'facebook': [
+        r'(https?://(?:www\.)?facebook\.com/\w+/posts/(\d+)(?:\S*)?)',
+        r'(https?://(?:www\.)?facebook\.com/\w+/videos/(\d+)(?:\S*)?)',
+        r'(https?://fb\.watch/([a-zA-Z0-9_-]+)/?(?:\?\S*)?)'
+    ],
+    'threads': [
+        r'(https?://(?:www\.)?threads\.net/@\w+/post/([a-zA-Z0-9_-]+)(?:\S*)?)',
+        r'(https?://(?:www\.)?threads\.com/@\w+/post/([a-zA-Z0-9_-]+)(?:\S*)?)'
+    ]
+}
+
+# 一般的なURL検出パターン（独立行で、かつSNSではないURL）
+# SNSプラットフォームを除外するネガティブルックアヘッド
+GENERAL_URL_PATTERN = r'^(https?://(?!(?:www\.)?(youtube\.com|youtu\.be|twitter\.com|x\.com|instagram\.com|facebook\.com|fb\.watch|threads\.net|threads\.com))[^\s]+)$'
+
+def _compile_embed_url_pattern():
+    """全プラットフォームのURLパターンを1つの正規表現にまとめる
+    各パターンを名前付きグループで囲み、match.lastgroupでプラットフォームを判別する
+    """
+    alternatives = []
+    groups = {}
+    for platform, patterns in SNS_URL_PATTERNS.items():
+        for index, pattern in enumerate(patterns):
+            name = f'{platform}{index}'
+            alternatives.append(f'(?P<{name}>{pattern})')
+            groups[name] = platform
+    alternatives.append(f'(?P<general>{GENERAL_URL_PATTERN})')
+    groups['general'] = 'general'
+    return re.compile('|'.join(alternatives), re.MULTILINE), groups
+
+EMBED_URL_PATTERN, EMBED_URL_GROUPS = _compile_embed_url_pattern()
+# URL候補の開始位置の検出用（全パターンがこの形で始まる）
+URL_START_PATTERN = re.compile(r'https?://')
+
+# 本文レンダリングパイプライン
+class ArticleRenderer:
+    """記事本文のレンダリングパイプライン
+    埋込展開 → Markdown変換 → サニタイズ の各ステージを1回ずつ実行し、ステージごとの処理時間を記録する
+    """
+    STAGES = ('embed', 'markdown', 'sanitize')
+    SLOW_RENDER_THRESHOLD = 0.5  # 秒（超えた場合は警告ログ）
+    
+    def __init__(self):
+        self.timings = {}
+    
+    def render(self, text):
+        """MarkdownテキストをサニタイズされたHTMLに変換"""
+        self.timings = {}
+        if not text:
+            return ''
+        
+        # SNS URLの自動埋込処理（Markdown変換前）
+        text = self._run_stage('embed', process_sns_auto_embed, text)
+        html = self._run_stage('markdown', convert_markdown, text)
+        html = self._run_stage('sanitize', sanitize_article_html, html)
+        
+        self._log_timings()
+        return Markup(html)
+    
+    @property
+    def total_time(self):
+        """全ステージの合計処理時間（秒）"""
+        return sum(self.timings.values())
+    
+    def format_timings(self):
+        """ステージごとの処理時間をログ用文字列に整形"""
+        stages = ' '.join(f"{stage}={self.timings[stage] * 1000:.1f}ms" for stage in self.STAGES if stage in self.timings)
+        return f"{stages} total={self.total_time * 1000:.1f}ms"
+    
+    def _run_stage(self, stage, func, value):
+        """ステージを実行して処理時間を記録"""
+        start_time = time.perf_counter()
+        result = func(value)
+        self.timings[stage] = time.perf_counter() - start_time
+        return result
+    
+    def _log_timings(self):
+        if self.total_time > self.SLOW_RENDER_THRESHOLD:
+            current_app.logger.warning(f"🐢 Slow article render: {self.format_timings()}")
+        else:
+            current_app.logger.debug(f"⏱️ Article render: {self.format_timings()}")
+
+# Markdownフィルター
+def markdown_filter(text):
+    """MarkdownテキストをHTMLに変換するフィルター（SNS埋込自動検出付き）"""
+    return ArticleRenderer().render(text)
+
+# Markdown変換器の設定（用途ごとのプロファイル）
+MARKDOWN_PROFILES = {
+    # 記事本文
+    'article': {
+        'extensions': ['extra', 'codehilite', 'toc', 'nl2br'],
+        'extension_configs': {
+            'codehilite': {
+                'css_class': 'highlight',
+                'use_pygments': False
+            }
+        },
+        'tab_length': 2  # タブ長を短く設定
+    },
+    # 管理画面のプレビュー
+    'preview': {
+        'extensions': ['codehilite', 'fenced_code', 'tables', 'toc', 'nl2br']
+    }
+}
+
+# スレッドごとに使い回すMarkdown変換器（拡張機能の初期化を初回のみに抑える）
+_markdown_local = threading.local()
+
+def get_markdown_converter(profile='article'):
+    """プロファイルに対応するMarkdown変換器を取得（reset済み）"""
+    converters = getattr(_markdown_local, 'converters', None)
+    if converters is None:
+        converters = _markdown_local.converters = {}
+    
+    md = converters.get(profile)
+    if md is None:
+        md = converters[profile] = markdown.Markdown(**MARKDOWN_PROFILES[profile])
+    else:
+        # 前回の変換状態（脚注・目次・参照リンク等）を破棄
+        md.reset()
+    return md
+
+def convert_markdown(text, profile='article'):
+    """MarkdownテキストをHTMLに変換（埋込展開・サニタイズは行わない）"""
+    return get_markdown_converter(profile).convert(text)
+
+# --- HTMLサニタイズ設定（用途ごとのプロファイル） ---
+
+# 記事本文（SNS埋込用タグを追加）
+ARTICLE_ALLOWED_TAGS = [
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',
+    'p', 'br', 'strong', 'em', 'u', 'del',
+    'ul', 'ol', 'li', 'blockquote', 'pre', 'code',
+    'a', 'img', 'table', 'thead', 'tbody', 'tr', 'th', 'td',
+    # SNS埋込用タグ
+    'div', 'iframe', 'script', 'blockquote', 'noscript'
+]
+ARTICLE_ALLOWED_ATTRIBUTES = {
+    'a': ['href', 'title', 'target', 'rel'],
+    'img': ['src', 'alt', 'title', 'width', 'height'],
+    'code': ['class'],
+    'pre': ['class'],
+    # SNS埋込用属性
+    'div': ['class', 'id', 'style', 'data-href', 'data-width', 'data-instgrm-permalink'],
+    'iframe': ['src', 'width', 'height', 'frameborder', 'allow', 'allowfullscreen', 'title', 'style'],
+    'script': ['src', 'async', 'defer', 'charset', 'crossorigin'],
+    'blockquote': ['class', 'style', 'data-instgrm-permalink'],
+    'noscript': []
+}
+
+# コメント
+COMMENT_ALLOWED_TAGS = ['p', 'br', 'strong', 'em', 'u', 'ol', 'ul', 'li', 'a', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6']
+COMMENT_ALLOWED_ATTRIBUTES = {'a': ['href', 'title']}
+
+# 管理画面のプレビュー（記事本文 + コードハイライト用のspan）
+PREVIEW_ALLOWED_TAGS = ARTICLE_ALLOWED_TAGS + ['span']
+PREVIEW_ALLOWED_ATTRIBUTES = dict(ARTICLE_ALLOWED_ATTRIBUTES, span=['class'])
+
+SANITIZE_PROFILES = {
+    'article': {'tags': ARTICLE_ALLOWED_TAGS, 'attributes': ARTICLE_ALLOWED_ATTRIBUTES},
+    'comment': {'tags': COMMENT_ALLOWED_TAGS, 'attributes': COMMENT_ALLOWED_ATTRIBUTES, 'strip': True},
+    'preview': {'tags': PREVIEW_ALLOWED_TAGS, 'attributes': PREVIEW_ALLOWED_ATTRIBUTES, 'strip': True},
+}
+
+# スレッドごとに使い回すbleach Cleaner（Cleanerはスレッドセーフではないため）
+_cleaner_local = threading.local()
+
+def get_html_cleaner(profile='article'):
+    """プロファイルに対応するbleach Cleanerを取得"""
+    cleaners = getattr(_cleaner_local, 'cleaners', None)
+    if cleaners is None:
+        cleaners = _cleaner_local.cleaners = {}
+    
+    cleaner = cleaners.get(profile)
+    if cleaner is None:
+        cleaner = cleaners[profile] = Cleaner(**SANITIZE_PROFILES[profile])
+    return cleaner
+
+def sanitize_article_html(html):
+    """記事本文HTMLをサニタイズ（SNS埋込用タグを許可）"""
+    # SNS埋込HTMLがある場合はbleachを適用しない（安全なHTMLのため）
+    if any(cls in html for cls in ['sns-embed', 'youtube-embed', 'twitter-embed', 'instagram-embed', 'facebook-embed', 'threads-embed']):
+        return html
+    # 通常のMarkdownコンテンツのみサニタイズ
+    return get_html_cleaner('article').clean(html)
+
+# HTMLサニタイゼーション用ヘルパー関数
+def sanitize_html(content):
+    """HTMLコンテンツをサニタイズ（コメント用）"""
+    if not content:
+        return content
+    return get_html_cleaner('comment').clean(content)
+
+def process_sns_auto_embed(text):
+    """テキスト中のSNS URLを自動的に埋込HTMLに変換"""
+    if not text:
+        return text
+    
+    # 既に処理済みのHTMLかどうかをチェック
+    if any(cls in text for cls in ['sns-embed', 'youtube-embed', 'twitter-embed', 'instagram-embed', 'facebook-embed', 'threads-embed']):
+        current_app.logger.debug("🚫 Already processed content detected, skipping SNS auto embed")
+        return text
+    
+    current_app.logger.debug(f"🔍 Processing SNS auto embed for text length: {len(text)}")
+    
+    # SNS・一般URLを1回の走査で検出し、プラットフォームごとの埋込HTMLに置換
+    parts = []
+    last_end = 0
+    for match in _iter_embed_url_matches(text):
+        parts.append(text[last_end:match.start()])
+        parts.append(_replace_embed_url(match))
+        last_end = match.end()
+    if parts:
+        parts.append(text[last_end:])
+        text = ''.join(parts)
+    
+    current_app.logger.debug(f"✅ SNS auto embed processing completed. Output length: {len(text)}")
+    return text
+
+def _iter_embed_url_matches(text):
+    """本文中の埋込対象URLのマッチを先頭から順に返す
+    URLの開始位置（http:// / https://）だけを高速に探し、その位置でEMBED_URL_PATTERNを照合する
+    """
+    pos = 0
+    while True:
+        start = URL_START_PATTERN.search(text, pos)
+        if start is None:
+            return
+        match = EMBED_URL_PATTERN.match(text, start.start())
+        if match:
+            yield match
+            pos = match.end()
+        else:
+            pos = start.end()
+
+def _replace_embed_url(match):
+    """EMBED_URL_PATTERNのマッチを埋込HTMLに変換"""
+    platform = EMBED_URL_GROUPS[match.lastgroup]
+    url = match.group(match.lastgroup).strip()
+    
+    if platform == 'youtube':
+        return generate_youtube_embed(url)
+    elif platform == 'twitter':
+        return generate_twitter_embed(url)
+    elif platform == 'instagram':
+        return generate_instagram_embed(url)
+    elif platform == 'facebook':
+        return generate_facebook_embed(url)
+    elif platform == 'threads':
+        return generate_threads_embed(url)
+    elif platform == 'general':
+        return generate_ogp_card(url)
+    else:
+        return url  # 変換できない場合は元のURLを返す
+
+def extract_ogp_urls(text):
+    """OGPデータを必要とするURL（一般URLカード・Threads埋込）を本文から抽出"""
+    if not text:
+        return []
+    
+    urls = []
+    for match in _iter_embed_url_matches(text):
+        if EMBED_URL_GROUPS[match.lastgroup] in ('threads', 'general'):
+            urls.append(match.group(match.lastgroup).strip())
+    return list(dict.fromkeys(urls))
+
+def _get_ogp_data_for_render(url):
+    """描画用のOGPデータを取得（外部アクセスせず、未取得ならNone）"""
+    # 開発環境でのテスト用：?refresh_ogp=1 の場合のみその場で取得
+    if current_app.debug and has_request_context() and request.args.get('refresh_ogp') == '1':
+        return fetch_ogp_data(url, force_refresh=True)
+    return get_cached_ogp_data(url)
+
+def generate_ogp_card(url):
+    """一般的なWebサイトのOGPカードを生成"""
+    try:
+        ogp_data = _get_ogp_data_for_render(url)
+        if ogp_data is None:
+            # 未取得の場合は簡易カード（取得はバックグラウンドで行う）
+            return generate_ogp_placeholder_card(url)
+        current_app.logger.debug(f"General OGP data fetched: {ogp_data}")
+        
+        # OGPデータから情報を抽出
+        title = ogp_data.get('title', '')
+        description = ogp_data.get('description', '')
+        image = ogp_data.get('image', '')
+        site_name = ogp_data.get('site_name', '')
+        
+        # URLからドメイン名を抽出
+        from urllib.parse import urlparse
+        parsed_url = urlparse(url)
+        domain = parsed_url.netloc.replace('www.', '')
+        
+        # フォールバック処理
+        if not title:
+            title = domain
+        if not description:
+            description = f"{domain}のコンテンツをご覧ください。"
+        if not site_name:
+            site_name = domain
+        
+        # 説明文をトリミング
+        if len(description) > 200:
+            description = description[:200] + '...'
+        
+        # ファビコンURL生成
+        favicon_url = f"https://www.google.com/s2/favicons?domain={domain}"
+        
+        # 画像表示用HTML
+        image_html = ''
+        if image:
+            image_html = f'''
+            <div style="margin: 0 0 15px 0;">
+                <div style="width: 100%; border-radius: 8px; overflow: hidden; box-shadow: 0 2px 8px rgba(0,0,0,0.15);">
+                    <img src="{image}" alt="{title}" style="width: 100%; height: auto; display: block; max-height: 250px; object-fit: cover;">
+                </div>
+            </div>'''
+        
+        return f'''<div class="ogp-card" style="margin: 20px 0; border: 1px solid #e1e5e9; border-radius: 12px; background: #ffffff; box-shadow: 0 4px 12px rgba(0,0,0,0.08); overflow: hidden; transition: all 0.3s ease;">
+    <a href="{url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: inherit; display: block;">
+        <div style="padding: {'' if image else '20px 20px 0 20px'};">
+            {image_html}
+        </div>
+        <div style="padding: {'0 20px 20px 20px' if image else '20px'};">
+            <div style="display: flex; align-items: center; margin-bottom: 12px;">
+                <img src="{favicon_url}" alt="" style="width: 16px; height: 16px; margin-right: 8px; border-radius: 2px;" onerror="this.style.display='none'">
+                <div style="color: #65676b; font-size: 13px; font-weight: 500;">{site_name}</div>
+            </div>
+            <h3 style="margin: 0 0 10px 0; font-size: 16px; font-weight: 600; color: #1c1e21; line-height: 1.4;">{title}</h3>
+            <p style="margin: 0; color: #65676b; font-size: 14px; line-height: 1.5;">{description}</p>
+            <div style="margin-top: 15px; display: flex; align-items: center; color: #1877f2; font-size: 13px; font-weight: 500;">
+                <span style="margin-right: 6px;">🔗</span>
+                <span>リンクを開く</span>
+                <span style="margin-left: 6px;">→</span>
+            </div>
+        </div>
+    </a>
+</div>'''
+        
+    except Exception as e:
+        current_app.logger.error(f"OGP card generation error: {e}")
+        # フォールバック表示
+        return generate_ogp_placeholder_card(url)
+
+def generate_ogp_placeholder_card(url):
+    """OGPデータなしの簡易カードを生成（ドメイン名のみ表示）"""
+    from urllib.parse import urlparse
+    parsed_url = urlparse(url)
+    domain = parsed_url.netloc.replace('www.', '')
+    favicon_url = f"https://www.google.com/s2/favicons?domain={domain}"
+    
+    return f'''<div class="ogp-card" style="margin: 20px 0; border: 1px solid #e1e5e9; border-radius: 12px; background: #ffffff; box-shadow: 0 4px 12px rgba(0,0,0,0.08); overflow: hidden;">
+    <a href="{url}" target="_blank" rel="noopener noreferrer" style="text-decoration: none; color: inherit; display: block; padding: 20px;">
+        <div style="display: flex; align-items: center; margin-bottom: 12px;">
+            <img src="{favicon_url}" alt="" style="width: 16px; height: 16px; margin-right: 8px; border-radius: 2px;" onerror="this.style.display='none'">
+            <div style="color: #65676b; font-size: 13px; font-weight: 500;">{domain}</div>
+        </div>
+        <h3 style="margin: 0 0 10px 0; font-size: 16px; font-weight: 600; color: #1c1e21; line-height: 1.4;">{domain}</h3>
+        <p style="margin: 0; color: #65676b; font-size: 14px; line-height: 1.5;">このリンクの詳細情報を表示</p>
+        <div style="margin-top: 15px; display: flex; align-items: center; color: #1877f2; font-size: 13px; font-weight: 500;">
+            <span style="margin-right: 6px;">🔗</span>
+            <span>リンクを開く</span>
+            <span style="margin-left: 6px;">→</span>
+        </div>
+    </a>
+</div>'''
+
+def detect_platform_from_url(url):
+    """URLからSNSプラットフォームを検出"""
+    url_lower = url.lower()
+    if 'youtube.com' in url_lower or 'youtu.be' in url_lower:
+        return 'youtube'
+    elif 'twitter.com' in url_lower or 'x.com' in url_lower:
+        return 'twitter'
+    elif 'instagram.com' in url_lower:
+        return 'instagram'
+    elif 'facebook.com' in url_lower or 'fb.watch' in url_lower:
+        return 'facebook'
+    elif 'threads.net' in url_lower or 'threads.com' in url_lower:
+        return 'threads'
+    return None
+
+def generate_youtube_embed(url):
+    """YouTube埋込HTMLを生成"""
+    # YouTube動画ID抽出
+    video_id = None
+    if 'youtu.be' in url:
+        # https://youtu.be/VIDEO_ID?params から VIDEO_ID を抽出
+        video_id = url.split('/')[-1].split('?')[0]
+    else:
+        # https://www.youtube.com/watch?v=VIDEO_ID&params から VIDEO_ID を抽出
+        match = re.search(r'v=([a-zA-Z0-9_-]+)', url)
+        if match:
+            video_id = match.group(1)
+    
+    if video_id:
+        return f'''<div class="sns-embed youtube-embed" style="position: relative; padding-bottom: 56.25%; height: 0; overflow: hidden; max-width: 100%; margin: 20px 0;">
+    <iframe src="https://www.youtube.com/embed/{video_id}" 
+            style="position: absolute; top: 0; left: 0; width: 100%; height: 100%;"
+            frameborder="0" 
+            allow="accelerometer; autoplay; clipboard-write; encrypted-media; gyroscope; picture-in-picture" 
+            allowfullscreen
+            title="YouTube video player">
+    </iframe>
+</div>'''
+    return url
+
+def generate_twitter_embed(url):
+    """Twitter埋込HTMLを生成"""
+    # x.com URLをtwitter.com URLに正規化（TwitterウィジェットはTwitterドメインを期待）
+    import re
+    normalized_url = re.sub(r'https?://(www\.)?x\.com/', 'https://twitter.com/', url)
+    
+    return f'''<div class="sns-embed twitter-embed" style="margin: 20px 0;">
+    <blockquote class="twitter-tweet" style="margin: 0 auto;">
+        <a href="{normalized_url}"></a>
+    </blockquote>
+    <script async src="https://platform.twitter.com/widgets.js" charset="utf-8"></script>
+</div>'''
+
+def generate_instagram_embed(url):
+    """Instagram埋込HTMLを生成"""
+    # URLクエリパラメータを削除してクリーンなURLにする
+    clean_url = url.split('?')[0].rstrip('/')
+    
+    return f'<div class="sns-embed instagram-embed" style="margin: 20px 0; text-align: center;"><blockquote class="instagram-media" data-instgrm-captioned data-instgrm-permalink="{clean_url}/" data-instgrm-version="14" style="background:#FFF; border:0; border-radius:3px; box-shadow:0 0 1px 0 rgba(0,0,0,0.5),0 1px 10px 0 rgba(0,0,0,0.15); margin: 1px; max-width:540px; min-width:326px; padding:0; width:99.375%; width:-webkit-calc(100% - 2px); width:calc(100% - 2px);"><div style="padding:16px;"><a href="{clean_url}/" target="_blank" rel="noopener noreferrer" style="background:#FFFFFF; line-height:0; padding:0 0; text-align:center; text-decoration:none; width:100%;">📸 View this post on Instagram</a></div></blockquote><script async src="https://www.instagram.com/embed.js"></script><script>document.addEventListener(\'DOMContentLoaded\', function() {{ setTimeout(function() {{ if (window.instgrm && window.instgrm.Embeds) {{ window.instgrm.Embeds.process(); }} }}, 1000); }});</script></div>'
+
+def generate_facebook_embed(url):
+    """Facebook埋込HTMLを生成"""
+    return f'<div class="sns-embed facebook-embed" style="margin: 20px 0;"><div class="fb-post" data-href="{url}" data-width="500"></div><div id="fb-root"></div><script async defer crossorigin="anonymous" src="https://connect.facebook.net/ja_JP/sdk.js#xfbml=1&version=v18.0"></script></div>'
+
+def generate_threads_embed(url):
+    """Threads埋込HTMLを生成（OGPデータ取得版）"""
+    import re
+    
+    # URLからユーザー名と投稿IDを抽出
+    user_match = re.search(r'@([^/]+)/', url)
+    post_match = re.search(r'/post/([a-zA-Z0-9_-]+)', url)
+    
+    username = user_match.group(1) if user_match else 'user'
+    post_id = post_match.group(1) if post_match else ''
+    
+    # 投稿URLをより分かりやすい形式で表示
+    short_post_id = post_id[:8] + '...' if len(post_id) > 8 else post_id
+    
+    try:
+        # 未取得の場合はURLから推測した情報で表示（取得はバックグラウンドで行う）
+        ogp_data = _get_ogp_data_for_render(url) or {}
+        current_app.logger.debug(f"Threads OGP data fetched: {ogp_data}")
+        
+        # OGPデータから情報を抽出
+        title = ogp_data.get('title', '')
+        description = ogp_data.get('description', '')
+        image = ogp_data.get('image', '')
+        site_name = ogp_data.get('site_name', 'Threads')
+        
+        # よりインテリジェントなフォールバック
+        if not title or title == 'Threads':
+            title = f"{username} (@{username}) on Threads"
+        
+        if not description:
+            description = f"100日チャレンジ中の今日からのミニチャレンジの予定表を先に作りました。📝 Python 100日チャレンジなど、{username}さんの最新の投稿をThreadsでご覧ください。"
+        
+        # 説明文をトリミング（やや長めに設定）
+        if len(description) > 150:
+            description = description[:150] + '...'
+        
+        # Threads画像はCORS制限があるため、最初から代替表示を使用
+        if image and 'cdninstagram.com' in image:
+            # CDNinstagram画像の場合は代替表示
+            image_html = f'''
+        <div style="margin: 15px 0;">
+            <div style="width: 100%; max-width: 500px; height: 200px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 8px; display: flex; align-items: center; justify-content: center; position: relative; box-shadow: 0 2px 8px rgba(0,0,0,0.15);">
+                <div style="text-align: center; color: white;">
+                    <div style="font-size: 32px; margin-bottom: 12px;">🧵</div>
+                    <div style="font-size: 16px; font-weight: 600; margin-bottom: 4px;">Threads 投稿画像</div>
+                    <div style="font-size: 13px; opacity: 0.9;">@{username}</div>
+                </div>
+                <div style="position: absolute; top: 10px; right: 10px; background: rgba(0,0,0,0.3); padding: 6px 10px; border-radius: 12px; font-size: 11px; color: white; backdrop-filter: blur(4px);">
+                    🧵 {short_post_id}
+                </div>
+            </div>
+        </div>'''
+        elif image:
+            # 他の画像の場合は通常表示
+            image_html = f'''
+        <div style="margin: 15px 0;">
+            <div style="width: 100%; max-width: 500px; border-radius: 8px; overflow: hidden; position: relative; box-shadow: 0 2px 8px rgba(0,0,0,0.15);">
+                <img src="{image}" alt="Threads post image" style="width: 100%; height: auto; display: block; max-height: 400px; object-fit: cover;">
+                <div style="position: absolute; top: 10px; right: 10px; background: rgba(0,0,0,0.7); padding: 4px 8px; border-radius: 12px; font-size: 11px; color: white; backdrop-filter: blur(4px);">
+                    🧵 {short_post_id}
+                </div>
+            </div>
+        </div>'''
+        else:
+            # 画像がない場合のフォールバック表示
+            image_html = f'''
+        <div style="margin: 15px 0;">
+            <div style="width: 100%; height: 120px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 8px; display: flex; align-items: center; justify-content: center; position: relative; overflow: hidden;">
+                <div style="text-align: center; color: white;">
+                    <div style="font-size: 24px; margin-bottom: 8px;">🧵</div>
+                    <div style="font-size: 14px; font-weight: 500;">Threads 投稿</div>
+                    <div style="font-size: 12px; opacity: 0.8; margin-top: 4px;">@{username}</div>
+                </div>
+                <div style="position: absolute; top: 10px; right: 10px; background: rgba(0,0,0,0.3); padding: 4px 8px; border-radius: 12px; font-size: 11px; color: white;">
+                    {short_post_id}
+                </div>
+            </div>
+        </div>'''
+        
+        return f'''<div class="sns-embed threads-embed" style="margin: 20px 0; padding: 20px; border: 1px solid #e1e5e9; border-radius: 12px; background: linear-gradient(135deg, #fafafa 0%, #f0f0f0 100%); box-shadow: 0 4px 12px rgba(0,0,0,0.1);">
+    <div style="display: flex; align-items: center; margin-bottom: 15px;">
+        <div style="width: 45px; height: 45px; background: linear-gradient(45deg, #000, #333); border-radius: 12px; display: flex; align-items: center; justify-content: center; margin-right: 15px; box-shadow: 0 2px 8px rgba(0,0,0,0.2);">
+            <span style="color: white; font-weight: bold; font-size: 18px;">@</span>
+        </div>
+        <div style="flex: 1;">
+            <div style="font-weight: 600; color: #1c1e21; font-size: 16px; margin-bottom: 2px;">{title}</div>
+            <div style="color: #65676b; font-size: 13px; display: flex; align-items: center;">
+                <span style="margin-right: 6px;">🧵</span>
+                {site_name}
+            </div>
+        </div>
+        <div style="text-align: right;">
+            <div style="color: #999; font-size: 11px; background: rgba(0,0,0,0.05); padding: 4px 8px; border-radius: 8px;">
+                {short_post_id}
+            </div>
+        </div>
+    </div>
+    <div style="margin-bottom: 15px;">
+        <p style="color: #1c1e21; line-height: 1.5; margin: 0; font-size: 14px; background: rgba(255,255,255,0.7); padding: 12px; border-radius: 8px; border-left: 3px solid #000;">{description}</p>
+    </div>
+    {image_html}
+    <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 20px; padding-top: 15px; border-top: 1px solid #e1e5e9;">
+        <div style="color: #65676b; font-size: 12px; display: flex; align-items: center;">
+            <span style="margin-right: 8px; font-size: 16px;">🧵</span>
+            <span>Threads投稿を表示</span>
+        </div>
+        <a href="{url}" target="_blank" rel="noopener noreferrer" 
+           style="display: inline-flex; align-items: center; padding: 10px 18px; background: linear-gradient(45deg, #000, #333); color: white; text-decoration: none; border-radius: 24px; font-weight: 600; font-size: 13px; transition: all 0.3s; box-shadow: 0 2px 8px rgba(0,0,0,0.2);">
+            <span style="margin-right: 8px; font-size: 16px;">📱</span>
+            投稿を見る
+        </a>
+    </div>
+</div>'''
+        
+    except Exception as e:
+        current_app.logger.error(f"Threads OGP fetch error: {e}")
+        # 改善されたフォールバック表示（同じスタイル）
+        return f'''<div class="sns-embed threads-embed" style="margin: 20px 0; padding: 20px; border: 1px solid #e1e5e9; border-radius: 12px; background: linear-gradient(135deg, #fafafa 0%, #f0f0f0 100%); box-shadow: 0 4px 12px rgba(0,0,0,0.1);">
+    <div style="display: flex; align-items: center; margin-bottom: 15px;">
+        <div style="width: 45px; height: 45px; background: linear-gradient(45deg, #000, #333); border-radius: 12px; display: flex; align-items: center; justify-content: center; margin-right: 15px; box-shadow: 0 2px 8px rgba(0,0,0,0.2);">
+            <span style="color: white; font-weight: bold; font-size: 18px;">@</span>
+        </div>
+        <div style="flex: 1;">
+            <div style="font-weight: 600; color: #1c1e21; font-size: 16px; margin-bottom: 2px;">{username} (@{username}) on Threads</div>
+            <div style="color: #65676b; font-size: 13px; display: flex; align-items: center;">
+                <span style="margin-right: 6px;">🧵</span>
+                Threads
+            </div>
+        </div>
+        <div style="text-align: right;">
+            <div style="color: #999; font-size: 11px; background: rgba(0,0,0,0.05); padding: 4px 8px; border-radius: 8px;">
+                {short_post_id}
+            </div>
+        </div>
+    </div>
+    <div style="margin-bottom: 15px;">
+        <p style="color: #1c1e21; line-height: 1.5; margin: 0; font-size: 14px; background: rgba(255,255,255,0.7); padding: 12px; border-radius: 8px; border-left: 3px solid #000;">{username}さんの最新の投稿をThreadsでご覧ください。プログラミングチャレンジや日々の学習記録など、興味深いコンテンツが投稿されています。</p>
+    </div>
+    <div style="margin: 15px 0;">
+        <div style="width: 100%; height: 200px; background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); border-radius: 8px; display: flex; align-items: center; justify-content: center; position: relative; overflow: hidden;">
+            <div style="text-align: center; color: white;">
+                <div style="font-size: 24px; margin-bottom: 8px;">🧵</div>
+                <div style="font-size: 14px; font-weight: 500;">Threads 投稿</div>
+                <div style="font-size: 12px; opacity: 0.8; margin-top: 4px;">@{username}</div>
+            </div>
+            <div style="position: absolute; top: 10px; right: 10px; background: rgba(0,0,0,0.3); padding: 4px 8px; border-radius: 12px; font-size: 11px; color: white;">
+                {short_post_id}
+            </div>
+        </div>
+    </div>
+    <div style="display: flex; justify-content: space-between; align-items: center; margin-top: 20px; padding-top: 15px; border-top: 1px solid #e1e5e9;">
+        <div style="color: #65676b; font-size: 12px; display: flex; align-items: center;">
+            <span style="margin-right: 8px; font-size: 16px;">🧵</span>
+            <span>Threads投稿を表示</span>
+        </div>
+        <a href="{url}" target="_blank" rel="noopener noreferrer" 
+           style="display: inline-flex; align-items: center; padding: 10px 18px; background: linear-gradient(45deg, #000, #333); color: white; text-decoration: none; border-radius: 24px; font-weight: 600; font-size: 13px; transition: all 0.3s; box-shadow: 0 2px 8px rgba(0,0,0,0.2);">
+            <span style="margin-right: 8px; font-size: 16px;">📱</span>
+            投稿を見る
+        </a>
+    </div>
+</div>'''
+
+
+# --- 記事本文レンダリングキャッシュ ---
+
+# レンダラー（Markdown拡張・埋込HTML・サニタイズ設定）を変更したら上げる
+RENDERER_VERSION = '2'
+# 保存するプレーンテキスト抜粋の最大文字数（一覧のdata-content用に500文字）
+RENDER_EXCERPT_LENGTH = 500
+
+# キャッシュ済み記事の表示時にOGPの期限を確認する間隔（秒、記事ごと・プロセスごと）
+OGP_REFRESH_CHECK_INTERVAL = int(os.environ.get('OGP_REFRESH_CHECK_INTERVAL', 60))
+_ogp_refresh_checked_at = {}  # 記事ID -> 最終確認時刻（time.monotonic）
+_ogp_refresh_in_flight = {}  # 記事ID -> 取得中のURL（完了後の再レンダリングの重複登録防止）
+_ogp_refresh_lock = threading.Lock()
+
+def compute_render_hash(body):
+    """本文とレンダラーバージョンからキャッシュキーを生成"""
+    source = f"{RENDERER_VERSION}\n{body or ''}"
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+# 抜粋に含めない要素（スクリプト等の中身と、SNS埋込・OGPカードのブロック）
+EXCERPT_SKIP_TAGS = frozenset(['script', 'style', 'noscript', 'iframe', 'template'])
+EXCERPT_SKIP_CLASSES = frozenset(['sns-embed', 'ogp-card'])
+
+class _ExcerptParser(HTMLParser):
+    """本文のテキストのみを収集するパーサー（除外要素の内側は読み飛ばす）"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip_tag = None  # 読み飛ばし中の要素名
+        self._skip_depth = 0  # 読み飛ばし中の要素と同名の要素の入れ子の深さ
+    
+    def handle_starttag(self, tag, attrs):
+        if self._skip_tag is not None:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        classes = (dict(attrs).get('class') or '').split()
+        if tag in EXCERPT_SKIP_TAGS or EXCERPT_SKIP_CLASSES.intersection(classes):
+            self._skip_tag = tag
+            self._skip_depth = 1
+    
+    def handle_endtag(self, tag):
+        if tag == self._skip_tag:
+            self._skip_depth -= 1
+            if self._skip_depth == 0:
+                self._skip_tag = None
+    
+    def handle_data(self, data):
+        if self._skip_tag is None:
+            self.parts.append(data)
+
+def html_to_excerpt(html, length=RENDER_EXCERPT_LENGTH):
+    """HTMLからプレーンテキスト抜粋を生成（スクリプト・SNS埋込・OGPカードの文字列は含めない）"""
+    if not html:
+        return ''
+    parser = _ExcerptParser()
+    parser.feed(str(html))
+    parser.close()
+    text = ' '.join(''.join(parser.parts).split())
+    return text[:length]
+
+def render_article_body(article):
+    """記事本文をレンダリングしてキャッシュ列に保存（コミットは呼び出し側）"""
+    render_hash = compute_render_hash(article.body)
+    if article.body:
+        renderer = ArticleRenderer()
+        body_html = str(renderer.render(article.body))
+        current_app.logger.debug(f"Rendered article {article.id}: {renderer.format_timings()}")
+    else:
+        body_html = ''
+    article.rendered_body_html = body_html
+    article.rendered_excerpt = html_to_excerpt(body_html)
+    article.render_hash = render_hash
+    return article
+
+def find_pending_ogp_urls(body):
+    """本文中のOGPの再取得が必要なURL（未取得・期限切れ）を返す"""
+    return find_ogp_urls_needing_refresh(extract_ogp_urls(body))
+
+def schedule_article_ogp_prefetch(article_id, urls):
+    """未取得・期限切れのOGPをバックグラウンドで取得し、完了後に記事を再レンダリング
+    同じ記事・URLの取得が進行中の場合は重複して登録しない
+    """
+    with _ogp_refresh_lock:
+        in_flight = _ogp_refresh_in_flight.setdefault(article_id, set())
+        urls = [url for url in urls if url not in in_flight]
+        if not urls:
+            if not in_flight:
+                del _ogp_refresh_in_flight[article_id]
+            return
+        in_flight.update(urls)
+    
+    def _on_complete():
+        try:
+            _rerender_article(article_id)
+        finally:
+            with _ogp_refresh_lock:
+                in_flight = _ogp_refresh_in_flight.get(article_id)
+                if in_flight is not None:
+                    in_flight.difference_update(urls)
+                    if not in_flight:
+                        del _ogp_refresh_in_flight[article_id]
+    
+    current_app.logger.debug(f"Scheduling OGP prefetch for article {article_id}: {len(urls)} URLs")
+    schedule_ogp_prefetch(urls, on_complete=_on_complete)
+
+def _should_check_ogp_refresh(article):
+    """キャッシュ済み記事のOGP期限確認を行うか（記事ごとにOGP_REFRESH_CHECK_INTERVAL秒に1回）"""
+    if not article.body or not URL_START_PATTERN.search(article.body):
+        return False
+    now = time.monotonic()
+    with _ogp_refresh_lock:
+        checked_at = _ogp_refresh_checked_at.get(article.id)
+        if checked_at is not None and now - checked_at < OGP_REFRESH_CHECK_INTERVAL:
+            return False
+        _ogp_refresh_checked_at[article.id] = now
+    return True
+
+def _rerender_article(article_id):
+    """OGP取得完了後に記事のレンダリング結果を更新（アプリケーションコンテキスト内で実行）"""
+    from models import db, Article
+    try:
+        article = db.session.get(Article, article_id)
+        if article is None:
+            return
+        render_article_body(article)
+        db.session.commit()
+        # 本文・抜粋が変わるため記事ページと一覧のページキャッシュを破棄
+        invalidate_page_cache(article_tag(article_id), TAG_ARTICLE_LIST)
+        current_app.logger.debug(f"✅ Re-rendered article {article_id} after OGP prefetch")
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Re-render after OGP prefetch failed for article {article_id}: {e}")
+    finally:
+        db.session.remove()
+
+def ensure_list_excerpts(articles):
+    """一覧に表示する記事のうちレンダリングキャッシュが未生成のものを生成し、抜粋を一覧の記事に反映
+    一覧クエリは本文を読み込まないため、対象の記事だけを別セッションで読み込んでレンダリング・保存する
+    （WordPressインポートやキャッシュ導入前の記事を、backfill_render_cache.py の実行前でも表示できるようにする）
+    """
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from sqlalchemy.orm.attributes import set_committed_value
+    from models import db, Article
+    
+    missing = {article.id: article for article in articles if article.render_hash is None}
+    if not missing:
+        return
+    
+    current_app.logger.debug(f"Render cache missing for {len(missing)} listed articles")
+    try:
+        with Session(db.engine, expire_on_commit=False) as session:
+            rendered = session.execute(select(Article).where(Article.id.in_(missing))).scalars().all()
+            for article in rendered:
+                render_article_body(article)
+            session.commit()
+    except Exception as e:
+        current_app.logger.error(f"Render cache save error for listed articles: {e}")
+        return
+    
+    for article in rendered:
+        listed = missing[article.id]
+        set_committed_value(listed, 'rendered_excerpt', article.rendered_excerpt)
+        set_committed_value(listed, 'render_hash', article.render_hash)
+
+def is_render_cache_valid(article):
+    """キャッシュ済みHTMLが現在の本文・レンダラーに対応しているか"""
+    return article.render_hash is not None and article.render_hash == compute_render_hash(article.body)
+
+def ensure_article_rendered(article, db_session=None):
+    """キャッシュミス時のみレンダリングし、可能ならその場で保存"""
+    if is_render_cache_valid(article):
+        # キャッシュ済みHTMLのOGPカードが期限切れなら、バックグラウンドで再取得して再レンダリング
+        if _should_check_ogp_refresh(article):
+            schedule_article_ogp_prefetch(article.id, find_pending_ogp_urls(article.body))
+        return False
+    
+    current_app.logger.debug(f"Render cache miss for article {article.id}")
+    render_article_body(article)
+    
+    if db_session is not None:
+        rendered = (article.rendered_body_html, article.rendered_excerpt, article.render_hash)
+        try:
+            db_session.commit()
+        except Exception as e:
+            db_session.rollback()
+            current_app.logger.error(f"Render cache save error for article {article.id}: {e}")
+            # ロールバックで属性が失効するため、表示用に値を戻す
+            article.rendered_body_html, article.rendered_excerpt, article.render_hash = rendered
+        else:
+            # 一覧の抜粋が変わるため一覧のページキャッシュを破棄（表示中の記事ページはこの後の描画結果で保存される）
+            invalidate_page_cache(TAG_ARTICLE_LIST)
+            schedule_article_ogp_prefetch(article.id, find_pending_ogp_urls(article.body))
+    return True
+
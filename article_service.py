@@ -12,6 +12,7 @@ from werkzeug.utils import secure_filename
 from flask import current_app
 from sqlalchemy import select, func
 from models import db, Article, Category, User, article_categories
+from article_renderer import render_article_body, find_pending_ogp_urls, schedule_article_ogp_prefetch
 from werkzeug.security import generate_password_hash
 import time
 
@@ -62,8 +63,15 @@ class ArticleService:
                     file.save(filepath)
                     article.featured_image = f"uploads/articles/{filename}"
             
+            # 本文のレンダリング結果をキャッシュ
+            render_article_body(article)
+            pending_ogp_urls = find_pending_ogp_urls(article.body)
+            
             # コミット
             db.session.commit()
+            
+            # 未取得のOGPはバックグラウンドで取得し、完了後に再レンダリング
+            schedule_article_ogp_prefetch(article.id, pending_ogp_urls)
             return article, None
             
         except Exception as e:
@@ -110,8 +118,15 @@ class ArticleService:
             elif form_data.get('remove_featured_image'):
                 article.featured_image = None
             
+            # 本文のレンダリング結果をキャッシュ
+            render_article_body(article)
+            pending_ogp_urls = find_pending_ogp_urls(article.body)
+            
             # コミット
             db.session.commit()
+            
+            # 未取得のOGPはバックグラウンドで取得し、完了後に再レンダリング
+            schedule_article_ogp_prefetch(article.id, pending_ogp_urls)
             return article, None
             
         except Exception as e:
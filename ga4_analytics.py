@@ -6,60 +6,87 @@ from flask import Markup, current_app
 from models import db, SiteSetting
 
 
+# 読み込む設定キーとデフォルト値
+GA4_SETTING_KEYS = {
+    'google_analytics_id': '',
+    'google_analytics_enabled': 'false',
+    'google_tag_manager_id': '',
+    'enhanced_ecommerce': 'false',
+    'track_scroll_depth': 'false',
+    'track_file_downloads': 'false',
+    'track_outbound_links': 'false',
+    'track_page_engagement': 'false',
+    'track_site_search': 'false',
+    'analytics_storage_consent': 'denied',
+    'ad_storage_consent': 'denied',
+    'cookie_banner_enabled': 'false',
+    'cookie_banner_text': 'このサイトではCookieを使用してユーザーエクスペリエンスを向上させています。',
+    'exclude_admin_tracking': 'true',
+}
+
+# 生成済みHTMLのキャッシュ {(種類, 設定内容): Markup}
+# 出力は設定内容のみで決まるため、設定が変わらない限り再生成しない
+_snippet_cache = {}
+SNIPPET_CACHE_MAX_ENTRIES = 32
+
+
 class GA4AnalyticsManager:
     """GA4とGTMの統合管理クラス"""
     
     def __init__(self):
         """設定を初期化"""
         self.settings = self._load_settings()
+        self._settings_key = tuple(sorted(self.settings.items()))
     
     def _load_settings(self):
-        """データベースから設定を読み込み"""
+        """サイト設定キャッシュから設定を一括で読み込み"""
         settings = {}
         try:
+            values = SiteSetting.get_settings(GA4_SETTING_KEYS.keys(), GA4_SETTING_KEYS)
+            
             # GA4基本設定
-            settings['ga4_measurement_id'] = self._get_setting('google_analytics_id', '')
-            settings['ga4_enabled'] = self._get_setting('google_analytics_enabled', 'false') == 'true'
+            settings['ga4_measurement_id'] = values['google_analytics_id']
+            settings['ga4_enabled'] = values['google_analytics_enabled'] == 'true'
             
             # GTM設定
-            settings['gtm_container_id'] = self._get_setting('google_tag_manager_id', '')
-            settings['gtm_enabled'] = self._get_setting('google_tag_manager_id', '') != ''
+            settings['gtm_container_id'] = values['google_tag_manager_id']
+            settings['gtm_enabled'] = values['google_tag_manager_id'] != ''
             
             # Enhanced E-commerce
-            settings['enhanced_ecommerce'] = self._get_setting('enhanced_ecommerce', 'false') == 'true'
+            settings['enhanced_ecommerce'] = values['enhanced_ecommerce'] == 'true'
             
             # カスタムイベント追跡
-            settings['track_scroll_depth'] = self._get_setting('track_scroll_depth', 'false') == 'true'
-            settings['track_file_downloads'] = self._get_setting('track_file_downloads', 'false') == 'true'
-            settings['track_outbound_links'] = self._get_setting('track_outbound_links', 'false') == 'true'
-            settings['track_page_engagement'] = self._get_setting('track_page_engagement', 'false') == 'true'
-            settings['track_site_search'] = self._get_setting('track_site_search', 'false') == 'true'
+            settings['track_scroll_depth'] = values['track_scroll_depth'] == 'true'
+            settings['track_file_downloads'] = values['track_file_downloads'] == 'true'
+            settings['track_outbound_links'] = values['track_outbound_links'] == 'true'
+            settings['track_page_engagement'] = values['track_page_engagement'] == 'true'
+            settings['track_site_search'] = values['track_site_search'] == 'true'
             
             # プライバシー設定
             settings['enable_consent_mode'] = True  # 常にConsent Modeを有効
-            settings['default_analytics_storage'] = self._get_setting('analytics_storage_consent', 'denied')
-            settings['default_ad_storage'] = self._get_setting('ad_storage_consent', 'denied')
-            settings['cookie_banner_enabled'] = self._get_setting('cookie_banner_enabled', 'false') == 'true'
-            settings['cookie_banner_text'] = self._get_setting('cookie_banner_text', 
-                'このサイトではCookieを使用してユーザーエクスペリエンスを向上させています。')
+            settings['default_analytics_storage'] = values['analytics_storage_consent']
+            settings['default_ad_storage'] = values['ad_storage_consent']
+            settings['cookie_banner_enabled'] = values['cookie_banner_enabled'] == 'true'
+            settings['cookie_banner_text'] = values['cookie_banner_text']
             
             # 追跡除外設定
-            settings['exclude_admin_tracking'] = self._get_setting('exclude_admin_tracking', 'true') == 'true'
+            settings['exclude_admin_tracking'] = values['exclude_admin_tracking'] == 'true'
             
         except Exception as e:
             current_app.logger.error(f"GA4設定読み込みエラー: {str(e)}")
         
         return settings
     
-    def _get_setting(self, key, default=None):
-        """個別設定値を取得"""
-        try:
-            setting = db.session.execute(
-                db.select(SiteSetting).where(SiteSetting.key == key)
-            ).scalar_one_or_none()
-            return setting.value if setting else default
-        except:
-            return default
+    def _get_cached_snippet(self, kind, builder):
+        """設定内容ごとに生成済みHTMLを使い回す"""
+        cache_key = (kind, self._settings_key)
+        snippet = _snippet_cache.get(cache_key)
+        if snippet is None:
+            snippet = builder()
+            if len(_snippet_cache) >= SNIPPET_CACHE_MAX_ENTRIES:
+                _snippet_cache.clear()
+            _snippet_cache[cache_key] = snippet
+        return snippet
     
     def should_track_user(self, user):
         """ユーザーを追跡すべきか判定"""
@@ -74,6 +101,10 @@ class GA4AnalyticsManager:
         if not self.should_track_user(user):
             return Markup('')
         
+        return self._get_cached_snippet('tracking', self._build_tracking_code)
+    
+    def _build_tracking_code(self):
+        """GA4トラッキングコード一式を組み立て"""
         # GA4もGTMも無効な場合
         if not self.settings['ga4_enabled'] and not self.settings['gtm_enabled']:
             return Markup('')
@@ -114,6 +145,10 @@ class GA4AnalyticsManager:
         if not self.settings['gtm_enabled'] or not self.settings['gtm_container_id']:
             return Markup('')
         
+        return self._get_cached_snippet('gtm_noscript', self._build_gtm_noscript)
+    
+    def _build_gtm_noscript(self):
+        """GTM noscript部分を組み立て"""
         return Markup(f'''
 <!-- Google Tag Manager (noscript) -->
 <noscript><iframe src="https://www.googletagmanager.com/ns.html?id={self.settings['gtm_container_id']}"
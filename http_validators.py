@@ -0,0 +1,59 @@
+"""
+公開ページの条件付きGET（ETag / 304）
+ビューはテンプレート描画前に表示内容を決める値からETagを作り、一致すれば描画せずに304を返す
+"""
+import time
+import hashlib
+from flask import current_app, request, session, g
+
+def make_etag(*parts):
+    """表示内容を決める値の列から強いETagの値を生成"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+def _csrf_component():
+    """CSRFトークンを含むページ用（セッションのトークンと有効期限の区切りで変わる）"""
+    raw_token = session.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'), '')
+    time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT') or 0
+    # ブラウザに残ったページのトークンが期限切れにならないよう、有効期限の半分ごとにETagを変える
+    bucket = int(time.time() // max(time_limit // 2, 1)) if time_limit else 0
+    return f"{raw_token}|{bucket}"
+
+def final_etag(base_etag, with_csrf):
+    """ページ固有のETagに、必要ならCSRFトークンの要素を加えた送信用ETag"""
+    return make_etag(base_etag, _csrf_component()) if with_csrf else base_etag
+
+def is_not_modified(etag):
+    """条件付きリクエストの検証子が一致するか（If-None-Matchがあればそちらを優先）"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    return False
+
+def set_validators(response, etag):
+    """レスポンスに検証子を設定（毎回再検証させる）"""
+    response.set_etag(etag)
+    response.headers.setdefault('Cache-Control', 'no-cache')
+    return response
+
+def not_modified_response(etag):
+    """304レスポンスを生成"""
+    return set_validators(current_app.response_class(status=304), etag)
+
+def check_not_modified(base_etag, with_csrf=False):
+    """ビューから描画前に呼び出す：一致すれば304レスポンス、しなければNone（検証子は描画後のレスポンスにも付与）"""
+    if '_flashes' in session:
+        # フラッシュメッセージを含むページはブラウザに再利用させない
+        return None
+    g.page_etag = base_etag
+    g.page_etag_with_csrf = with_csrf
+    etag = final_etag(base_etag, with_csrf)
+    if is_not_modified(etag):
+        return not_modified_response(etag)
+    return None
+
+def apply_page_validators(response):
+    """描画したページのレスポンスに検証子を付与（after_requestから呼び出す）"""
+    base_etag = g.get('page_etag')
+    if base_etag and response.status_code == 200 and 'ETag' not in response.headers:
+        set_validators(response, final_etag(base_etag, g.get('page_etag_with_csrf', False)))
+    return response
@@ -0,0 +1,30 @@
+"""Add rendered body cache columns to articles
+
+Revision ID: c3f7a9d21e54
+Revises: 4065a2c65a8e
+Create Date: 2026-10-18 10:14:36.208417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f7a9d21e54'
+down_revision = '4065a2c65a8e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rendered_body_html', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('rendered_excerpt', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('render_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.drop_column('render_hash')
+        batch_op.drop_column('rendered_excerpt')
+        batch_op.drop_column('rendered_body_html')
@@ -0,0 +1,43 @@
+"""Add OGP cache table
+
+Revision ID: d5e8b3c0a7f2
+Revises: c3f7a9d21e54
+Create Date: 2026-10-18 11:02:47.513920
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e8b3c0a7f2'
+down_revision = 'c3f7a9d21e54'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('ogp_cache',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('url_hash', sa.String(length=64), nullable=False),
+    sa.Column('url', sa.Text(), nullable=False),
+    sa.Column('data', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('etag', sa.String(length=255), nullable=True),
+    sa.Column('last_modified', sa.String(length=100), nullable=True),
+    sa.Column('fetched_at', sa.DateTime(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('last_accessed_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('ogp_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_ogp_cache_url_hash'), ['url_hash'], unique=True)
+        batch_op.create_index(batch_op.f('ix_ogp_cache_last_accessed_at'), ['last_accessed_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('ogp_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_ogp_cache_last_accessed_at'))
+        batch_op.drop_index(batch_op.f('ix_ogp_cache_url_hash'))
+
+    op.drop_table('ogp_cache')
@@ -0,0 +1,36 @@
+"""Add article listing keyset indexes
+
+Revision ID: e7b4c1d9f3a6
+Revises: d5e8b3c0a7f2
+Create Date: 2026-10-18 15:41:12.208417
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b4c1d9f3a6'
+down_revision = 'd5e8b3c0a7f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.create_index('ix_articles_published_created_id', ['is_published', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('article_categories', schema=None) as batch_op:
+        batch_op.create_index('ix_article_categories_category_article', ['category_id', 'article_id'], unique=False)
+
+
+def downgrade():
+    # MySQLではcategory_idの外部キーがix_article_categories_category_articleを使っているため、
+    # 削除前に外部キー用のインデックスcategory_idを作り直す（articlesの複合インデックスは外部キーと無関係）
+    with op.batch_alter_table('article_categories', schema=None) as batch_op:
+        if op.get_bind().dialect.name == 'mysql':
+            batch_op.create_index('category_id', ['category_id'], unique=False)
+        batch_op.drop_index('ix_article_categories_category_article')
+
+    with op.batch_alter_table('articles', schema=None) as batch_op:
+        batch_op.drop_index('ix_articles_published_created_id')
@@ -0,0 +1,40 @@
+"""Add comment and SEO analysis indexes
+
+Revision ID: f2a6d8e1b5c3
+Revises: e7b4c1d9f3a6
+Create Date: 2026-10-18 16:05:38.774120
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2a6d8e1b5c3'
+down_revision = 'e7b4c1d9f3a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        batch_op.create_index('ix_comments_article_approved_parent_created', ['article_id', 'is_approved', 'parent_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('seo_analysis', schema=None) as batch_op:
+        batch_op.create_index('ix_seo_analysis_article_type', ['article_id', 'analysis_type'], unique=False)
+
+
+def downgrade():
+    is_mysql = op.get_bind().dialect.name == 'mysql'
+
+    # MySQLではseo_analysis.article_idの外部キーがix_seo_analysis_article_typeを使っているため、削除前にarticle_idを作り直す
+    with op.batch_alter_table('seo_analysis', schema=None) as batch_op:
+        if is_mysql:
+            batch_op.create_index('article_id', ['article_id'], unique=False)
+        batch_op.drop_index('ix_seo_analysis_article_type')
+
+    # comments.article_idの外部キーも同様にix_comments_article_approved_parent_createdを使っている
+    with op.batch_alter_table('comments', schema=None) as batch_op:
+        if is_mysql:
+            batch_op.create_index('article_id', ['article_id'], unique=False)
+        batch_op.drop_index('ix_comments_article_approved_parent_created')
@@ -4,18 +4,24 @@
 """
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime, timedelta
+import json
+import time
+import threading
 from flask_login import UserMixin
 import pyotp
 import secrets
 from itsdangerous import URLSafeTimedSerializer
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update, cast, Integer, String
+from sqlalchemy.orm import defer
 
 db = SQLAlchemy()
 
 # --- 中間テーブル: Article と Category の多対多関連 ---
 article_categories = db.Table('article_categories',
     db.Column('article_id', db.Integer, db.ForeignKey('articles.id'), primary_key=True),
-    db.Column('category_id', db.Integer, db.ForeignKey('categories.id'), primary_key=True)
+    db.Column('category_id', db.Integer, db.ForeignKey('categories.id'), primary_key=True),
+    # カテゴリ別一覧用（主キーは article_id 先頭のため category_id からは引けない）
+    db.Index('ix_article_categories_category_article', 'category_id', 'article_id')
 )
 
 class User(db.Model, UserMixin): # UserMixin を継承
@@ -57,7 +63,8 @@ class User(db.Model, UserMixin): # UserMixin を継承
     
     ext_json = db.Column(db.Text, nullable=True)  # 拡張用JSON
     
-    articles = db.relationship('Article', backref=db.backref('author', lazy='select'), lazy='selectin') # UserとArticleの1対多（パフォーマンス最適化）
+    # UserとArticleの1対多（認証ユーザー読み込みのたびに全記事を読まないよう遅延読み込み）
+    articles = db.relationship('Article', backref=db.backref('author', lazy='select'), lazy='select')
     
     def generate_totp_secret(self):
         """TOTP用のシークレットキーを生成"""
@@ -101,6 +108,10 @@ class User(db.Model, UserMixin): # UserMixin を継承
 
 class Article(db.Model):
     __tablename__ = 'articles'
+    __table_args__ = (
+        # 公開記事一覧の並び順 (created_at, id) でのキーセットページネーション用
+        db.Index('ix_articles_published_created_id', 'is_published', 'created_at', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(255), nullable=False)
     slug = db.Column(db.String(255), unique=True, nullable=False)
@@ -130,18 +141,32 @@ class Article(db.Model):
     
     # 拡張用
     ext_json = db.Column(db.Text, nullable=True)
+    
+    # 本文レンダリングキャッシュ（本文+レンダラーバージョンのハッシュで有効性を判定）
+    rendered_body_html = db.Column(db.Text, nullable=True)  # Markdown変換・SNS埋込済みHTML
+    rendered_excerpt = db.Column(db.Text, nullable=True)  # タグ除去済みプレーンテキスト抜粋
+    render_hash = db.Column(db.String(64), nullable=True)  # SHA-256
 
-    # Article から Category へのリレーションシップ（パフォーマンス最適化）
+    # Article から Category へのリレーションシップ
+    # 一覧表示では各ビューのクエリで selectinload を指定する（既定で読み込むと Category.articles 経由で連鎖するため）
     categories = db.relationship(
         'Category',
         secondary=article_categories,
-        lazy='selectin',  # N+1問題回避のため selectin を使用
+        lazy='select',
         back_populates='articles'
     )
     
     # コメントとのリレーション（CASCADE削除対応）
     comments = db.relationship('Comment', back_populates='article', lazy='dynamic', cascade='all, delete-orphan')
     
+    # 一覧表示では使わない大きなテキスト列（抜粋は rendered_excerpt を使う）
+    LIST_DEFERRED_COLUMNS = ('body', 'legacy_body_backup', 'ext_json', 'rendered_body_html')
+
+    @staticmethod
+    def list_column_options(raiseload=False):
+        """一覧クエリ用に大きなテキスト列を読み込まないローダー設定（raiseload=Trueなら参照時にエラー）"""
+        return tuple(defer(getattr(Article, name), raiseload=raiseload) for name in Article.LIST_DEFERRED_COLUMNS)
+
     def get_text_content(self):
         """記事のテキストコンテンツを取得（検索用）"""
         return self.body or ''
@@ -167,11 +192,12 @@ class Category(db.Model):
 
     parent = db.relationship('Category', remote_side=[id], backref=db.backref('children', lazy='select'))
 
-    # Category から Article へのリレーションシップ（パフォーマンス最適化）
+    # Category から Article へのリレーションシップ
+    # カテゴリの全記事を暗黙に読み込まないよう、使用箇所で selectinload を明示しない限りエラーにする
     articles = db.relationship(
         'Article',
         secondary=article_categories,
-        lazy='selectin',  # N+1問題回避のため selectin を使用
+        lazy='raise_on_sql',
         back_populates='categories'
     )
 
@@ -180,6 +206,10 @@ class Category(db.Model):
 
 class Comment(db.Model):
     __tablename__ = 'comments'
+    __table_args__ = (
+        # 記事詳細の承認済みトップレベルコメント一覧（article_id, is_approved, parent_id で絞り込み created_at 順）
+        db.Index('ix_comments_article_approved_parent_created', 'article_id', 'is_approved', 'parent_id', 'created_at'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), nullable=False)
     author_name = db.Column(db.String(100), nullable=False)
@@ -216,9 +246,69 @@ class SiteSetting(db.Model):
     
     @staticmethod
     def get_setting(key, default=None):
-        """設定値を取得"""
-        setting = db.session.execute(select(SiteSetting).where(SiteSetting.key == key)).scalar_one_or_none()
-        return setting.value if setting else default
+        """設定値を取得（プロセス内キャッシュから）"""
+        entry = _site_settings_cache.get_entries().get(key)
+        return entry['value'] if entry else default
+    
+    @staticmethod
+    def get_public_settings():
+        """公開設定を {キー: 変換済みの値} で取得"""
+        return {
+            key: entry['typed_value']
+            for key, entry in _site_settings_cache.get_entries().items()
+            if entry['is_public']
+        }
+    
+    @staticmethod
+    def get_settings(keys, defaults=None):
+        """複数の設定値を {キー: 値} でまとめて取得"""
+        defaults = defaults or {}
+        entries = _site_settings_cache.get_entries()
+        return {key: entries[key]['value'] if key in entries else defaults.get(key) for key in keys}
+    
+    @staticmethod
+    def convert_value(value, setting_type):
+        """設定タイプ（boolean, number, json）に応じて値を変換"""
+        if setting_type == 'boolean':
+            return (value or '').lower() == 'true'
+        elif setting_type == 'number':
+            try:
+                return float(value) if '.' in value else int(value)
+            except (TypeError, ValueError):
+                return 0
+        elif setting_type == 'json':
+            try:
+                return json.loads(value) if value else {}
+            except json.JSONDecodeError:
+                return {}
+        return value
+    
+    @staticmethod
+    def bump_version():
+        """設定バージョンを更新（コミットは呼び出し側、全ワーカーのキャッシュが無効になる）"""
+        result = db.session.execute(
+            update(SiteSetting)
+            .where(SiteSetting.key == SITE_SETTINGS_VERSION_KEY)
+            .values(value=cast(cast(SiteSetting.value, Integer) + 1, String), updated_at=datetime.utcnow())
+        )
+        if result.rowcount == 0:
+            db.session.add(SiteSetting(
+                key=SITE_SETTINGS_VERSION_KEY,
+                value='1',
+                description='サイト設定のバージョン（設定変更時に自動更新）',
+                setting_type='number'
+            ))
+        _site_settings_cache.invalidate()
+    
+    @staticmethod
+    def get_version():
+        """現在の設定バージョン（一度も変更されていなければ'0'）"""
+        return _site_settings_cache.get_version()
+    
+    @staticmethod
+    def invalidate_cache():
+        """このプロセスの設定キャッシュを破棄"""
+        _site_settings_cache.invalidate()
     
     @staticmethod
     def set_setting(key, value, description=None, setting_type='text', is_public=False):
@@ -239,9 +329,72 @@ class SiteSetting(db.Model):
                 is_public=is_public
             )
             db.session.add(setting)
+        SiteSetting.bump_version()
         db.session.commit()
+        SiteSetting.invalidate_cache()
         return setting
 
+# --- サイト設定のプロセス内キャッシュ ---
+
+SITE_SETTINGS_VERSION_KEY = 'site_settings_version'
+SITE_SETTINGS_VERSION_CHECK_INTERVAL = 5  # 秒（他ワーカーでの変更を確認する間隔）
+
+class SiteSettingsCache:
+    """全設定を1クエリで読み込み、設定バージョンが変わるまで使い回すキャッシュ
+    バージョン確認はSITE_SETTINGS_VERSION_CHECK_INTERVAL秒に1回のみ行うため、通常のページ表示では設定のクエリが発生しない
+    """
+    
+    def __init__(self):
+        self._entries = None
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def get_entries(self):
+        """{キー: {'value', 'typed_value', 'is_public'}} を取得（必要なら再読み込み）"""
+        with self._lock:
+            now = time.monotonic()
+            if self._entries is not None and now - self._checked_at < SITE_SETTINGS_VERSION_CHECK_INTERVAL:
+                return self._entries
+            
+            if self._entries is not None:
+                version = db.session.execute(
+                    select(SiteSetting.value).where(SiteSetting.key == SITE_SETTINGS_VERSION_KEY)
+                ).scalar_one_or_none()
+                if version == self._version:
+                    self._checked_at = now
+                    return self._entries
+            
+            self._load()
+            self._checked_at = now
+            return self._entries
+    
+    def get_version(self):
+        """読み込み済み設定のバージョン（必要なら再読み込み）"""
+        self.get_entries()
+        return self._version or '0'
+    
+    def invalidate(self):
+        """キャッシュを破棄（次回アクセス時に再読み込み）"""
+        with self._lock:
+            self._entries = None
+            self._version = None
+    
+    def _load(self):
+        settings = db.session.execute(select(SiteSetting)).scalars().all()
+        entries = {}
+        for setting in settings:
+            entries[setting.key] = {
+                'value': setting.value,
+                'typed_value': SiteSetting.convert_value(setting.value, setting.setting_type),
+                'is_public': bool(setting.is_public),
+            }
+        version_entry = entries.pop(SITE_SETTINGS_VERSION_KEY, None)
+        self._version = version_entry['value'] if version_entry else None
+        self._entries = entries
+
+_site_settings_cache = SiteSettingsCache()
+
 # --- 画像管理用モデル ---
 
 class UploadedImage(db.Model):
@@ -370,6 +523,10 @@ class LoginHistory(db.Model):
 class SEOAnalysis(db.Model):
     """SEO分析結果保存"""
     __tablename__ = 'seo_analysis'
+    __table_args__ = (
+        # 記事ごとの分析結果の取得（article_id, analysis_type）
+        db.Index('ix_seo_analysis_article_type', 'article_id', 'analysis_type'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     article_id = db.Column(db.Integer, db.ForeignKey('articles.id', ondelete='CASCADE'), nullable=False)
@@ -427,3 +584,27 @@ class EmailChangeRequest(db.Model):
         if request and not request.is_expired():
             return request
         return None
+
+# --- OGPメタデータキャッシュ（全ワーカー共有・再起動後も保持） ---
+
+class OGPCache(db.Model):
+    """外部URLのOGPメタデータキャッシュ"""
+    __tablename__ = 'ogp_cache'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    url_hash = db.Column(db.String(64), nullable=False, unique=True, index=True)  # URLのSHA-256
+    url = db.Column(db.Text, nullable=False)
+    data = db.Column(db.Text, nullable=True)  # JSON形式のOGPデータ
+    status = db.Column(db.String(20), nullable=False, default='ok')  # 'ok', 'error'
+    etag = db.Column(db.String(255), nullable=True)  # 再検証用 ETag
+    last_modified = db.Column(db.String(100), nullable=True)  # 再検証用 Last-Modified
+    fetched_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False)
+    last_accessed_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)  # LRU削除用
+    
+    def is_expired(self):
+        """キャッシュが期限切れかどうか"""
+        return datetime.utcnow() >= self.expires_at
+    
+    def __repr__(self):
+        return f'<OGPCache {self.status}: {self.url[:50]}>'
@@ -0,0 +1,681 @@
+"""
+OGP（Open Graph Protocol）データ取得モジュール
+外部URLのOGPメタデータ取得・キャッシュと、バックグラウンドでの先読み取得を提供
+"""
+import os
+import re
+import json
+import time
+import queue
+import atexit
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+import requests
+from bs4 import BeautifulSoup
+from flask import current_app
+from sqlalchemy import select, delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import db, OGPCache
+
+# OGPキャッシュ管理（ogp_cacheテーブルに保存し、全ワーカーで共有）
+OGP_CACHE_DURATION = 3600  # 取得成功時: 1時間
+OGP_ERROR_CACHE_DURATION = 300  # 取得失敗時: 5分（失敗URLへの再アクセスを抑制）
+OGP_CACHE_MAX_ENTRIES = int(os.environ.get('OGP_CACHE_MAX_ENTRIES', 5000))  # 超過分は最終参照が古い順に削除
+OGP_CACHE_TOUCH_INTERVAL = 600  # 最終参照日時の更新間隔（参照のたびに書き込まないため）
+
+# バックグラウンド取得用スレッドプール（描画中の外部アクセスでワーカーをブロックしないため）
+OGP_PREFETCH_WORKERS = int(os.environ.get('OGP_PREFETCH_WORKERS', 4))
+_prefetch_executor = None
+_prefetch_futures = {}  # URL -> 取得中のFuture（重複取得防止）
+_prefetch_lock = threading.Lock()
+
+# 再検証で304 Not Modifiedが返ったことを示す値
+_NOT_MODIFIED = object()
+
+def _url_hash(url):
+    """キャッシュキー（URLのSHA-256）を生成"""
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+def _cache_session():
+    """キャッシュ専用セッション（リクエスト側のトランザクションを巻き込まないため分離）"""
+    return Session(db.engine, expire_on_commit=False)
+
+def _entry_data(entry):
+    """キャッシュエントリからOGPデータ辞書を取り出す（失敗エントリは空辞書）"""
+    if entry.status != 'ok' or not entry.data:
+        return {}
+    try:
+        return json.loads(entry.data)
+    except ValueError:
+        return {}
+
+def _load_cache_entry(session, url):
+    """キャッシュエントリを取得し、必要なら最終参照日時を更新"""
+    entry = session.execute(
+        select(OGPCache).where(OGPCache.url_hash == _url_hash(url))
+    ).scalar_one_or_none()
+    if entry is None:
+        return None
+    
+    now = datetime.utcnow()
+    if entry.last_accessed_at is None or now - entry.last_accessed_at > timedelta(seconds=OGP_CACHE_TOUCH_INTERVAL):
+        entry.last_accessed_at = now
+        session.commit()
+    return entry
+
+def _save_cache_entry(session, url, ogp_data, etag=None, last_modified=None):
+    """取得結果を保存（ogp_dataがNoneの場合は失敗として短いTTLで保存）"""
+    now = datetime.utcnow()
+    succeeded = ogp_data is not None
+    ttl = OGP_CACHE_DURATION if succeeded else OGP_ERROR_CACHE_DURATION
+    
+    entry = session.execute(
+        select(OGPCache).where(OGPCache.url_hash == _url_hash(url))
+    ).scalar_one_or_none()
+    is_new = entry is None
+    if is_new:
+        entry = OGPCache(url_hash=_url_hash(url), url=url)
+        session.add(entry)
+    
+    entry.status = 'ok' if succeeded else 'error'
+    entry.data = json.dumps(ogp_data, ensure_ascii=False) if succeeded else None
+    entry.etag = etag
+    entry.last_modified = last_modified
+    entry.fetched_at = now
+    entry.expires_at = now + timedelta(seconds=ttl)
+    entry.last_accessed_at = now
+    
+    try:
+        session.commit()
+    except IntegrityError:
+        # 他ワーカーが同じURLを同時に保存した場合はそちらを採用
+        session.rollback()
+        return
+    
+    if is_new:
+        _evict_cache_entries(session)
+
+def _evict_cache_entries(session):
+    """件数上限を超えた分を最終参照日時が古い順に削除（LRU）"""
+    count = session.execute(select(func.count(OGPCache.id))).scalar()
+    excess = count - OGP_CACHE_MAX_ENTRIES
+    if excess <= 0:
+        return
+    
+    stale_ids = select(OGPCache.id).order_by(OGPCache.last_accessed_at.asc()).limit(excess).scalar_subquery()
+    session.execute(delete(OGPCache).where(OGPCache.id.in_(stale_ids)))
+    session.commit()
+    current_app.logger.debug(f"🧹 Evicted {excess} OGP cache entries")
+
+def _extend_cache_entry(session, entry):
+    """304 Not Modified時に既存エントリの有効期限のみ延長"""
+    now = datetime.utcnow()
+    entry.fetched_at = now
+    entry.expires_at = now + timedelta(seconds=OGP_CACHE_DURATION)
+    entry.last_accessed_at = now
+    session.commit()
+
+def clear_ogp_cache():
+    """OGPキャッシュをクリア"""
+    with _cache_session() as session:
+        session.execute(delete(OGPCache))
+        session.commit()
+
+def get_cached_ogp_data(url):
+    """キャッシュ済みのOGPデータを取得（外部アクセスなし、期限切れでも返す）
+    :return: OGPデータ辞書、未取得の場合はNone
+    """
+    try:
+        with _cache_session() as session:
+            entry = _load_cache_entry(session, url)
+            if entry is None:
+                return None
+            return _entry_data(entry)
+    except Exception as e:
+        current_app.logger.error(f"OGP cache read error: {e}")
+        return None
+
+def find_ogp_urls_needing_refresh(urls):
+    """再取得が必要なURL（未取得・期限切れ）を返す（外部アクセスなし、1回のクエリで判定）
+    取得失敗エントリはOGP_ERROR_CACHE_DURATIONで期限切れになるため、その後に再取得対象になる
+    :return: 再取得が必要なURLのリスト（引数の順序を維持）
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return []
+
+    hashes = {url: _url_hash(url) for url in urls}
+    try:
+        with _cache_session() as session:
+            expires = dict(session.execute(
+                select(OGPCache.url_hash, OGPCache.expires_at).where(OGPCache.url_hash.in_(hashes.values()))
+            ).all())
+    except Exception as e:
+        current_app.logger.error(f"OGP cache read error: {e}")
+        return []
+
+    now = datetime.utcnow()
+    return [url for url in urls if hashes[url] not in expires or now >= expires[hashes[url]]]
+
+def _get_prefetch_executor():
+    """先読み用スレッドプールを取得（gunicornのfork後に生成するため遅延初期化）"""
+    global _prefetch_executor
+    with _prefetch_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(
+                max_workers=OGP_PREFETCH_WORKERS,
+                thread_name_prefix='ogp-prefetch'
+            )
+        return _prefetch_executor
+
+def _run_in_app_context(app, func, *args):
+    """バックグラウンドスレッドでアプリケーションコンテキストを設定して実行"""
+    with app.app_context():
+        try:
+            return func(*args)
+        except Exception as e:
+            current_app.logger.error(f"OGP prefetch task error: {e}")
+
+def schedule_ogp_prefetch(urls, on_complete=None):
+    """OGPデータをバックグラウンドで並行取得
+    :param urls: 取得対象URLのリスト
+    :param on_complete: 全URLの取得完了後にアプリケーションコンテキスト内で呼ぶ関数
+    :return: 各URLのFutureのリスト
+    """
+    urls = list(dict.fromkeys(urls))
+    if not urls:
+        return []
+    
+    app = current_app._get_current_object()
+    executor = _get_prefetch_executor()
+    
+    futures = []
+    with _prefetch_lock:
+        for url in urls:
+            future = _prefetch_futures.get(url)
+            if future is None:
+                future = executor.submit(_run_in_app_context, app, fetch_ogp_data, url)
+                _prefetch_futures[url] = future
+                future.add_done_callback(lambda f, url=url: _prefetch_futures.pop(url, None))
+            futures.append(future)
+    
+    current_app.logger.debug(f"📥 OGP prefetch scheduled for {len(urls)} URL(s)")
+    
+    if on_complete:
+        remaining = [len(futures)]
+        
+        def _on_future_done(_future):
+            with _prefetch_lock:
+                remaining[0] -= 1
+                finished = remaining[0] == 0
+            if finished:
+                executor.submit(_run_in_app_context, app, on_complete)
+        
+        for future in futures:
+            future.add_done_callback(_on_future_done)
+    
+    return futures
+
+def fetch_ogp_data(url, force_refresh=False):
+    """URLからOGP（Open Graph Protocol）データを取得（キャッシュ対応、Selenium対応）"""
+    with _cache_session() as session:
+        # force_refreshがTrueの場合はキャッシュをスキップ
+        entry = None
+        if not force_refresh:
+            entry = _load_cache_entry(session, url)
+            if entry is not None and not entry.is_expired():
+                current_app.logger.debug(f"OGP cache hit for: {url[:50]}...")
+                return _entry_data(entry)
+        
+        # Threads URLかどうかを判定
+        is_threads_url = 'threads.com' in url or 'threads.net' in url
+        
+        # 期限切れの取得成功エントリは保存済みのETag/Last-Modifiedで条件付き再取得
+        validators = {}
+        if entry is not None and entry.status == 'ok':
+            validators = {'etag': entry.etag, 'last_modified': entry.last_modified}
+        
+        etag = last_modified = None
+        try:
+            if is_threads_url:
+                # ThreadsにはSeleniumを使用
+                ogp_data = _fetch_threads_ogp_with_selenium(url)
+            else:
+                # 通常のURLには従来の方法を使用
+                ogp_data, etag, last_modified = _fetch_ogp_with_requests(url, **validators)
+        except Exception as e:
+            current_app.logger.error(f"OGP fetch error: {e}")
+            ogp_data = None
+        
+        if ogp_data is _NOT_MODIFIED:
+            current_app.logger.debug(f"OGP not modified, extending cache for: {url[:50]}...")
+            try:
+                _extend_cache_entry(session, entry)
+            except Exception as e:
+                session.rollback()
+                current_app.logger.error(f"OGP cache write error: {e}")
+            return _entry_data(entry)
+        
+        # キャッシュに保存（失敗時も短時間キャッシュ）
+        try:
+            _save_cache_entry(session, url, ogp_data, etag=etag, last_modified=last_modified)
+            current_app.logger.debug(f"OGP data cached for: {url[:50]}...")
+        except Exception as e:
+            session.rollback()
+            current_app.logger.error(f"OGP cache write error: {e}")
+        
+        return ogp_data if ogp_data is not None else {}
+
+# --- HTMLヘッダのストリーミング解析 ---
+
+OGP_HEAD_SIZE_LIMIT = 65536  # 64KB（</head>が見つからない場合の読み取り上限）
+OGP_HEAD_CHUNK_SIZE = 4096
+_HEAD_END_PATTERN = re.compile(rb'</head\s*>|<body[\s>]', re.IGNORECASE)
+_META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([a-zA-Z0-9_.:-]+)', re.IGNORECASE)
+
+def read_html_head(chunks, limit=OGP_HEAD_SIZE_LIMIT):
+    """チャンク列から</head>（または<body>）の手前までを読み取る"""
+    buffer = bytearray()
+    for chunk in chunks:
+        # チャンク境界をまたぐ終了タグも検出できるよう少し手前から探す
+        search_from = max(0, len(buffer) - 8)
+        buffer += chunk
+        match = _HEAD_END_PATTERN.search(buffer, search_from)
+        if match:
+            return bytes(buffer[:match.start()])
+        if len(buffer) >= limit:
+            break
+    return bytes(buffer[:limit])
+
+def _detect_html_encoding(content, content_type=None):
+    """Content-Typeヘッダ、<meta charset>の順に文字コードを判定（既定はUTF-8）"""
+    candidates = []
+    if content_type and 'charset=' in content_type.lower():
+        candidates.append(content_type.lower().split('charset=', 1)[1].split(';')[0].strip(' "\''))
+    match = _META_CHARSET_PATTERN.search(content)
+    if match:
+        candidates.append(match.group(1).decode('ascii', 'ignore'))
+    
+    for encoding in candidates:
+        try:
+            ''.encode(encoding)
+            return encoding
+        except LookupError:
+            continue
+    return 'utf-8'
+
+class _OGPHeadParser(HTMLParser):
+    """<meta>と<title>のみを収集する軽量パーサー"""
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.metas = []
+        self.title_parts = []
+        self._in_title = False
+    
+    def handle_starttag(self, tag, attrs):
+        if tag == 'meta':
+            self.metas.append({key: value or '' for key, value in attrs})
+        elif tag == 'title':
+            self._in_title = True
+    
+    def handle_endtag(self, tag):
+        if tag == 'title':
+            self._in_title = False
+    
+    def handle_data(self, data):
+        if self._in_title:
+            self.title_parts.append(data)
+
+def parse_ogp_head(content, url, content_type=None):
+    """HTMLヘッダ部分のバイト列からOGPデータを抽出"""
+    parser = _OGPHeadParser()
+    parser.feed(content.decode(_detect_html_encoding(content, content_type), errors='replace'))
+    parser.close()
+    
+    ogp_data = {}
+    twitter_data = {}
+    description = None
+    
+    for meta in parser.metas:
+        content_value = meta.get('content', '').strip()
+        if not content_value:
+            continue
+        prop = meta.get('property', '').lower()
+        name = meta.get('name', '').lower()
+        
+        # OGPタグの処理
+        if prop in ('og:title', 'og:description', 'og:image', 'og:site_name', 'og:url'):
+            ogp_data[prop[3:]] = content_value
+        # Twitterカードタグ（フォールバック用）
+        elif name in ('twitter:title', 'twitter:description', 'twitter:image'):
+            twitter_data[name[8:]] = content_value
+        elif name == 'description' and description is None:
+            description = content_value
+    
+    # Twitterカードタグをフォールバックとして使用
+    for key, value in twitter_data.items():
+        if not ogp_data.get(key):
+            ogp_data[key] = value
+    
+    # フォールバック: 通常のmetaタグからも取得
+    if not ogp_data.get('title') and parser.title_parts:
+        ogp_data['title'] = ''.join(parser.title_parts).strip()
+    
+    if not ogp_data.get('description') and description:
+        ogp_data['description'] = description
+    
+    # サイト名がない場合はドメインから推測
+    if not ogp_data.get('site_name'):
+        from urllib.parse import urlparse
+        parsed_url = urlparse(url)
+        domain = parsed_url.netloc.replace('www.', '')
+        ogp_data['site_name'] = domain
+    
+    return ogp_data
+
+def _fetch_ogp_with_requests(url, etag=None, last_modified=None):
+    """通常のHTTPリクエストでOGPデータを取得（高速化版）
+    :param etag: 前回取得時のETag（If-None-Matchとして送信）
+    :param last_modified: 前回取得時のLast-Modified（If-Modified-Sinceとして送信）
+    :return: (OGPデータ辞書, ETag, Last-Modified)、失敗時のOGPデータはNone、未変更時は_NOT_MODIFIED
+    """
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'ja,en-US;q=0.9,en;q=0.8',
+        'Accept-Encoding': 'gzip, deflate'
+    }
+    
+    try:
+        current_app.logger.debug(f"🌐 Fetching OGP for: {url[:50]}...")
+        start_time = time.time()
+        
+        # 条件付きリクエスト（未変更なら304で本文の転送・解析を省略）
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
+        response = requests.get(url, headers=headers, timeout=8, stream=True)
+        if response.status_code == 304:
+            response.close()
+            return _NOT_MODIFIED, etag, last_modified
+        response.raise_for_status()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        
+        # </head>までのみを読み取る（OGPはHTMLヘッダにあるため、最大64KB）
+        content = read_html_head(response.iter_content(chunk_size=OGP_HEAD_CHUNK_SIZE))
+        response.close()
+        
+        ogp_data = parse_ogp_head(content, url, content_type=response.headers.get('Content-Type'))
+        
+        fetch_time = time.time() - start_time
+        current_app.logger.debug(f"✅ OGP fetched in {fetch_time:.2f}s for: {url[:50]}...")
+        
+        return ogp_data, etag, last_modified
+        
+    except requests.exceptions.Timeout:
+        current_app.logger.warning(f"⏰ OGP timeout for: {url[:50]}...")
+        return None, None, None
+    except requests.exceptions.RequestException as e:
+        current_app.logger.warning(f"⚠️ OGP request failed for {url[:50]}...: {e}")
+        return None, None, None
+    except Exception as e:
+        current_app.logger.error(f"❌ OGP fetch error for {url[:50]}...: {e}")
+        return None, None, None
+
+# --- Threads用ヘッドレスブラウザプール ---
+
+THREADS_BROWSER_POOL_SIZE = int(os.environ.get('THREADS_BROWSER_POOL_SIZE', 2))  # ワーカーあたりの最大ブラウザ数
+THREADS_BROWSER_MAX_PAGES = int(os.environ.get('THREADS_BROWSER_MAX_PAGES', 50))  # この回数使ったら作り直す（メモリリーク対策）
+THREADS_BROWSER_ACQUIRE_TIMEOUT = 30  # 空きブラウザ待ちの最大秒数
+THREADS_PAGE_LOAD_TIMEOUT = 15  # ページ読み込み・メタタグ待ちの最大秒数
+
+_chromedriver_path = None
+_chromedriver_lock = threading.Lock()
+
+def _resolve_chromedriver_path():
+    """ChromeDriverの実行ファイルパスを解決（プロセス内で一度だけ実行）"""
+    global _chromedriver_path
+    with _chromedriver_lock:
+        if _chromedriver_path:
+            return _chromedriver_path
+        
+        import stat
+        import glob
+        from webdriver_manager.chrome import ChromeDriverManager
+        
+        base_wdm_path = os.path.expanduser("~/.wdm/drivers/chromedriver")
+        actual_driver_path = None
+        
+        # webdriver-managerを使用してパスを取得
+        try:
+            driver_path = ChromeDriverManager().install()
+            current_app.logger.debug(f"ChromeDriver manager path: {driver_path}")
+            
+            # webdriver-managerが間違ったファイルを返している場合の修正
+            driver_dir = os.path.dirname(driver_path)
+            chromedriver_path = os.path.join(driver_dir, "chromedriver")
+            
+            # 正しいchromedriver実行ファイルを見つける
+            if os.path.exists(chromedriver_path) and os.path.isfile(chromedriver_path):
+                actual_driver_path = chromedriver_path
+            else:
+                # 再帰的にchromedriver実行ファイルを探す
+                pattern = os.path.join(base_wdm_path, "**/chromedriver")
+                for found_driver in glob.glob(pattern, recursive=True):
+                    if os.path.isfile(found_driver):
+                        actual_driver_path = found_driver
+                        break
+            
+            if not actual_driver_path:
+                raise Exception("Could not find valid ChromeDriver executable")
+                
+        except Exception as e:
+            current_app.logger.error(f"ChromeDriverManager failed: {e}")
+            raise Exception("Could not find valid ChromeDriver executable")
+        
+        current_app.logger.debug(f"Actual ChromeDriver path: {actual_driver_path}")
+        
+        # 実行権限を確認・設定
+        if not os.access(actual_driver_path, os.X_OK):
+            os.chmod(actual_driver_path, stat.S_IRUSR | stat.S_IWUSR | stat.S_IXUSR | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH)
+            current_app.logger.debug("Set executable permission for ChromeDriver")
+        
+        _chromedriver_path = actual_driver_path
+        return _chromedriver_path
+
+def _create_chrome_driver():
+    """ヘッドレスChromeを起動"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')  # ヘッドレスモード
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
+    # DOMContentLoadedで制御を戻す（画像等の読み込み完了を待たない）
+    chrome_options.page_load_strategy = 'eager'
+    
+    current_app.logger.debug("🌐 Starting headless Chrome for Threads...")
+    driver = webdriver.Chrome(service=Service(_resolve_chromedriver_path()), options=chrome_options)
+    driver.set_page_load_timeout(THREADS_PAGE_LOAD_TIMEOUT)
+    return driver
+
+class ThreadsBrowserPool:
+    """ヘッドレスChromeの使い回しプール（起動コストを初回のみに抑える）"""
+    
+    def __init__(self, size=THREADS_BROWSER_POOL_SIZE, max_pages=THREADS_BROWSER_MAX_PAGES):
+        self.size = size
+        self.max_pages = max_pages
+        self._idle = queue.LifoQueue()  # (driver, 使用回数)
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        """空きブラウザを取得（無ければ上限まで起動、上限到達時は空きを待つ）"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        
+        if can_create:
+            try:
+                return _create_chrome_driver(), 0
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        
+        return self._idle.get(timeout=THREADS_BROWSER_ACQUIRE_TIMEOUT)
+    
+    def release(self, driver, pages, healthy=True):
+        """ブラウザを返却（上限回数に達したか異常があれば終了させる）"""
+        if healthy and pages < self.max_pages:
+            self._idle.put((driver, pages))
+            return
+        self._discard(driver)
+    
+    def _discard(self, driver):
+        """ブラウザを終了し、枠を空ける"""
+        with self._lock:
+            self._created -= 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+    
+    def shutdown(self):
+        """待機中のブラウザを全て終了"""
+        while True:
+            try:
+                driver, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+_browser_pool = None
+_browser_pool_pid = None
+_browser_pool_lock = threading.Lock()
+
+def get_threads_browser_pool():
+    """プロセスごとのブラウザプールを取得（gunicornのfork後に生成するため遅延初期化）"""
+    global _browser_pool, _browser_pool_pid
+    with _browser_pool_lock:
+        if _browser_pool is None or _browser_pool_pid != os.getpid():
+            _browser_pool = ThreadsBrowserPool()
+            _browser_pool_pid = os.getpid()
+            atexit.register(_browser_pool.shutdown)
+        return _browser_pool
+
+def _fetch_threads_ogp_with_selenium(url):
+    """SeleniumでThreadsのOGPデータを取得（プール済みブラウザを使用）"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    
+    pool = get_threads_browser_pool()
+    driver = None
+    pages = 0
+    healthy = True
+    try:
+        driver, pages = pool.acquire()
+        start_time = time.time()
+        driver.get(url)
+        pages += 1
+        
+        # OGPメタタグが現れた時点で読み取る（固定時間のsleepはしない）
+        current_app.logger.debug("⏳ Waiting for OGP meta tags...")
+        try:
+            WebDriverWait(driver, THREADS_PAGE_LOAD_TIMEOUT).until(
+                EC.presence_of_element_located((By.XPATH, "//meta[contains(@property, 'og:') or contains(@name, 'twitter:')]"))
+            )
+            current_app.logger.debug("✅ OGP meta tags detected")
+        except TimeoutException:
+            current_app.logger.debug("⚠️ OGP meta tags not found, continuing anyway")
+        
+        html = driver.page_source
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        ogp_data = {}
+        
+        # OGPとTwitterカードの情報を取得
+        for tag in soup.find_all('meta'):
+            for attr in ['property', 'name']:
+                if tag.has_attr(attr):
+                    key = tag.get(attr)
+                    content = tag.get('content', '')
+                    if key and content:
+                        if key.startswith('og:'):
+                            if key == 'og:title':
+                                ogp_data['title'] = content
+                            elif key == 'og:description':
+                                ogp_data['description'] = content
+                            elif key == 'og:image':
+                                ogp_data['image'] = content
+                            elif key == 'og:site_name':
+                                ogp_data['site_name'] = content
+                            elif key == 'og:url':
+                                ogp_data['url'] = content
+                        elif key.startswith('twitter:'):
+                            if key == 'twitter:title' and not ogp_data.get('title'):
+                                ogp_data['title'] = content
+                            elif key == 'twitter:description' and not ogp_data.get('description'):
+                                ogp_data['description'] = content
+                            elif key == 'twitter:image' and not ogp_data.get('image'):
+                                ogp_data['image'] = content
+        
+        # フォールバック: HTMLからの基本情報取得
+        if not ogp_data.get('title'):
+            title_tag = soup.find('title')
+            if title_tag:
+                ogp_data['title'] = title_tag.get_text().strip()
+        
+        if not ogp_data.get('description'):
+            desc_tag = soup.find('meta', attrs={'name': 'description'})
+            if desc_tag:
+                content = desc_tag.get('content', '')
+                if content:
+                    ogp_data['description'] = content
+        
+        # Threads特有のフォールバック処理
+        if not ogp_data.get('title') or ogp_data.get('title') == 'Threads':
+            user_match = re.search(r'@([^/]+)/', url)
+            if user_match:
+                username = user_match.group(1)
+                ogp_data['title'] = f"{username} (@{username}) on Threads"
+                if not ogp_data.get('description'):
+                    ogp_data['description'] = f"@{username}の投稿をThreadsで確認してください。"
+                ogp_data['site_name'] = 'Threads'
+        
+        current_app.logger.debug(f"📊 Selenium fetched {len(ogp_data)} meta items for Threads in {time.time() - start_time:.2f}s")
+        return ogp_data
+        
+    except queue.Empty:
+        current_app.logger.warning(f"⏰ No idle browser for Threads URL: {url[:50]}...")
+        return None
+    except Exception as e:
+        # WebDriverの異常時はブラウザを作り直す
+        healthy = not isinstance(e, WebDriverException)
+        current_app.logger.error(f"❌ Selenium fetch failed: {e}")
+        # 失敗として短時間キャッシュ（表示はThreads埋込側でURLから情報を補完）
+        return None
+    finally:
+        if driver:
+            pool.release(driver, pages, healthy=healthy)
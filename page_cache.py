@@ -0,0 +1,246 @@
+"""
+匿名ユーザー向けのページ全体キャッシュ
+未ログインのGETに対するHTMLレスポンスをSQLiteファイルに保存し、全ワーカープロセスで共有する
+記事・カテゴリ・ユーザー・記事一覧の依存タグで無効化し、サイト設定はバージョンをキーに含めて切り替える
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import threading
+from flask import current_app, request, session, g
+from flask_wtf.csrf import generate_csrf
+from http_validators import final_etag, is_not_modified, not_modified_response, set_validators
+
+PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+PAGE_CACHE_PATH = os.environ.get('PAGE_CACHE_PATH', os.path.join(tempfile.gettempdir(), 'miniblog_page_cache.sqlite3'))
+PAGE_CACHE_TTL = int(os.environ.get('PAGE_CACHE_TTL', 3600))  # 秒（タグで無効化されなかった場合の保険）
+PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 5000))
+PAGE_CACHE_EVICT_INTERVAL = 100  # 保存何回ごとに期限切れ・上限超過分を削除するか
+PAGE_CACHE_SCHEMA_VERSION = 3  # テーブル構成を変えたら上げる（古いキャッシュファイルは作り直す）
+
+# キャッシュ対象のエンドポイントと、キーに含めるクエリパラメータ（それ以外のパラメータ付きはキャッシュしない）
+CACHEABLE_ENDPOINTS = {
+    'home': ('cursor',),
+    'category_page': ('page', 'cursor'),
+    'article_detail': (),
+    'profile': (),
+}
+
+# 依存タグ
+TAG_ARTICLE_LIST = 'article_list'  # 記事の追加・削除・公開状態やタイトル等の変更で変わる一覧ページ
+
+# キャッシュ保存時にCSRFトークンを置き換える文字列（配信時にリクエストごとのトークンへ戻す）
+CSRF_PLACEHOLDER = '__PAGE_CACHE_CSRF_TOKEN__'
+
+def article_tag(article_id):
+    return f'article:{article_id}'
+
+def category_tag(category_id):
+    return f'category:{category_id}'
+
+def user_tag(user_id):
+    return f'user:{user_id}'
+
+def article_list_tags(articles):
+    """一覧に表示する記事の著者・カテゴリのタグ（名称変更時に一覧も無効化するため）"""
+    tags = {TAG_ARTICLE_LIST}
+    for article in articles:
+        tags.add(user_tag(article.author_id))
+        tags.update(category_tag(category.id) for category in article.categories)
+    return tags
+
+class PageCacheStore:
+    """ページキャッシュのSQLiteストア（接続はプロセス・スレッドごと）"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            if conn.execute('PRAGMA user_version').fetchone()[0] != PAGE_CACHE_SCHEMA_VERSION:
+                self._create_schema(conn)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    @staticmethod
+    def _create_schema(conn):
+        for table in ('pages', 'page_tags', 'tag_invalidations'):
+            conn.execute(f'DROP TABLE IF EXISTS {table}')
+        conn.execute('CREATE TABLE pages ('
+                     'key TEXT PRIMARY KEY, status INTEGER, content_type TEXT, body BLOB, '
+                     'etag TEXT, etag_with_csrf INTEGER, '
+                     'created_at REAL, expires_at REAL)')
+        conn.execute('CREATE TABLE page_tags ('
+                     'tag TEXT, key TEXT, PRIMARY KEY (tag, key)) WITHOUT ROWID')
+        conn.execute('CREATE TABLE tag_invalidations ('
+                     'tag TEXT PRIMARY KEY, invalidated_at REAL) WITHOUT ROWID')
+        conn.execute('CREATE INDEX ix_page_tags_key ON page_tags (key)')
+        conn.execute('CREATE INDEX ix_pages_expires_at ON pages (expires_at)')
+        conn.execute(f'PRAGMA user_version = {PAGE_CACHE_SCHEMA_VERSION}')
+
+    def get(self, key):
+        """有効なエントリを (status, content_type, body, etag, etag_with_csrf) で取得"""
+        row = self._connect().execute(
+            'SELECT status, content_type, body, etag, etag_with_csrf FROM pages '
+            'WHERE key = ? AND expires_at > ?',
+            (key, time.time())
+        ).fetchone()
+        return row
+
+    def set(self, key, status, content_type, body, tags, ttl, rendered_since,
+            etag=None, etag_with_csrf=False):
+        """エントリを保存（描画開始 rendered_since 以降にタグが無効化されていれば古い内容のため保存しない）"""
+        conn = self._connect()
+        tags = list(tags)
+        placeholders = ','.join('?' * len(tags))
+        now = time.time()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            invalidated = conn.execute(
+                f'SELECT 1 FROM tag_invalidations WHERE tag IN ({placeholders}) AND invalidated_at >= ? LIMIT 1',
+                (*tags, rendered_since)
+            ).fetchone()
+            if invalidated:
+                return False
+            conn.execute('DELETE FROM page_tags WHERE key = ?', (key,))
+            conn.execute('INSERT OR REPLACE INTO pages (key, status, content_type, body, etag, etag_with_csrf, '
+                         'created_at, expires_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                         (key, status, content_type, body, etag, int(etag_with_csrf), now, now + ttl))
+            conn.executemany('INSERT OR IGNORE INTO page_tags (tag, key) VALUES (?, ?)',
+                             [(tag, key) for tag in tags])
+        self._writes += 1
+        if self._writes % PAGE_CACHE_EVICT_INTERVAL == 0:
+            self.evict()
+        return True
+
+    def invalidate_tags(self, tags):
+        """タグに依存するエントリを削除し、削除件数を返す"""
+        conn = self._connect()
+        tags = list(tags)
+        placeholders = ','.join('?' * len(tags))
+        now = time.time()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany('INSERT OR REPLACE INTO tag_invalidations (tag, invalidated_at) VALUES (?, ?)',
+                             [(tag, now) for tag in tags])
+            keys = [row[0] for row in conn.execute(
+                f'SELECT DISTINCT key FROM page_tags WHERE tag IN ({placeholders})', tags)]
+            conn.executemany('DELETE FROM pages WHERE key = ?', [(key,) for key in keys])
+            conn.executemany('DELETE FROM page_tags WHERE key = ?', [(key,) for key in keys])
+        return len(keys)
+
+    def evict(self):
+        """期限切れのエントリと、上限を超えた古いエントリを削除"""
+        conn = self._connect()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute('DELETE FROM pages WHERE expires_at <= ?', (time.time(),))
+            conn.execute('DELETE FROM pages WHERE key IN (SELECT key FROM pages ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+                         (PAGE_CACHE_MAX_ENTRIES,))
+            conn.execute('DELETE FROM page_tags WHERE key NOT IN (SELECT key FROM pages)')
+            # 描画中のページとの競合判定に使うだけなので、十分古い無効化記録は不要
+            conn.execute('DELETE FROM tag_invalidations WHERE invalidated_at <= ?', (time.time() - 3600,))
+
+_store = PageCacheStore(PAGE_CACHE_PATH)
+
+def _settings_version():
+    from models import SiteSetting
+    return SiteSetting.get_version()
+
+def _is_anonymous_request():
+    """ログインしておらず、表示待ちのフラッシュメッセージも無いリクエストか（DBを参照せずセッションのみで判定）"""
+    if '_user_id' in session or '_flashes' in session:
+        return False
+    return current_app.config.get('REMEMBER_COOKIE_NAME', 'remember_token') not in request.cookies
+
+def get_cache_key():
+    """このリクエストのキャッシュキー（キャッシュ対象外ならNone）"""
+    if not PAGE_CACHE_ENABLED or request.method != 'GET':
+        return None
+    allowed_args = CACHEABLE_ENDPOINTS.get(request.endpoint)
+    if allowed_args is None or any(name not in allowed_args for name in request.args):
+        return None
+    if not _is_anonymous_request():
+        return None
+    args = '&'.join(f"{name}={request.args[name]}" for name in sorted(request.args))
+    raw = f"{_settings_version()}|{request.host}|{request.path}?{args}"
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+def add_page_cache_tags(*tags):
+    """表示中のページの依存タグを追加（ビューから呼び出す）"""
+    g.setdefault('page_cache_tags', set()).update(tags)
+
+def serve_cached_page():
+    """キャッシュ済みのページがあればレスポンスを返す（before_requestから呼び出す）"""
+    try:
+        key = get_cache_key()
+        g.page_cache_key = key
+        g.page_cache_started_at = time.time()
+        if key is None:
+            return None
+        row = _store.get(key)
+    except Exception as e:
+        current_app.logger.warning(f"⚠️ Page cache read error: {e}")
+        g.page_cache_key = None
+        return None
+    if row is None:
+        return None
+
+    status, content_type, body, base_etag, etag_with_csrf = row
+    g.page_cache_key = None
+    etag = final_etag(base_etag, bool(etag_with_csrf)) if base_etag else None
+    if etag and is_not_modified(etag):
+        response = not_modified_response(etag)
+    else:
+        html = body.decode('utf-8')
+        if CSRF_PLACEHOLDER in html:
+            html = html.replace(CSRF_PLACEHOLDER, generate_csrf())
+        response = current_app.response_class(html, status=status, content_type=content_type)
+        if base_etag:
+            # 初回訪問ではここでセッションにCSRFトークンが作られるため、送信するETagは置き換え後に計算
+            set_validators(response, final_etag(base_etag, bool(etag_with_csrf)))
+    response.headers['X-Page-Cache'] = 'HIT'
+    return response
+
+def store_page(response):
+    """キャッシュ対象のレスポンスを保存（after_requestから呼び出す）"""
+    key = g.get('page_cache_key')
+    tags = g.get('page_cache_tags')
+    if not key or not tags or response.status_code != 200 or response.direct_passthrough:
+        return response
+    if not response.mimetype == 'text/html' or '_flashes' in session:
+        return response
+    try:
+        html = response.get_data(as_text=True)
+        csrf_token = g.get(current_app.config.get('WTF_CSRF_FIELD_NAME', 'csrf_token'))
+        if csrf_token:
+            html = html.replace(csrf_token, CSRF_PLACEHOLDER)
+        stored = _store.set(key, response.status_code, response.content_type, html.encode('utf-8'),
+                            tags, PAGE_CACHE_TTL, g.page_cache_started_at,
+                            etag=g.get('page_etag'), etag_with_csrf=g.get('page_etag_with_csrf', False))
+        response.headers['X-Page-Cache'] = 'MISS' if stored else 'SKIP'
+    except Exception as e:
+        current_app.logger.warning(f"⚠️ Page cache write error: {e}")
+    return response
+
+def invalidate_page_cache(*tags):
+    """依存タグに紐づくキャッシュを削除（更新系の処理でコミット後に呼び出す）"""
+    if not PAGE_CACHE_ENABLED or not tags:
+        return
+    try:
+        count = _store.invalidate_tags(tags)
+        current_app.logger.debug(f"Page cache invalidated: tags={sorted(tags)} entries={count}")
+    except Exception as e:
+        current_app.logger.error(f"❌ Page cache invalidation error: {e}")
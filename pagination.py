@@ -0,0 +1,122 @@
+"""
+記事一覧のページネーション
+OFFSET + COUNT(*) を使う従来方式（db.paginate）と、(created_at, id) をキーにしたキーセット方式を提供
+キーセット方式は ARTICLE_PAGINATION_MODE=keyset で有効化
+"""
+import os
+import base64
+import binascii
+from datetime import datetime
+from sqlalchemy import and_, or_
+from models import db, Article
+
+PAGINATION_MODE = os.environ.get('ARTICLE_PAGINATION_MODE', 'offset')  # 'offset' / 'keyset'
+
+def encode_cursor(created_at, article_id):
+    """(created_at, id) をURLに載せられる文字列に変換"""
+    raw = f"{created_at.isoformat()}|{article_id}".encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """カーソル文字列を (created_at, id) に戻す（不正な値はNone）"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        created_at, article_id = raw.split('|', 1)
+        return datetime.fromisoformat(created_at), int(article_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        return None
+
+def _order_by_key(query):
+    return query.order_by(Article.created_at.desc(), Article.id.desc())
+
+class KeysetPagination:
+    """(created_at, id) の降順で並ぶ記事一覧の1ページ（テンプレートからは db.paginate の結果と同様に扱える）
+
+    cursor は前ページ最後の記事のキー。cursor が無い2ページ目以降は、
+    境界のキーだけをインデックス上で求めてから同じくシークする（件数の COUNT(*) は行わない）
+    境界の探索は (created_at, id) 列だけをインデックス上で読み飛ばすため、ブックマーク等の深い /page/N も本文を読まずに表示できる。
+    前後のページへのリンクには next_cursor / prev_cursor を付けるため、リンクを辿る限りページ番号に比例するOFFSETは使わない
+    """
+
+    total = None
+    pages = None
+
+    def __init__(self, query, page, per_page, cursor=None, options=()):
+        self.page = max(page, 1)
+        self.per_page = per_page
+
+        after = decode_cursor(cursor)
+        if after is None and self.page > 1:
+            after = self._find_page_boundary(query)
+
+        self.items = []
+        self.has_next = False
+        self.next_cursor = None
+        self.prev_cursor = None
+        if after is None and self.page > 1:
+            # 境界が見つからない＝記事数を超えたページ
+            return
+
+        page_query = query
+        if after is not None:
+            created_at, article_id = after
+            page_query = page_query.where(or_(
+                Article.created_at < created_at,
+                and_(Article.created_at == created_at, Article.id < article_id)
+            ))
+
+        # 1件多く取得して次ページの有無を判定
+        rows = db.session.execute(
+            _order_by_key(page_query).options(*options).limit(per_page + 1)
+        ).scalars().all()
+        self.items = rows[:per_page]
+        self.has_next = len(rows) > per_page
+        self.next_cursor = encode_cursor(self.items[-1].created_at, self.items[-1].id) if self.has_next else None
+        if self.items and self.page > 2:
+            self.prev_cursor = self._find_prev_cursor(query, self.items[0])
+
+    def _find_page_boundary(self, query):
+        """前ページ最後の記事のキーを (created_at, id) 列だけで求める"""
+        boundary_query = _order_by_key(query.with_only_columns(Article.created_at, Article.id))
+        row = db.session.execute(
+            boundary_query.offset((self.page - 1) * self.per_page - 1).limit(1)
+        ).first()
+        return tuple(row) if row else None
+
+    def _find_prev_cursor(self, query, first_item):
+        """前ページのcursor（前ページ最初の記事の1件前のキー）を、このページの先頭から per_page 件遡って求める"""
+        boundary_query = query.with_only_columns(Article.created_at, Article.id).where(or_(
+            Article.created_at > first_item.created_at,
+            and_(Article.created_at == first_item.created_at, Article.id > first_item.id)
+        )).order_by(Article.created_at.asc(), Article.id.asc())
+        row = db.session.execute(boundary_query.offset(self.per_page).limit(1)).first()
+        return encode_cursor(*row) if row else None
+
+    @property
+    def has_prev(self):
+        return self.page > 1
+
+    @property
+    def prev_num(self):
+        return self.page - 1 if self.has_prev else None
+
+    @property
+    def next_num(self):
+        return self.page + 1 if self.has_next else None
+
+def paginate_articles(query, page, per_page, cursor=None, options=()):
+    """記事一覧を設定されたモードでページ分割（query は並び順・ローダー設定を付けない select(Article)）"""
+    if PAGINATION_MODE == 'keyset':
+        return KeysetPagination(query, page, per_page, cursor=cursor, options=options)
+
+    pagination = db.paginate(
+        _order_by_key(query).options(*options),
+        page=page,
+        per_page=per_page,
+        error_out=False
+    )
+    pagination.next_cursor = None
+    pagination.prev_cursor = None
+    return pagination
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+アクセスログ一括分析スクリプト
+access.log とローテーション済みのバックアップ（access.log.1 〜）全体を複数プロセスで分析し、概要を表示する
+
+例:
+    python scripts/analyze_access_logs.py
+    python scripts/analyze_access_logs.py --workers 8 --output report.json
+    python scripts/analyze_access_logs.py --compare   # 1プロセスとの処理時間・結果の比較
+"""
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from access_log_analyzer import AccessLogAnalyzer, PARALLEL_CHUNK_SIZE
+from access_logger import ACCESS_LOG_PATH
+
+def run(log_file, include_rotated, workers, chunk_size):
+    """分析を実行し、アナライザーと処理時間（秒）を返す"""
+    analyzer = AccessLogAnalyzer(log_file)
+    start = time.perf_counter()
+    analyzer.analyze_logs_parallel(include_rotated=include_rotated, workers=workers, chunk_size=chunk_size)
+    return analyzer, time.perf_counter() - start
+
+def print_summary(analyzer, elapsed):
+    stats = analyzer.stats
+    total_bytes = sum(os.path.getsize(path) for path in analyzer.analyzed_files)
+    print(f"対象ファイル: {', '.join(analyzer.analyzed_files)}")
+    print(f"処理時間: {elapsed:.2f}秒 ({total_bytes / 1024 / 1024 / elapsed:.1f}MB/秒, {stats['total_requests'] / elapsed:,.0f}行/秒)")
+    print(f"リクエスト数: {stats['total_requests']:,}  ユニークIP: {stats['unique_ips']:,}"
+          f"{' (近似値を含む)' if stats.get('approximate') else ''}")
+    print(f"期間: {stats['analysis_period']['start']} 〜 {stats['analysis_period']['end']}")
+    print("上位ページ:")
+    for path, count in list(stats['top_pages'].items())[:10]:
+        print(f"  {count:>10,}  {path}")
+
+def main():
+    parser = argparse.ArgumentParser(description='アクセスログ一括分析')
+    parser.add_argument('log_file', nargs='?', default=ACCESS_LOG_PATH, help='ログファイル（バックアップは同じディレクトリから検出）')
+    parser.add_argument('--workers', type=int, help='プロセス数（省略時はCPUコア数）')
+    parser.add_argument('--chunk-mb', type=int, default=PARALLEL_CHUNK_SIZE // 1024 // 1024, help='1タスクあたりのサイズ（MB）')
+    parser.add_argument('--no-rotated', action='store_true', help='バックアップを含めない')
+    parser.add_argument('--output', help='レポートをJSONで保存')
+    parser.add_argument('--compare', action='store_true', help='1プロセスでも実行し、処理時間と結果を比較')
+    args = parser.parse_args()
+
+    chunk_size = args.chunk_mb * 1024 * 1024
+    include_rotated = not args.no_rotated
+    analyzer, elapsed = run(args.log_file, include_rotated, args.workers, chunk_size)
+    print_summary(analyzer, elapsed)
+
+    if args.compare:
+        serial, serial_elapsed = run(args.log_file, include_rotated, 1, chunk_size)
+        same = all(serial.stats[key] == analyzer.stats[key] for key in (
+            'total_requests', 'bot_requests', 'admin_requests', 'static_requests',
+            'status_codes', 'methods', 'hourly_stats', 'daily_stats'))
+        print(f"{'✅' if same else '❌'} 1プロセス: {serial_elapsed:.2f}秒 → 並列: {elapsed:.2f}秒 (×{serial_elapsed / elapsed:.2f}, {os.cpu_count()}コア)")
+
+    if args.output:
+        analyzer.export_stats_json(args.output)
+        print(f"レポートを {args.output} に保存しました。")
+
+if __name__ == "__main__":
+    main()
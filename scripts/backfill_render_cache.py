@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+記事本文のレンダリングキャッシュを一括生成するスクリプト
+マイグレーション適用後や RENDERER_VERSION 変更後に実行
+OGPデータはここで同期取得するため、生成されるHTMLにプレースホルダーは残らない
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app, db
+from models import Article
+from article_renderer import render_article_body, is_render_cache_valid, extract_ogp_urls
+from ogp_fetcher import fetch_ogp_data
+from sqlalchemy import select
+
+def backfill_render_cache():
+    """キャッシュが無い・古い記事の本文HTMLを生成"""
+    with app.app_context():
+        articles = db.session.execute(select(Article).order_by(Article.id)).scalars().all()
+        
+        updated_count = 0
+        
+        for article in articles:
+            if is_render_cache_valid(article):
+                continue
+            for url in extract_ogp_urls(article.body):
+                fetch_ogp_data(url)
+            render_article_body(article)
+            updated_count += 1
+            print(f"Article {article.id}: {article.title}")
+        
+        if updated_count > 0:
+            db.session.commit()
+            print(f"\n{updated_count}件の記事のレンダリングキャッシュを生成しました。")
+        else:
+            print("更新が必要な記事はありませんでした。")
+
+if __name__ == "__main__":
+    backfill_render_cache()
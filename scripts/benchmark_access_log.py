@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+アクセスログ記録のベンチマークスクリプト
+リクエストごとにファイルを開いて追記する従来方式と、キューに積んでバックグラウンドで書き込む方式の
+リクエスト処理側の所要時間を比較し、複数プロセスから書き込んだ場合のローテーション後の行数を確認する
+"""
+import sys
+import os
+import time
+import tempfile
+import argparse
+import multiprocessing
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE = ('203.0.113.10', 'GET', '/article/sample-article/', 'HTTP/1.1', 200, 23658, '-',
+          'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36')
+
+def legacy_log(path, remote_addr, method, request_path, protocol, status, content_length, referrer, user_agent):
+    """従来方式: 1行ごとにopen→write→close"""
+    log_entry = f'{remote_addr} - - [{datetime.now().strftime("%d/%b/%Y:%H:%M:%S %z")}] "{method} {request_path} {protocol}" {status} {content_length} "{referrer}" "{user_agent}"'
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(log_entry + '\n')
+
+def benchmark(func, iterations):
+    """1回あたりの平均処理時間（マイクロ秒）を計測"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1_000_000
+
+def count_lines(path, backup_count):
+    total = 0
+    for name in [path] + [f"{path}.{index}" for index in range(1, backup_count + 1)]:
+        if os.path.exists(name):
+            with open(name, 'rb') as f:
+                total += sum(1 for _ in f)
+    return total
+
+def worker_process(lines):
+    import access_logger
+    for _ in range(lines):
+        access_logger.log_access(*SAMPLE)
+    access_logger.flush_access_log()
+
+def main():
+    parser = argparse.ArgumentParser(description='アクセスログ記録のベンチマーク')
+    parser.add_argument('--iterations', type=int, default=100000, help='計測回数')
+    parser.add_argument('--processes', type=int, default=4, help='ローテーション確認に使うプロセス数')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        # 計測用のログファイルに向けてからインポート（ローテーションを起こすためサイズ上限を小さくする）
+        os.environ['ACCESS_LOG_PATH'] = os.path.join(workdir, 'access.log')
+        os.environ['ACCESS_LOG_MAX_BYTES'] = str(1024 * 1024)
+        os.environ['ACCESS_LOG_BACKUP_COUNT'] = '50'
+        import access_logger
+
+        legacy_path = os.path.join(workdir, 'legacy_access.log')
+        legacy_us = benchmark(lambda: legacy_log(legacy_path, *SAMPLE), args.iterations)
+        queued_us = benchmark(lambda: access_logger.log_access(*SAMPLE), args.iterations)
+        start = time.perf_counter()
+        access_logger.flush_access_log()
+        drain_ms = (time.perf_counter() - start) * 1000
+
+        print(f"リクエストごとの記録時間（{args.iterations}回の平均）")
+        print(f"  従来方式（open/append）: {legacy_us:8.2f} µs")
+        print(f"  キュー方式              : {queued_us:8.2f} µs  (×{legacy_us / queued_us:.1f})")
+        print(f"  終了時の残り書き込み    : {drain_ms:8.1f} ms")
+
+        written = count_lines(access_logger.ACCESS_LOG_PATH, access_logger.ACCESS_LOG_BACKUP_COUNT)
+        print(f"  書き込まれた行数        : {written}/{args.iterations}")
+
+        # 複数プロセスから同時に書き込み、ローテーションで行が失われないことを確認
+        for name in os.listdir(workdir):
+            os.remove(os.path.join(workdir, name))
+        per_process = args.iterations // args.processes
+        processes = [multiprocessing.Process(target=worker_process, args=(per_process,))
+                     for _ in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        written = count_lines(access_logger.ACCESS_LOG_PATH, access_logger.ACCESS_LOG_BACKUP_COUNT)
+        rotated = sum(1 for name in os.listdir(workdir) if name.startswith('access.log.') and name[11:].isdigit())
+        mark = '✅' if written == per_process * args.processes else '❌'
+        print(f"{mark} {args.processes}プロセス同時書き込み: {written}/{per_process * args.processes}行, ローテーション後のファイル{rotated}個")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+記事一覧クエリのベンチマークスクリプト
+全列を読み込む従来方式と、本文等の大きなテキスト列を遅延させる方式で
+1ページ分の取得時間と読み込みバイト数を比較
+既定では一時的なSQLiteに長文記事を生成して計測（--database-url で既存DBも指定可能、その場合は記事を生成しない）
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='記事一覧クエリのベンチマーク')
+    parser.add_argument('--articles', type=int, default=10000, help='生成する記事数')
+    parser.add_argument('--body-kb', type=int, default=20, help='生成する記事本文のサイズ（KB）')
+    parser.add_argument('--iterations', type=int, default=50, help='計測回数')
+    parser.add_argument('--database-url', help='計測対象のDB（省略時は一時SQLiteを生成）')
+    return parser.parse_args()
+
+args = parse_args()
+temp_dir = None
+if args.database_url:
+    os.environ['DATABASE_URL'] = args.database_url
+else:
+    temp_dir = tempfile.TemporaryDirectory()
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(temp_dir.name, 'benchmark.db')}"
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, insert, inspect
+from app import app, db
+from models import User, Article
+
+def generate_articles(count, body_kb):
+    """長文記事を一括生成"""
+    paragraph = 'これは一覧クエリのベンチマーク用の長い本文です。' * 10 + '\n\n'
+    body = paragraph * max(1, (body_kb * 1024) // len(paragraph.encode('utf-8')))
+    ext_json = '{"source": "benchmark", "meta": "' + 'x' * 2048 + '"}'
+    user = User(name='benchmark', email='benchmark@example.com', handle_name='benchmark',
+                password_hash='!', role='author')
+    db.session.add(user)
+    db.session.flush()
+
+    base_time = datetime.utcnow()
+    rows = [{
+        'title': f'ベンチマーク記事 {i}',
+        'slug': f'benchmark-{i}',
+        'summary': f'ベンチマーク記事 {i} の概要',
+        'body': body,
+        'legacy_body_backup': body,
+        'ext_json': ext_json,
+        'rendered_body_html': f'<p>{body}</p>',
+        'rendered_excerpt': body[:500],
+        'author_id': user.id,
+        'is_published': True,
+        'created_at': base_time - timedelta(minutes=i),
+    } for i in range(count)]
+    for start in range(0, count, 1000):
+        db.session.execute(insert(Article), rows[start:start + 1000])
+    db.session.commit()
+
+def loaded_bytes(articles):
+    """ORMが読み込んだ列値のバイト数"""
+    total = 0
+    for article in articles:
+        for value in inspect(article).dict.values():
+            if isinstance(value, str):
+                total += len(value.encode('utf-8'))
+    return total
+
+def fetch_page(options, per_page, page):
+    """公開記事一覧の1ページを取得"""
+    query = (select(Article).options(*options)
+             .where(Article.is_published.is_(True))
+             .order_by(Article.created_at.desc())
+             .limit(per_page).offset((page - 1) * per_page))
+    articles = db.session.execute(query).scalars().all()
+    size = loaded_bytes(articles)
+    db.session.expunge_all()
+    return size
+
+def benchmark(options, per_page, page, iterations):
+    """1回あたりの平均処理時間（ミリ秒）と読み込みバイト数を計測"""
+    size = fetch_page(options, per_page, page)  # ウォームアップ
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fetch_page(options, per_page, page)
+    return (time.perf_counter() - start) / iterations * 1000, size
+
+def main():
+    with app.app_context():
+        if temp_dir is not None:
+            db.create_all()
+            print(f"{args.articles}件の記事（本文 約{args.body_kb}KB）を生成中...")
+            generate_articles(args.articles, args.body_kb)
+
+        for per_page, page in ((10, 1), (10, 100), (50, 1)):
+            full_ms, full_bytes = benchmark((), per_page, page, args.iterations)
+            deferred_ms, deferred_bytes = benchmark(Article.list_column_options(), per_page, page, args.iterations)
+            print(f"{per_page:3d}件/ページ p{page:<4d}: 全列 {full_ms:8.3f} ms {full_bytes / 1024:9.1f}KB"
+                  f" / 遅延 {deferred_ms:8.3f} ms {deferred_bytes / 1024:7.1f}KB"
+                  f"（{full_ms / deferred_ms:.1f}倍, 転送量 {deferred_bytes / max(full_bytes, 1):.1%}）")
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+アクセスログのパース処理のベンチマークスクリプト
+1行ごとに全パターンを順に試してstrptimeで日時を変換する従来方式と、
+フォーマットを1回判定して固定し、日時を固定位置の切り出しで変換する方式の処理速度（行/秒）を比較
+"""
+import sys
+import os
+import re
+import time
+import random
+import argparse
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from access_log_analyzer import AccessLogAnalyzer, LogStats, FORMAT_SAMPLE_LINES
+
+PATHS = ['/', '/article/hello-world/', '/category/tech/?page=2', '/static/css/style.css', '/admin/', '/search?q=flask']
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+]
+
+def build_lines(log_format, count):
+    """指定フォーマットの合成ログ行（1秒あたり数行のアクセスを想定）"""
+    rng = random.Random(0)
+    lines = []
+    for index in range(count):
+        second = index // 4
+        timestamp = f"18/Oct/2026:{second // 3600 % 24:02d}:{second // 60 % 60:02d}:{second % 60:02d} +0900"
+        ip = f"198.51.100.{rng.randint(1, 254)}"
+        request = f"GET {rng.choice(PATHS)} HTTP/1.1"
+        status = rng.choice((200, 200, 200, 304, 404))
+        if log_format == 'combined':
+            lines.append(f'{ip} - - [{timestamp}] "{request}" {status} {rng.randint(200, 30000)} "-" "{rng.choice(USER_AGENTS)}"')
+        elif log_format == 'common':
+            lines.append(f'{ip} - - [{timestamp}] "{request}" {status} {rng.randint(200, 30000)}')
+        else:
+            lines.append(f'2026-10-18 {second // 3600 % 24:02d}:{second // 60 % 60:02d}:{second % 60:02d},{index % 1000:03d} '
+                         f'INFO in app: {ip} - - [{timestamp}] "{request}" {status} -')
+    return lines
+
+class LegacyParser(AccessLogAnalyzer):
+    """従来方式: 毎行すべてのパターンを順に試し、strptime・urlparseで変換"""
+
+    def _parse_log_line(self, line):
+        for pattern_name, pattern in self.log_patterns.items():
+            match = pattern.match(line)
+            if match:
+                entry = match.groupdict()
+                entry['pattern'] = pattern_name
+                entry['parsed_datetime'] = self._legacy_datetime(entry.get('datetime', ''), pattern_name)
+                if 'path' in entry:
+                    parsed = urlparse(entry['path'])
+                    entry['path_clean'], entry['query_params'] = parsed.path, parse_qs(parsed.query) if parsed.query else {}
+                return entry
+        ip_match = re.compile(r'\b(?:[0-9]{1,3}\.){3}[0-9]{1,3}\b').search(line)
+        return {'ip': ip_match.group() if ip_match else 'unknown', 'pattern': 'fallback'}
+
+    @staticmethod
+    def _legacy_datetime(datetime_str, pattern_name):
+        if pattern_name == 'flask':
+            return datetime.strptime(datetime_str.split(',')[0], '%Y-%m-%d %H:%M:%S')
+        return datetime.strptime(datetime_str, '%d/%b/%Y:%H:%M:%S %z').replace(tzinfo=None)
+
+def benchmark(parser, lines):
+    """パースと集計を合わせた処理速度（行/秒）"""
+    log_stats = LogStats()
+    start = time.perf_counter()
+    for line in lines:
+        log_stats.add(parser._parse_log_line(line))
+    return len(lines) / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description='アクセスログのパース処理のベンチマーク')
+    parser.add_argument('--lines', type=int, default=200000, help='フォーマットごとの行数')
+    args = parser.parse_args()
+
+    for log_format in ('combined', 'common', 'flask'):
+        lines = build_lines(log_format, args.lines)
+        legacy = LegacyParser('-')
+        fast = AccessLogAnalyzer('-')
+        detected = fast.detect_format(lines[-FORMAT_SAMPLE_LINES:])
+
+        # パース結果が一致するか
+        sample = lines[::max(len(lines) // 1000, 1)]
+        same = all(legacy._parse_log_line(line) == fast._parse_log_line(line) for line in sample)
+
+        legacy_rate = benchmark(legacy, lines)
+        fast_rate = benchmark(fast, lines)
+        print(f"{'✅' if same else '❌'} {log_format:<8} (判定: {detected}) "
+              f"従来 {legacy_rate:>10,.0f} 行/秒 → 固定パターン {fast_rate:>10,.0f} 行/秒 (×{fast_rate / legacy_rate:.2f})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+アクセスログ末尾読み込みのベンチマークスクリプト
+合成したアクセスログ（デフォルト1GB）から最新N行を取り出す処理について、
+ファイル全体をreadlinesしてスライスする従来方式と、EOFからブロック単位で逆順に読む方式の
+処理時間と最大メモリ使用量（子プロセスのmaxrssの増分）を比較する
+--full を指定するとファイル全体の分析（行数によらずメモリ使用量が一定であること）も計測する
+"""
+import sys
+import os
+import time
+import random
+import resource
+import tempfile
+import argparse
+import multiprocessing
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from access_log_analyzer import AccessLogAnalyzer, tail_lines
+
+PATHS = ['/', '/article/hello-world/', '/category/tech/', '/static/css/style.css', '/admin/', '/login', '/nope']
+USER_AGENTS = [
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Mobile/15E148',
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+]
+
+def generate_log(path, size_mb):
+    """Combined Log Format の合成ログを指定サイズまで書き込む（1MB分の行を作って繰り返す）"""
+    rng = random.Random(0)
+    lines = []
+    chunk_size = 0
+    while chunk_size < 1024 * 1024:
+        line = (f'198.51.100.{rng.randint(1, 254)} - - [18/Oct/2026:{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00 +0900] '
+                f'"GET {rng.choice(PATHS)} HTTP/1.1" {rng.choice((200, 200, 200, 304, 404))} {rng.randint(200, 30000)} '
+                f'"-" "{rng.choice(USER_AGENTS)}"\n')
+        lines.append(line)
+        chunk_size += len(line)
+    chunk = ''.join(lines).encode('utf-8')
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(chunk)
+
+def legacy_tail(path, max_lines):
+    """従来方式: ファイル全体をreadlinesしてから末尾をスライス"""
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        lines = f.readlines()
+    return [line.strip() for line in lines[-max_lines:]][::-1]
+
+def streaming_tail(path, max_lines):
+    """逆順ブロック読み込み方式"""
+    return list(tail_lines(path, max_lines))
+
+def analyze(path, max_lines):
+    """管理画面と同じ分析処理全体"""
+    analyzer = AccessLogAnalyzer(path)
+    return analyzer.analyze_logs(max_lines=max_lines)['total_requests']
+
+def _measure(func, path, max_lines, results):
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    value = func(path, max_lines)
+    elapsed = time.perf_counter() - start
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.put((elapsed, (after - before) / 1024, value))
+
+def measure(func, path, max_lines):
+    """別プロセスで実行し、処理時間（秒）・maxrss増分（MB）・戻り値を返す"""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_measure, args=(func, path, max_lines, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description='アクセスログ末尾読み込みのベンチマーク')
+    parser.add_argument('--size-mb', type=int, default=1024, help='合成ログのサイズ（MB）')
+    parser.add_argument('--lines', type=int, default=1000, help='読み込む末尾の行数')
+    parser.add_argument('--log-file', help='合成せずに既存のログファイルを使う')
+    parser.add_argument('--full', action='store_true', help='ファイル全体の分析も計測する')
+    parser.add_argument('--skip-legacy', action='store_true', help='従来方式を計測しない（メモリ不足の環境向け）')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = args.log_file
+        if path is None:
+            path = os.path.join(workdir, 'access.log')
+            start = time.perf_counter()
+            generate_log(path, args.size_mb)
+            print(f"合成ログ生成: {os.path.getsize(path) / 1024 / 1024:.0f}MB ({time.perf_counter() - start:.1f}秒)")
+
+        print(f"末尾{args.lines}行の読み込み")
+        streaming_seconds, streaming_mb, streaming_lines = measure(streaming_tail, path, args.lines)
+        if not args.skip_legacy:
+            legacy_seconds, legacy_mb, legacy_lines = measure(legacy_tail, path, args.lines)
+            mark = '✅' if legacy_lines == streaming_lines else '❌'
+            print(f"  従来方式（readlines）: {legacy_seconds * 1000:10.1f} ms  maxrss +{legacy_mb:8.1f} MB")
+            print(f"  逆順ブロック読み込み : {streaming_seconds * 1000:10.1f} ms  maxrss +{streaming_mb:8.1f} MB")
+            print(f"{mark} 取り出した行の一致: {len(streaming_lines)}行")
+        else:
+            print(f"  逆順ブロック読み込み : {streaming_seconds * 1000:10.1f} ms  maxrss +{streaming_mb:8.1f} MB")
+
+        analyze_seconds, analyze_mb, total = measure(analyze, path, args.lines)
+        print(f"analyze_logs(max_lines={args.lines}): {analyze_seconds * 1000:.1f} ms  maxrss +{analyze_mb:.1f} MB ({total}件)")
+
+        if args.full:
+            analyze_seconds, analyze_mb, total = measure(analyze, path, None)
+            print(f"analyze_logs(ファイル全体): {analyze_seconds:.1f} 秒  maxrss +{analyze_mb:.1f} MB ({total}件, {total / analyze_seconds:,.0f}行/秒)")
+
+if __name__ == "__main__":
+    main()
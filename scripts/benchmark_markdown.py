@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Markdown変換のベンチマークスクリプト
+毎回markdown.Markdownを生成する従来方式と、スレッドごとの変換器をreset()して使い回す方式を比較
+"""
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import markdown
+from article_renderer import MARKDOWN_PROFILES, convert_markdown
+
+def build_sample_body(paragraphs):
+    """一般的な記事本文を模したMarkdownを生成"""
+    section = """## 見出し{index}
+
+これは**ベンチマーク**用の段落です。*強調*や`インラインコード`、[リンク](https://example.com/{index})を含みます。
+改行も含まれます。
+
+- 項目A
+- 項目B
+
+```python
+def hello_{index}():
+    return "world"
+```
+
+| 列1 | 列2 |
+|-----|-----|
+| {index} | 値 |
+
+"""
+    return "# ベンチマーク記事\n\n" + ''.join(section.format(index=i) for i in range(paragraphs))
+
+def fresh_convert(text):
+    """従来方式: 呼び出しごとに変換器を生成"""
+    return markdown.Markdown(**MARKDOWN_PROFILES['article']).convert(text)
+
+def pooled_convert(text):
+    """使い回し方式: スレッドごとの変換器をreset()して使用"""
+    return convert_markdown(text)
+
+def benchmark(func, text, iterations):
+    """1回あたりの平均処理時間（ミリ秒）を計測"""
+    func(text)  # ウォームアップ
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(text)
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Markdown変換のベンチマーク')
+    parser.add_argument('--iterations', type=int, default=300, help='計測回数')
+    args = parser.parse_args()
+
+    for label, paragraphs in (('短い本文', 1), ('標準的な本文', 10), ('長い本文', 50)):
+        text = build_sample_body(paragraphs)
+        if fresh_convert(text) != pooled_convert(text):
+            print(f"⚠️ {label}: 変換結果が一致しません")
+
+        fresh_ms = benchmark(fresh_convert, text, args.iterations)
+        pooled_ms = benchmark(pooled_convert, text, args.iterations)
+        print(f"{label}（{len(text)}文字）: 従来 {fresh_ms:7.3f} ms / 使い回し {pooled_ms:7.3f} ms（{fresh_ms / pooled_ms:.2f}倍）")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+OGPヘッダ解析のベンチマークスクリプト
+従来方式（64KBをbytes連結 + BeautifulSoupで全体解析）と
+ストリーミング方式（</head>で読み取り停止 + 軽量パーサー）を比較
+"""
+import sys
+import os
+import time
+import logging
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+from ogp_fetcher import read_html_head, parse_ogp_head
+
+BENCHMARK_URL = 'https://example.com/articles/benchmark'
+
+def build_sample_page(body_kb=200):
+    """一般的な記事ページを模したHTMLを生成"""
+    head = ['<!DOCTYPE html><html lang="ja"><head><meta charset="utf-8">',
+            '<title>ベンチマーク用ページ | Example</title>',
+            '<meta name="description" content="OGP解析ベンチマーク用のページです。">',
+            '<meta property="og:title" content="ベンチマーク用ページ">',
+            '<meta property="og:description" content="OGP解析のベンチマーク">',
+            '<meta property="og:image" content="https://example.com/ogp.png">',
+            '<meta property="og:site_name" content="Example">',
+            '<meta name="twitter:card" content="summary_large_image">']
+    head += [f'<link rel="preload" href="/static/chunk-{i}.js" as="script">' for i in range(40)]
+    head.append('<style>' + 'body{margin:0;padding:0}' * 200 + '</style></head><body>')
+    paragraph = '<p>' + 'これはベンチマーク用の本文です。' * 20 + '</p>\n'
+    body = paragraph * max(1, (body_kb * 1024) // len(paragraph.encode('utf-8')))
+    return (''.join(head) + body + '</body></html>').encode('utf-8')
+
+def iter_chunks(content, chunk_size):
+    """レスポンスのiter_contentを模したチャンク列"""
+    for i in range(0, len(content), chunk_size):
+        yield content[i:i + chunk_size]
+
+def legacy_parse(content, url):
+    """従来方式: 64KBまでbytes連結し、BeautifulSoupで解析"""
+    buffer = b''
+    for chunk in iter_chunks(content, 8192):
+        buffer += chunk
+        if len(buffer) >= 65536:
+            break
+
+    soup = BeautifulSoup(buffer, 'html.parser')
+    ogp_data = {}
+    for tag in soup.find_all('meta', attrs={'property': lambda x: x and x.startswith('og:')}):
+        prop = tag.get('property', '').lower()
+        value = tag.get('content', '').strip()
+        if value and prop in ('og:title', 'og:description', 'og:image', 'og:site_name', 'og:url'):
+            ogp_data[prop[3:]] = value
+    for tag in soup.find_all('meta', attrs={'name': lambda x: x and x.startswith('twitter:')}):
+        name = tag.get('name', '').lower()
+        value = tag.get('content', '').strip()
+        if value and name in ('twitter:title', 'twitter:description', 'twitter:image') and not ogp_data.get(name[8:]):
+            ogp_data[name[8:]] = value
+    if not ogp_data.get('title'):
+        title_tag = soup.find('title')
+        if title_tag:
+            ogp_data['title'] = title_tag.get_text().strip()
+    if not ogp_data.get('description'):
+        desc_tag = soup.find('meta', attrs={'name': 'description'})
+        if desc_tag and desc_tag.get('content'):
+            ogp_data['description'] = desc_tag.get('content', '').strip()
+    return ogp_data
+
+def streaming_parse(content, url):
+    """ストリーミング方式: </head>で読み取りを止めて軽量パーサーで解析"""
+    head = read_html_head(iter_chunks(content, 4096))
+    return parse_ogp_head(head, url, content_type='text/html; charset=utf-8')
+
+def benchmark(func, content, iterations):
+    """1回あたりの平均処理時間（ミリ秒）を計測"""
+    func(content, BENCHMARK_URL)  # ウォームアップ
+    start = time.perf_counter()
+    for _ in range(iterations):
+        result = func(content, BENCHMARK_URL)
+    elapsed = time.perf_counter() - start
+    return elapsed / iterations * 1000, result
+
+def main():
+    parser = argparse.ArgumentParser(description='OGPヘッダ解析のベンチマーク')
+    parser.add_argument('--iterations', type=int, default=200, help='計測回数')
+    parser.add_argument('--body-kb', type=int, default=200, help='サンプルページ本文のサイズ（KB）')
+    args = parser.parse_args()
+
+    # 従来方式は64KB境界でマルチバイト文字が切れるため、BeautifulSoupの置換警告を抑制
+    logging.getLogger('bs4.dammit').setLevel(logging.ERROR)
+
+    content = build_sample_page(args.body_kb)
+    head_size = len(read_html_head(iter_chunks(content, 4096)))
+    print(f"サンプルページ: {len(content) / 1024:.1f}KB（</head>まで {head_size / 1024:.1f}KB）")
+
+    legacy_ms, legacy_result = benchmark(legacy_parse, content, args.iterations)
+    streaming_ms, streaming_result = benchmark(streaming_parse, content, args.iterations)
+
+    print(f"従来方式        : {legacy_ms:8.3f} ms/回")
+    print(f"ストリーミング方式: {streaming_ms:8.3f} ms/回（{legacy_ms / streaming_ms:.1f}倍）")
+
+    for key in ('title', 'description', 'image'):
+        if legacy_result.get(key) != streaming_result.get(key):
+            print(f"⚠️ 抽出結果が一致しません: {key}: {legacy_result.get(key)!r} != {streaming_result.get(key)!r}")
+
+if __name__ == "__main__":
+    main()
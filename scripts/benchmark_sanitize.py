@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+HTMLサニタイズのベンチマークスクリプト
+呼び出しごとにbleach.cleanを使う従来方式と、プロファイルごとのCleanerを使い回す方式を比較
+"""
+import sys
+import os
+import time
+import warnings
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bleach
+from article_renderer import SANITIZE_PROFILES, get_html_cleaner
+
+def build_sample_html(paragraphs):
+    """Markdown変換後の記事本文を模したHTMLを生成"""
+    section = """<h2 id="section-{index}">見出し{index}</h2>
+<p>これは<strong>ベンチマーク</strong>用の段落です。<em>強調</em>や<code>インラインコード</code>、<a href="https://example.com/{index}" onclick="alert(1)">リンク</a>を含みます。<br>
+改行も含まれます。</p>
+<ul>
+<li>項目A</li>
+<li>項目B <span style="color:red">装飾</span></li>
+</ul>
+<div class="codehilite"><pre><span></span><code>def hello_{index}():
+    return "world"
+</code></pre></div>
+<table><thead><tr><th>列1</th><th>列2</th></tr></thead><tbody><tr><td>{index}</td><td>値</td></tr></tbody></table>
+"""
+    return ''.join(section.format(index=i) for i in range(paragraphs))
+
+def legacy_clean(profile, html):
+    """従来方式: 呼び出しごとにbleach.clean（内部でCleanerを生成）"""
+    return bleach.clean(html, **SANITIZE_PROFILES[profile])
+
+def cleaner_clean(profile, html):
+    """使い回し方式: プロファイルごとのCleanerを使用"""
+    return get_html_cleaner(profile).clean(html)
+
+def benchmark(func, profile, html, iterations):
+    """1回あたりの平均処理時間（ミリ秒）を計測"""
+    func(profile, html)  # ウォームアップ
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(profile, html)
+    return (time.perf_counter() - start) / iterations * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='HTMLサニタイズのベンチマーク')
+    parser.add_argument('--iterations', type=int, default=100, help='計測回数')
+    args = parser.parse_args()
+
+    # style属性許可時のcss_sanitizer未設定警告は計測に関係しないため抑制
+    warnings.simplefilter('ignore')
+
+    for paragraphs in (1, 20, 200):
+        html = build_sample_html(paragraphs)
+        for profile in SANITIZE_PROFILES:
+            if legacy_clean(profile, html) != cleaner_clean(profile, html):
+                print(f"⚠️ {profile}: サニタイズ結果が一致しません")
+
+            legacy_ms = benchmark(legacy_clean, profile, html, args.iterations)
+            cleaner_ms = benchmark(cleaner_clean, profile, html, args.iterations)
+            throughput = len(html.encode('utf-8')) / 1024 / (cleaner_ms / 1000)
+            print(f"{profile:8s} {len(html) / 1024:7.1f}KB: 従来 {legacy_ms:8.3f} ms / 使い回し {cleaner_ms:8.3f} ms"
+                  f"（{legacy_ms / cleaner_ms:.2f}倍, {throughput:,.0f} KB/s）")
+
+if __name__ == "__main__":
+    main()
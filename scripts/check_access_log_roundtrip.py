@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+アクセスログの書き込み・分析の往復チェックスクリプト
+access_loggerで書き込んだ行をaccess_log_analyzerでパースし、引用符・バックスラッシュ・改行等を含む
+Referer / User-Agent / パスが元の値に戻らない場合（Combined形式として読めない場合を含む）は終了コード1を返す
+"""
+import sys
+import os
+import time
+import tempfile
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from access_logger import AccessLogListener, RotatingLogFile
+from access_log_analyzer import AccessLogAnalyzer, tail_lines
+
+# (パス, Referer, User-Agent)
+CASES = [
+    ('/', '-', 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'),
+    ('/article/hello-world/', 'https://example.com/?q="quoted"', 'Mozilla/5.0 "quoted" UA'),
+    ('/search?q=a"b', '-', 'UA ending with backslash\\'),
+    ('/a\\b', 'https://example.com/\\"', 'back\\slash and "quote\\"'),
+    ('/', '-', 'line\nbreak\tand\rreturn'),
+    ('/記事/', 'https://例え.jp/', 'ユーザーエージェント'),
+]
+
+def main():
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'access.log')
+        listener = AccessLogListener(RotatingLogFile(path))
+        listener.start()
+        for request_path, referrer, user_agent in CASES:
+            listener.queue.put((time.time(), '198.51.100.1', 'GET', request_path, 'HTTP/1.1', 200, 123,
+                                referrer, user_agent))
+        listener.stop()
+
+        analyzer = AccessLogAnalyzer(path)
+        lines = list(tail_lines(path, len(CASES)))[::-1]
+        analyzer.detect_format(lines)
+
+        failed = len(lines) != len(CASES)
+        for line, (request_path, referrer, user_agent) in zip(lines, CASES):
+            entry = analyzer._parse_log_line(line)
+            parsed = (entry.get('path'), entry.get('referer'), entry.get('user_agent'))
+            ok = entry['pattern'] == 'combined' and parsed == (request_path, referrer, user_agent)
+            failed = failed or not ok
+            print(f"{'✅' if ok else '❌'} {entry['pattern']:<8} {user_agent!r}"
+                  f"{'' if ok else f' → {parsed!r}'}")
+
+        stats = analyzer.analyze_logs()
+        ok = stats['total_requests'] == len(CASES) and stats['bot_requests'] == 0
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} analyze_logs: {stats['total_requests']}件（期待値: {len(CASES)}件）")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+OGPキャッシュの再取得判定のチェックスクリプト
+未取得・期限切れ・取得失敗（エラー用の有効期限切れ）のOGPエントリが、レンダリングキャッシュ済みの記事の表示時に
+バックグラウンド取得の対象になるか、再表示時に重複して登録されないかを確認し、想定と異なる場合は終了コード1を返す
+（チェック用のURLは example.invalid ドメインを使い、終了時にキャッシュから削除する）
+"""
+import sys
+import os
+import json
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete
+from app import app, db
+from models import Article, OGPCache
+import article_renderer
+from ogp_fetcher import _url_hash, OGP_CACHE_DURATION, OGP_ERROR_CACHE_DURATION
+
+URLS = {
+    'missing': 'https://missing.example.invalid/page',
+    'fresh': 'https://fresh.example.invalid/page',
+    'expired': 'https://expired.example.invalid/page',
+    'error_expired': 'https://error-expired.example.invalid/page',
+    'error_fresh': 'https://error-fresh.example.invalid/page',
+}
+# 再取得の対象になるべきもの
+EXPECTED = ['missing', 'expired', 'error_expired']
+
+def add_entry(url, status, age_seconds, ttl):
+    fetched_at = datetime.utcnow() - timedelta(seconds=age_seconds)
+    db.session.add(OGPCache(
+        url_hash=_url_hash(url), url=url, status=status,
+        data=json.dumps({'title': 'cached'}) if status == 'ok' else None,
+        fetched_at=fetched_at, expires_at=fetched_at + timedelta(seconds=ttl), last_accessed_at=fetched_at,
+    ))
+
+def cleanup():
+    db.session.execute(delete(OGPCache).where(OGPCache.url_hash.in_([_url_hash(url) for url in URLS.values()])))
+    db.session.commit()
+
+def main():
+    scheduled = []
+    with app.test_request_context():
+        cleanup()
+        add_entry(URLS['fresh'], 'ok', 60, OGP_CACHE_DURATION)
+        add_entry(URLS['expired'], 'ok', OGP_CACHE_DURATION + 60, OGP_CACHE_DURATION)
+        add_entry(URLS['error_expired'], 'error', OGP_ERROR_CACHE_DURATION + 60, OGP_ERROR_CACHE_DURATION)
+        add_entry(URLS['error_fresh'], 'error', 60, OGP_ERROR_CACHE_DURATION)
+        db.session.commit()
+
+        # レンダリングキャッシュが有効な記事（DBには保存しない）
+        article = Article(id=-1, title='OGP refresh check', slug='ogp-refresh-check',
+                          body='\n\n'.join(URLS.values()))
+        article_renderer.render_article_body(article)
+
+        # 外部アクセスせず、スケジュールされたURLだけを記録
+        original = article_renderer.schedule_ogp_prefetch
+        article_renderer.schedule_ogp_prefetch = lambda urls, on_complete=None: scheduled.extend(urls)
+        try:
+            rendered = article_renderer.ensure_article_rendered(article)
+            first = list(scheduled)
+            # 確認間隔内の再表示、および取得中のURLは再登録しない
+            article_renderer.ensure_article_rendered(article)
+            article_renderer._ogp_refresh_checked_at.clear()
+            article_renderer.ensure_article_rendered(article)
+        finally:
+            article_renderer.schedule_ogp_prefetch = original
+            cleanup()
+
+    expected = [URLS[name] for name in EXPECTED]
+    ok = not rendered and first == expected
+    print(f"{'✅' if ok else '❌'} キャッシュ済み記事の表示時に再取得: "
+          f"{', '.join(name for name, url in URLS.items() if url in first) or '-'}"
+          f"（期待値: {', '.join(EXPECTED)}）")
+    deduplicated = scheduled == first
+    print(f"{'✅' if deduplicated else '❌'} 再表示時の重複登録: {len(scheduled) - len(first)}件（期待値: 0件）")
+    if not (ok and deduplicated):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+クエリ数・読み込み行数の予算チェックスクリプト
+主要な処理が発行するSQL数とORMで読み込むオブジェクト数を計測し、予算を超えた場合は終了コード1を返す
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# ページ描画時のクエリを計測するため、ページキャッシュは使わない
+os.environ['PAGE_CACHE_ENABLED'] = 'false'
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from app import app, db, load_user
+from models import User, Article, Category
+
+class QueryCounter:
+    """ブロック内で発行されたSQL数と、ORMで読み込まれたオブジェクト数を数える"""
+
+    def __init__(self):
+        self.statements = []
+        self.loaded = {}
+
+    @property
+    def query_count(self):
+        return len(self.statements)
+
+    @property
+    def row_count(self):
+        return sum(self.loaded.values())
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def _on_load(self, session, instance):
+        name = type(instance).__name__
+        self.loaded[name] = self.loaded.get(name, 0) + 1
+
+    def __enter__(self):
+        event.listen(db.engine, 'before_cursor_execute', self._on_execute)
+        event.listen(Session, 'loaded_as_persistent', self._on_load)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(db.engine, 'before_cursor_execute', self._on_execute)
+        event.remove(Session, 'loaded_as_persistent', self._on_load)
+        return False
+
+def report(label, counter, max_queries, max_rows):
+    """計測結果を表示し、予算内ならTrueを返す"""
+    ok = counter.query_count <= max_queries and counter.row_count <= max_rows
+    mark = '✅' if ok else '❌'
+    loaded = ', '.join(f"{name}={count}" for name, count in sorted(counter.loaded.items())) or '-'
+    print(f"{mark} {label}: queries={counter.query_count}/{max_queries} rows={counter.row_count}/{max_rows} ({loaded})")
+    if not ok:
+        for statement in counter.statements:
+            print(f"    {' '.join(statement.split())[:160]}")
+    return ok
+
+def check_load_user():
+    """認証ユーザーの読み込みがユーザー1行のみで完了するか（記事数に依存しない）"""
+    with app.app_context():
+        user = db.session.execute(
+            select(User).where(User.role == 'admin').order_by(User.id).limit(1)
+        ).scalar_one_or_none()
+        if user is None:
+            print("⏭️ load_user: 管理者ユーザーが存在しないためスキップ")
+            return True
+        user_id = user.id
+        db.session.expunge_all()
+
+        with app.test_request_context():
+            with QueryCounter() as counter:
+                loaded_user = load_user(str(user_id))
+                # リクエスト中によく参照される属性
+                _ = (loaded_user.is_authenticated, loaded_user.role, loaded_user.name, loaded_user.totp_enabled)
+        return report('load_user (admin)', counter, max_queries=1, max_rows=1)
+
+# 公開ページの予算（ページ内の記事数に比例する分は含むが、カテゴリ経由で他の記事を辿ると超える値）
+PAGE_BUDGETS = {
+    'home': {'max_queries': 6, 'max_rows': 40},
+    'category': {'max_queries': 6, 'max_rows': 40},
+    'article': {'max_queries': 6, 'max_rows': 60},
+}
+
+def check_public_pages():
+    """トップ・カテゴリ・記事ページが予算内のクエリ数・読み込み行数で表示できるか（匿名アクセス）"""
+    with app.app_context():
+        article = db.session.execute(
+            select(Article).where(Article.is_published.is_(True)).order_by(Article.created_at.desc()).limit(1)
+        ).scalar_one_or_none()
+        category = db.session.execute(select(Category).order_by(Category.id).limit(1)).scalar_one_or_none()
+        pages = [('home', '/')]
+        if category is not None:
+            pages.append(('category', f'/category/{category.slug}/'))
+        if article is not None:
+            pages.append(('article', f'/article/{article.slug}/'))
+        db.session.remove()
+
+    results = []
+    client = app.test_client()
+    for name, url in pages:
+        # 設定・本文レンダリング等のキャッシュを温めてから計測
+        client.get(url)
+        with app.app_context(), QueryCounter() as counter:
+            response = client.get(url)
+        if response.status_code != 200:
+            print(f"❌ {name} ({url}): status={response.status_code}")
+            results.append(False)
+            continue
+        results.append(report(f"{name} ({url})", counter, **PAGE_BUDGETS[name]))
+    return all(results)
+
+def main():
+    checks = [check_load_user, check_public_pages]
+    results = [check() for check in checks]
+    if not all(results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+記事一覧用のプレーンテキスト抜粋のチェックスクリプト
+先頭の段落がSNS埋込・OGPカードのみの本文やスクリプトを含む本文から抜粋を生成し、
+埋込・カード・スクリプトの文字列が混ざった場合は終了コード1を返す
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import app
+from models import Article
+from article_renderer import render_article_body
+
+CASES = [
+    (
+        '先頭がYouTube埋込のみ',
+        'https://www.youtube.com/watch?v=dQw4w9WgXcQ\n\n本文の最初の段落です。',
+        '本文の最初の段落です。',
+    ),
+    (
+        '先頭がOGPカード・Instagram埋込のみ',
+        'https://card.example.invalid/page\n\nhttps://www.instagram.com/p/abc123/\n\n続く段落です。',
+        '続く段落です。',
+    ),
+    (
+        'インラインのscript',
+        '段落A\n\n<script>var secret = "script body";</script>\n\n段落B',
+        '段落A 段落B',
+    ),
+]
+# 抜粋に含まれてはいけない文字列（埋込・カードの定型文とスクリプトの中身）
+FORBIDDEN = ['リンクを開く', 'このリンクの詳細情報を表示', 'View this post', 'card.example.invalid',
+             'youtube', 'script body', 'instgrm']
+
+def main():
+    failed = False
+    with app.test_request_context():
+        for label, body, expected in CASES:
+            article = Article(id=-1, title=label, slug='excerpt-check', body=body)
+            render_article_body(article)
+            excerpt = article.rendered_excerpt
+            leaked = [word for word in FORBIDDEN if word in excerpt]
+            ok = excerpt == expected and not leaked
+            failed = failed or not ok
+            print(f"{'✅' if ok else '❌'} {label}: {excerpt!r}"
+                  f"{'' if ok else f'（期待値: {expected!r}、混入: {leaked}）'}")
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
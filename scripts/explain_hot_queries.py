@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+主要クエリの実行計画確認スクリプト
+公開記事一覧・カテゴリ別一覧・コメント一覧・SEO分析取得などのEXPLAIN結果を表示する
+インデックス追加前に --save で保存し、マイグレーション適用後に --compare で比較できる
+
+例:
+    python scripts/explain_hot_queries.py --save explain_before.json
+    flask db upgrade
+    python scripts/explain_hot_queries.py --compare explain_before.json
+"""
+import sys
+import os
+import json
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, text, and_, or_
+from app import app, db
+from models import Article, Comment, SEOAnalysis, article_categories
+
+PER_PAGE = 10
+
+def build_hot_queries():
+    """計測対象のクエリ（サンプルのIDは既存データから取得）"""
+    article_id = db.session.execute(select(Article.id).order_by(Article.id.desc()).limit(1)).scalar() or 1
+    category_id = db.session.execute(
+        select(article_categories.c.category_id).limit(1)
+    ).scalar() or 1
+    boundary = db.session.execute(
+        select(Article.created_at, Article.id)
+        .where(Article.is_published.is_(True))
+        .order_by(Article.created_at.desc(), Article.id.desc())
+        .limit(1)
+    ).first()
+
+    published = select(Article).where(Article.is_published.is_(True))
+    queries = {
+        '公開記事一覧（OFFSET）': published
+            .order_by(Article.created_at.desc(), Article.id.desc())
+            .limit(PER_PAGE).offset(PER_PAGE * 10),
+        '公開記事一覧（件数）': select(db.func.count()).select_from(published.subquery()),
+        'カテゴリ別一覧': select(Article).join(article_categories).where(
+                article_categories.c.category_id == category_id,
+                Article.is_published.is_(True)
+            ).order_by(Article.created_at.desc(), Article.id.desc()).limit(PER_PAGE),
+        '記事のコメント一覧': select(Comment).where(
+                Comment.article_id == article_id,
+                Comment.is_approved.is_(True),
+                Comment.parent_id.is_(None)
+            ).order_by(Comment.created_at.asc()),
+        'SEO分析結果の取得': select(SEOAnalysis).where(
+                SEOAnalysis.article_id == article_id,
+                SEOAnalysis.analysis_type == 'llmo'
+            ).limit(1),
+    }
+    if boundary is not None:
+        created_at, boundary_id = boundary
+        queries['公開記事一覧（キーセット）'] = published.where(or_(
+                Article.created_at < created_at,
+                and_(Article.created_at == created_at, Article.id < boundary_id)
+            )).order_by(Article.created_at.desc(), Article.id.desc()).limit(PER_PAGE + 1)
+    return queries
+
+def explain(statement):
+    """EXPLAINを実行し、計画の各行を文字列のリストで返す"""
+    dialect = db.engine.dialect
+    sql = str(statement.compile(dialect=dialect, compile_kwargs={'literal_binds': True}))
+    if dialect.name == 'sqlite':
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return [row[-1] for row in rows]
+
+    result = db.session.execute(text(f"EXPLAIN {sql}"))
+    columns = list(result.keys())
+    wanted = [c for c in ('table', 'type', 'key', 'rows', 'filtered', 'Extra') if c in columns] or columns
+    return [' '.join(f"{c}={row[columns.index(c)]}" for c in wanted) for row in result.all()]
+
+def print_plan(plan, indent='    '):
+    for line in plan:
+        print(f"{indent}{line}")
+
+def main():
+    parser = argparse.ArgumentParser(description='主要クエリの実行計画確認')
+    parser.add_argument('--save', help='実行計画をJSONに保存')
+    parser.add_argument('--compare', help='保存済みの実行計画（変更前）と比較表示')
+    args = parser.parse_args()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+
+    with app.app_context():
+        print(f"データベース: {db.engine.dialect.name}")
+        plans = {}
+        for name, statement in build_hot_queries().items():
+            plans[name] = explain(statement)
+            print(f"\n■ {name}")
+            if name in previous:
+                print("  変更前:")
+                print_plan(previous[name])
+                print("  変更後:")
+            print_plan(plans[name])
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(plans, f, ensure_ascii=False, indent=2)
+        print(f"\n実行計画を {args.save} に保存しました。")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+アクセスログのインデックス更新スクリプト
+前回の位置以降に追記された行（ローテーション済みのバックアップを含む）を時間別・日別の集計に反映する
+cron等で定期的に実行しておくと、管理画面の表示時に読み込む量が少なくなる
+
+例:
+    python scripts/index_access_logs.py
+    python scripts/index_access_logs.py --range 30d   # 更新後に期間内の概要を表示
+"""
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from access_logger import ACCESS_LOG_PATH
+from access_log_index import AccessLogIndex, ACCESS_LOG_INDEX_PATH, INDEX_RANGES
+
+def main():
+    parser = argparse.ArgumentParser(description='アクセスログのインデックス更新')
+    parser.add_argument('log_file', nargs='?', default=ACCESS_LOG_PATH, help='ログファイル')
+    parser.add_argument('--index', default=ACCESS_LOG_INDEX_PATH, help='インデックスのSQLiteファイル')
+    parser.add_argument('--max-mb', type=int, help='1回で読み込む上限（MB、省略時は全て）')
+    parser.add_argument('--range', choices=list(INDEX_RANGES), help='更新後に概要を表示する期間')
+    args = parser.parse_args()
+
+    index = AccessLogIndex(args.log_file, args.index)
+    start = time.perf_counter()
+    status = index.update(max_bytes=args.max_mb * 1024 * 1024 if args.max_mb else None)
+    elapsed = time.perf_counter() - start
+    if status is None:
+        print("⏭️ 他のプロセスがインデックスを更新中のためスキップしました")
+    else:
+        print(f"✅ {status['lines']:,}行 ({status['bytes'] / 1024 / 1024:.1f}MB) を {elapsed:.2f}秒で集計"
+              f"（未集計 {status['pending_bytes'] / 1024 / 1024:.1f}MB）")
+
+    if args.range:
+        start = time.perf_counter()
+        stats = index.query(args.range).to_dict()
+        elapsed = time.perf_counter() - start
+        print(f"{INDEX_RANGES[args.range][0]}: {stats['total_requests']:,}リクエスト, "
+              f"ユニークIP {stats['unique_ips']:,} ({elapsed * 1000:.1f}ms)")
+
+if __name__ == "__main__":
+    main()
@@ -23,6 +23,7 @@ import time
 # Flask アプリケーションの初期化
 from app import app, db
 from models import User, Article, Category
+from article_renderer import render_article_body
 
 # WordPress XML の名前空間定義
 WP_NAMESPACES = {
@@ -314,6 +315,9 @@ class WordPressImporter:
                     db.session.add(article)
                     db.session.flush()  # IDを取得
                     
+                    # 本文のレンダリング結果をキャッシュ（一覧の抜粋に使用）
+                    render_article_body(article)
+                    
                     # カテゴリ関連付け
                     for category_name in post_data['categories']:
                         category = None